@@ -4,3 +4,15 @@ BinanceBulkDownloader: A library to efficiently and concurrently download histor
 
 import binance_bulk_downloader.downloader
 import binance_bulk_downloader.exceptions
+import binance_bulk_downloader.manifest
+import binance_bulk_downloader.file_key
+import binance_bulk_downloader.reader
+import binance_bulk_downloader.lock
+import binance_bulk_downloader.batch
+import binance_bulk_downloader.throttle
+import binance_bulk_downloader.endpoints
+import binance_bulk_downloader.validate
+import binance_bulk_downloader.normalize
+import binance_bulk_downloader.hive
+import binance_bulk_downloader.resample
+import binance_bulk_downloader.bars
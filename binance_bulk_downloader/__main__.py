@@ -0,0 +1,9 @@
+"""
+python -m binance_bulk_downloader
+"""
+
+import sys
+
+from binance_bulk_downloader.cli import main
+
+sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+Build time, tick, volume and dollar bars from trades and aggTrades files, chunk by chunk
+"""
+
+# import standard libraries
+import io
+import os
+from typing import Optional, Union
+
+# import my libraries
+from binance_bulk_downloader.file_key import FileKey
+from binance_bulk_downloader.reader import (
+    MICROSECONDS_THRESHOLD,
+    TIME_COLUMNS,
+    import_numpy,
+    interval_to_milliseconds,
+    iter_arrays,
+)
+
+BAR_KINDS = ("time", "tick", "volume", "dollar")
+# Columns of the bars, in the order of the kline columns
+BAR_COLUMNS = (
+    ("open_time", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+    ("close_time", "i8"),
+    ("quote_volume", "f8"),
+    ("count", "i8"),
+    ("taker_buy_volume", "f8"),
+    ("taker_buy_quote_volume", "f8"),
+)
+_QUANTITY_COLUMNS = {"trades": "qty", "aggTrades": "quantity"}
+
+
+class BarBuilder:
+    """
+    Aggregate trades or aggTrades into bars, one chunk of rows at a time
+    A time bar covers an interval, a tick bar a number of trades, a volume bar a base quantity and a dollar bar a
+    quote quantity: a bar is closed by the row that brings it to the threshold. Rows of the bar in progress are
+    carried to the next chunk, so memory is bounded by one chunk and one bar. Timestamps of the bars are in
+    milliseconds, whatever the unit of the trades.
+    """
+
+    def __init__(self, data_type, kind, threshold: Union[str, float]) -> None:
+        """
+        :param data_type: trades or aggTrades
+        :param kind: time, tick, volume or dollar
+        :param threshold: interval of time bars (e.g. 1m, 4h), otherwise number of trades, base quantity or
+                          quote quantity of each bar
+        """
+        if data_type not in _QUANTITY_COLUMNS:
+            raise ValueError(f"Bars can only be built from {list(_QUANTITY_COLUMNS)}.")
+        if kind not in BAR_KINDS:
+            raise ValueError(f"kind must be one of {BAR_KINDS}.")
+        if kind == "time":
+            step = interval_to_milliseconds(str(threshold))
+            if step is None:
+                raise ValueError("threshold of time bars must be an interval, e.g. 1m.")
+            self._step = step
+        elif not isinstance(threshold, (int, float)) or threshold <= 0:
+            raise ValueError("threshold must be a positive number.")
+        self.data_type = data_type
+        self.kind = kind
+        self.threshold = threshold
+        self._carry = None
+
+    def _get_times(self, array):
+        """
+        Get the timestamps of trades in milliseconds
+        :param array: structured array of trades
+        :return: int64 array
+        """
+        numpy = import_numpy()
+        times = array[TIME_COLUMNS[self.data_type]]
+        return numpy.where(times >= MICROSECONDS_THRESHOLD, times // 1000, times)
+
+    def _get_bar_starts(self, array, times):
+        """
+        Find the first row of each bar closed by the rows, and where the bar in progress starts
+        :param array: structured array of trades
+        :param times: timestamps of the trades in milliseconds
+        :return: tuple of (index of the first row of each closed bar, index of the first row not in a closed bar)
+        """
+        numpy = import_numpy()
+        if self.kind == "time":
+            starts = times // self._step
+            first = numpy.flatnonzero(numpy.r_[True, starts[1:] != starts[:-1]])
+            return first[:-1], first[-1]
+        if self.kind == "tick":
+            threshold = int(self.threshold)
+            end = len(array) // threshold * threshold
+            return numpy.arange(0, end, threshold), end
+        quantity = array[_QUANTITY_COLUMNS[self.data_type]]
+        measure = quantity if self.kind == "volume" else quantity * array["price"]
+        cumulative = numpy.cumsum(measure)
+        first = [0]
+        while True:
+            base = cumulative[first[-1] - 1] if first[-1] else 0.0
+            last = int(numpy.searchsorted(cumulative, base + self.threshold))
+            if last >= len(array):
+                break
+            first.append(last + 1)
+        return numpy.array(first[:-1], dtype=numpy.int64), first[-1]
+
+    def _aggregate(self, array, times, first):
+        """
+        Aggregate rows into bars
+        :param array: structured array of trades
+        :param times: timestamps of the trades in milliseconds
+        :param first: index of the first row of each bar
+        :return: structured array of bars
+        """
+        numpy = import_numpy()
+        bars = numpy.zeros(len(first), dtype=list(BAR_COLUMNS))
+        if not len(first):
+            return bars
+        last = numpy.r_[first[1:], len(array)] - 1
+        price = array["price"]
+        quantity = array[_QUANTITY_COLUMNS[self.data_type]]
+        quote = quantity * price
+        taker_buy = ~array["is_buyer_maker"]
+        if self.data_type == "aggTrades":
+            count = array["last_trade_id"] - array["first_trade_id"] + 1
+        else:
+            count = numpy.ones(len(array), dtype=numpy.int64)
+        if self.kind == "time":
+            bars["open_time"] = times[first] // self._step * self._step
+            bars["close_time"] = bars["open_time"] + self._step - 1
+        else:
+            bars["open_time"] = times[first]
+            bars["close_time"] = times[last]
+        bars["open"] = price[first]
+        bars["close"] = price[last]
+        bars["high"] = numpy.maximum.reduceat(price, first)
+        bars["low"] = numpy.minimum.reduceat(price, first)
+        bars["volume"] = numpy.add.reduceat(quantity, first)
+        bars["quote_volume"] = numpy.add.reduceat(quote, first)
+        bars["count"] = numpy.add.reduceat(count, first)
+        bars["taker_buy_volume"] = numpy.add.reduceat(
+            numpy.where(taker_buy, quantity, 0.0), first
+        )
+        bars["taker_buy_quote_volume"] = numpy.add.reduceat(
+            numpy.where(taker_buy, quote, 0.0), first
+        )
+        return bars
+
+    def update(self, array):
+        """
+        Add the next chunk of trades, in time order after the previous ones
+        :param array: structured array of trades (see reader.parse_csv)
+        :return: structured array of the bars closed by the chunk
+        """
+        numpy = import_numpy()
+        if self._carry is not None:
+            array = numpy.concatenate([self._carry, array])
+            self._carry = None
+        if not len(array):
+            return numpy.zeros(0, dtype=list(BAR_COLUMNS))
+        times = self._get_times(array)
+        first, pending = self._get_bar_starts(array, times)
+        if pending < len(array):
+            self._carry = array[pending:]
+        return self._aggregate(array[:pending], times[:pending], first)
+
+    def flush(self):
+        """
+        Close the bar in progress, which may be below the threshold
+        :return: structured array of the last bar, empty if there is none
+        """
+        numpy = import_numpy()
+        carry, self._carry = self._carry, None
+        if carry is None:
+            return numpy.zeros(0, dtype=list(BAR_COLUMNS))
+        return self._aggregate(carry, self._get_times(carry), numpy.array([0]))
+
+
+def build_bars(
+    path,
+    data_type,
+    kind,
+    threshold: Union[str, float],
+    chunk_bytes: Optional[int] = None,
+):
+    """
+    Build the bars of a downloaded trades or aggTrades file, reading it chunk by chunk
+    :param path: path of a .csv, .zip, .csv.gz or .csv.zst file
+    :param data_type: trades or aggTrades
+    :param kind: time, tick, volume or dollar
+    :param threshold: interval of time bars, otherwise number of trades, base quantity or quote quantity of each bar
+    :param chunk_bytes: Optional. Approximate csv size of each chunk. Defaults to reader.iter_arrays' default.
+    :return: structured array of bars
+    """
+    numpy = import_numpy()
+    builder = BarBuilder(data_type, kind, threshold)
+    chunks = (
+        iter_arrays(path, data_type)
+        if chunk_bytes is None
+        else iter_arrays(path, data_type, chunk_bytes)
+    )
+    bars = [builder.update(chunk) for chunk in chunks]
+    bars.append(builder.flush())
+    return numpy.concatenate(bars)
+
+
+def format_bars(bars) -> bytes:
+    """
+    Write bars as csv rows with a header
+    :param bars: structured array of bars
+    :return: csv content
+    """
+    numpy = import_numpy()
+    buffer = io.BytesIO()
+    numpy.savetxt(
+        buffer,
+        bars,
+        fmt=["%d" if kind == "i8" else "%.8f" for _, kind in BAR_COLUMNS],
+        delimiter=",",
+        header=",".join(name for name, _ in BAR_COLUMNS),
+        comments="",
+    )
+    return buffer.getvalue()
+
+
+class BarStage:
+    """
+    Post-download stage writing the bars of each downloaded trades or aggTrades file
+    Pass it as post_download to BinanceBulkDownloader. Bars are built per file: the last bar of a file is closed
+    at the end of the file.
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        kind,
+        threshold: Union[str, float],
+        chunk_bytes: Optional[int] = None,
+    ) -> None:
+        """
+        :param output_dir: directory of the bar files, written as <symbol>/<file name>-<kind>-<threshold>.csv
+        :param kind: time, tick, volume or dollar
+        :param threshold: interval of time bars, otherwise number of trades, base quantity or quote quantity
+        :param chunk_bytes: Optional. Approximate csv size of each chunk read
+        """
+        if kind not in BAR_KINDS:
+            raise ValueError(f"kind must be one of {BAR_KINDS}.")
+        self.output_dir = output_dir
+        self.kind = kind
+        self.threshold = threshold
+        self.chunk_bytes = chunk_bytes
+
+    def get_path(self, key) -> str:
+        """
+        Get the path of the bar file of a downloaded file
+        :param key: s3 key of the downloaded file
+        :return: path of the bar file
+        """
+        file_key = FileKey.parse(key)
+        name = os.path.basename(key)[: -len(".zip")]
+        return os.path.join(
+            self.output_dir,
+            file_key.symbol or "",
+            f"{name}-{self.kind}-{self.threshold}.csv",
+        )
+
+    def __call__(self, result) -> None:
+        """
+        Write the bars of a downloaded file
+        :param result: DownloadResult of the file
+        :return: None
+        """
+        data_type = FileKey.parse(result.key).data_type
+        bars = build_bars(
+            result.local_path, data_type, self.kind, self.threshold, self.chunk_bytes
+        )
+        path = self.get_path(result.key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".part", "wb") as file:
+            file.write(format_bars(bars))
+        os.replace(path + ".part", path)
@@ -0,0 +1,315 @@
+"""
+Download many asset / data type / frequency combinations through one shared engine
+"""
+
+# import standard libraries
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import List, Optional, Union
+
+# import third-party libraries
+import requests
+from requests.adapters import HTTPAdapter
+from rich.console import Console
+from rich.live import Live
+from rich.panel import Panel
+from rich.text import Text
+
+# import my libraries
+from binance_bulk_downloader.downloader import (
+    BinanceBulkDownloader,
+    _fits_budget,
+    _format_bytes,
+)
+from binance_bulk_downloader.exceptions import (
+    BinanceBulkDownloaderDiskSpaceError,
+    BinanceBulkDownloaderParamsError,
+)
+from binance_bulk_downloader.throttle import BandwidthLimiter
+
+
+class BatchDownloader:
+    """
+    Run several BinanceBulkDownloader jobs as one: every job is validated up front, jobs are listed
+    concurrently, and their files are drained through one download pool and one HTTP session as soon
+    as each listing completes, so that the tail of a job overlaps with the next ones.
+    """
+
+    _CHUNK_SIZE = BinanceBulkDownloader._CHUNK_SIZE
+
+    def __init__(
+        self,
+        jobs: List[Union[dict, BinanceBulkDownloader]],
+        max_workers: Optional[int] = None,
+        listing_workers: int = 4,
+        extract_workers: Optional[int] = None,
+        extract_queue_size: Optional[int] = None,
+        max_bytes_per_second: Optional[float] = None,
+        max_in_flight_bytes: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize BatchDownloader
+
+        :param jobs: list of job specs, each a dict of BinanceBulkDownloader arguments or a BinanceBulkDownloader
+        :param max_workers: Optional. Number of download threads shared by all jobs.
+                            Defaults to the ThreadPoolExecutor default.
+        :param listing_workers: Number of jobs listed at the same time.
+        :param extract_workers: Optional. Number of worker processes shared by all jobs to unzip archives.
+                                If None, archives are unzipped in the download threads.
+        :param extract_queue_size: Optional. Maximum number of downloaded archives waiting for a worker process.
+                                   Defaults to 2 * extract_workers.
+        :param max_bytes_per_second: Optional. Bandwidth cap shared by all jobs.
+        :param max_in_flight_bytes: Optional. Budget of listed bytes downloading or extracting at the same time,
+                                    shared by all jobs.
+        """
+        self.jobs = [
+            (
+                job
+                if isinstance(job, BinanceBulkDownloader)
+                else BinanceBulkDownloader(**job)
+            )
+            for job in jobs
+        ]
+        self._max_workers = max_workers
+        self._listing_workers = listing_workers
+        self._extract_workers = extract_workers
+        self._extract_queue_size = extract_queue_size or 2 * (extract_workers or 1)
+        self._max_bytes_per_second = max_bytes_per_second
+        self._max_in_flight_bytes = max_in_flight_bytes
+        self.console = Console()
+        # File system id to (free bytes before the batch, bytes required by the jobs prepared so far)
+        self._disk_budgets: dict = {}
+        self._disk_lock = threading.Lock()
+
+    @staticmethod
+    def describe(job: BinanceBulkDownloader) -> str:
+        """
+        Short label of a job
+        :param job: BinanceBulkDownloader
+        :return: label (e.g. um/daily/klines/1m)
+        """
+        label = f"{job._asset}/{job._timeperiod_per_file}/{job._data_type}"
+        if job._data_type in job._DATA_FREQUENCY_REQUIRED_BY_DATA_TYPE:
+            label += "/" + ",".join(job._get_data_frequencies())
+        return label
+
+    def _check_params(self) -> None:
+        """
+        Check params of the batch and of every job before anything is listed
+        :return: None
+        """
+        if not self.jobs:
+            raise BinanceBulkDownloaderParamsError("jobs must not be empty.")
+        if self._max_workers is not None and self._max_workers < 1:
+            raise BinanceBulkDownloaderParamsError(
+                "max_workers must be a positive integer."
+            )
+        if self._listing_workers < 1:
+            raise BinanceBulkDownloaderParamsError(
+                "listing_workers must be a positive integer."
+            )
+        if self._extract_workers is not None and self._extract_workers < 1:
+            raise BinanceBulkDownloaderParamsError(
+                "extract_workers must be a positive integer."
+            )
+        if self._max_bytes_per_second is not None and self._max_bytes_per_second <= 0:
+            raise BinanceBulkDownloaderParamsError(
+                "max_bytes_per_second must be positive."
+            )
+        if self._max_in_flight_bytes is not None and self._max_in_flight_bytes <= 0:
+            raise BinanceBulkDownloaderParamsError(
+                "max_in_flight_bytes must be positive."
+            )
+        for index, job in enumerate(self.jobs):
+            try:
+                job._check_params()
+            except BinanceBulkDownloaderParamsError as e:
+                raise BinanceBulkDownloaderParamsError(
+                    f"job {index} ({self.describe(job)}): {str(e)}"
+                )
+
+    def _make_session(self) -> requests.Session:
+        """
+        Make the HTTP session shared by every job, with a connection pool sized for the download threads
+        :return: requests.Session
+        """
+        session = requests.Session()
+        pool_size = max(self._max_workers or 32, self._listing_workers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @staticmethod
+    def _get_device(path) -> int:
+        """
+        Get the id of the file system holding path, which may not exist yet
+        :param path: destination directory
+        :return: device id
+        """
+        path = os.path.abspath(path)
+        while True:
+            try:
+                return os.stat(path).st_dev
+            except FileNotFoundError:
+                parent = os.path.dirname(path)
+                if parent == path:
+                    raise
+                path = parent
+
+    def _prepare_job(self, job: BinanceBulkDownloader) -> list:
+        """
+        List a job and drop the files already downloaded, refusing jobs that would not fit on disk
+        Jobs sharing a file system share its free space as measured before the batch started downloading,
+        so that jobs fitting one by one cannot overflow the disk together.
+        :param job: BinanceBulkDownloader
+        :return: list of files to download, in the job's schedule order
+        """
+        file_list, skipped_count = job._prepare_file_list()
+        download_plan = job._make_plan(file_list, skipped_count)
+        device = self._get_device(job._destination_dir)
+        with self._disk_lock:
+            free_bytes, reserved_bytes = self._disk_budgets.get(
+                device, (download_plan.free_bytes, 0)
+            )
+            if reserved_bytes + download_plan.required_bytes > free_bytes:
+                raise BinanceBulkDownloaderDiskSpaceError(
+                    f"Not enough disk space in {job._destination_dir}: "
+                    f"{download_plan.summary()}\n"
+                    f"Reserved by other jobs of the batch: {_format_bytes(reserved_bytes)} "
+                    f"(free before the batch: {_format_bytes(free_bytes)})"
+                )
+            self._disk_budgets[device] = (
+                free_bytes,
+                reserved_bytes + download_plan.required_bytes,
+            )
+        job._probe_download_endpoints(file_list)
+        return job._schedule(file_list)
+
+    def run_download(self) -> None:
+        """
+        Download every job concurrently
+        :return: None
+        """
+        self._check_params()
+        self.console.print(
+            Panel(f"Starting batch of {len(self.jobs)} jobs", style="blue bold")
+        )
+
+        self._disk_budgets = {}
+        session = self._make_session()
+        extract_executor = None
+        if self._extract_workers:
+            extract_executor = ProcessPoolExecutor(max_workers=self._extract_workers)
+            extract_slots = threading.BoundedSemaphore(self._extract_queue_size)
+        bandwidth = (
+            BandwidthLimiter(self._max_bytes_per_second)
+            if self._max_bytes_per_second
+            else None
+        )
+        for job in self.jobs:
+            job._finished_count = 0
+            job._http = session
+            job._show_listing = False
+            job.console = self.console
+            if bandwidth is not None:
+                job._bandwidth = bandwidth
+            if extract_executor is not None:
+                job._extract_executor = extract_executor
+                job._extract_slots = extract_slots
+
+        try:
+            with Live(
+                refresh_per_second=4, console=self.console
+            ) as live, ThreadPoolExecutor(
+                max_workers=self._listing_workers
+            ) as listing_executor, ThreadPoolExecutor(
+                max_workers=self._max_workers
+            ) as executor:
+                status = Text()
+                listings = {
+                    listing_executor.submit(self._prepare_job, job): job
+                    for job in self.jobs
+                }
+                queued = deque()
+                totals = {}
+                in_flight = {}
+                extracting = {}
+                in_flight_bytes = 0
+
+                # Drain files of every listed job through one sliding window of downloads,
+                # while the other jobs are still being listed.
+                while listings or queued or in_flight or extracting:
+                    while queued and len(in_flight) < self._CHUNK_SIZE:
+                        job, file_key = queued[0]
+                        size = file_key.size or 0
+                        if not _fits_budget(
+                            self._max_in_flight_bytes,
+                            in_flight_bytes,
+                            size,
+                            bool(in_flight or extracting),
+                        ):
+                            break
+                        queued.popleft()
+                        future = executor.submit(job._download_file, file_key)
+                        in_flight[future] = (job, size)
+                        in_flight_bytes += size
+
+                    done, _ = wait(
+                        list(listings) + list(in_flight) + list(extracting),
+                        return_when=FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        if future in listings:
+                            job = listings.pop(future)
+                            try:
+                                file_list = future.result()
+                            except Exception as e:
+                                # Other jobs keep going, the job records the failure of its listing
+                                job.failed_list.append(
+                                    (job._build_data_type_prefix(), str(e))
+                                )
+                                self.console.print(
+                                    f"Listing failed for {self.describe(job)}: {str(e)}"
+                                )
+                                continue
+                            totals[job] = len(file_list)
+                            queued.extend((job, file_key) for file_key in file_list)
+                            self.console.print(
+                                f"Listed {self.describe(job)}: {len(file_list)} files"
+                            )
+                            continue
+                        if future in in_flight:
+                            job, size = in_flight.pop(future)
+                            result, extract_future = future.result()
+                            if extract_future is not None:
+                                extracting[extract_future] = (
+                                    job,
+                                    result,
+                                    time.monotonic(),
+                                    size,
+                                )
+                                continue
+                        else:
+                            job, result, start, size = extracting.pop(future)
+                            job._finish_extract(result, future, start)
+                        in_flight_bytes -= size
+                        job._report_result(result, totals[job], live, status)
+        finally:
+            for job in self.jobs:
+                job._extract_executor = None
+                job._extract_slots = None
+                job._close_run()
+                job._http = requests
+                job._show_listing = True
+            if extract_executor is not None:
+                extract_executor.shutdown()
+            session.close()
@@ -0,0 +1,267 @@
+"""
+Command-line entry point: binance-bulk-downloader
+"""
+
+# import standard libraries
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+# import my libraries
+from binance_bulk_downloader.batch import BatchDownloader
+from binance_bulk_downloader.exceptions import (
+    BinanceBulkDownloaderDownloadError,
+    BinanceBulkDownloaderParamsError,
+)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_PARAMS_ERROR = 2
+
+# Options of BatchDownloader, the other keys of a job file are BinanceBulkDownloader arguments
+_BATCH_SETTINGS = (
+    "max_workers",
+    "listing_workers",
+    "extract_workers",
+    "extract_queue_size",
+    "max_bytes_per_second",
+    "max_in_flight_bytes",
+)
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+_FORMATS = {"csv": None, "zip": "zip", "gzip": "gzip", "zstd": "zstd"}
+
+
+def parse_size(value) -> float:
+    """
+    Parse a number of bytes with an optional K, M or G suffix (e.g. 10M)
+    :param value: size text
+    :return: number of bytes
+    """
+    text = str(value).strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in _SIZE_UNITS else ""
+    try:
+        return float(text[: len(text) - len(unit)]) * _SIZE_UNITS[unit]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser
+    :return: ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="binance-bulk-downloader",
+        description="Download historical data files from Binance Vision. "
+        "Jobs come from --job-file (YAML or JSON) and/or from the flags below, "
+        "which apply to every job of the file unless the job sets them.",
+    )
+    parser.add_argument("--job-file", help="YAML or JSON file listing jobs")
+    parser.add_argument("--asset", help="um, cm, spot or option")
+    parser.add_argument(
+        "--data-type", nargs="+", help="one or more data types, one job each"
+    )
+    parser.add_argument("--data-frequency", nargs="+", help="e.g. 1m 1h")
+    parser.add_argument("--timeperiod-per-file", help="daily or monthly")
+    parser.add_argument("--symbols", nargs="+", help="e.g. BTCUSDT ETHUSDT")
+    parser.add_argument("--start-date", help="first date to download (YYYY-MM-DD)")
+    parser.add_argument("--end-date", help="last date to download (YYYY-MM-DD)")
+    parser.add_argument(
+        "--destination-dir",
+        "--cache-dir",
+        dest="destination_dir",
+        help="directory receiving the files",
+    )
+    parser.add_argument(
+        "--format",
+        choices=list(_FORMATS),
+        help="csv extracts archives, zip/gzip/zstd keep them compressed",
+    )
+    parser.add_argument(
+        "--use-manifest",
+        action="store_true",
+        default=None,
+        help="record downloads in a SQLite manifest",
+    )
+    parser.add_argument(
+        "--listing-endpoints", nargs="+", help="base URLs answering S3 listings"
+    )
+    parser.add_argument(
+        "--download-endpoints", nargs="+", help="base URLs serving the files"
+    )
+    parser.add_argument("--max-workers", type=int, help="download threads")
+    parser.add_argument("--listing-workers", type=int, help="jobs listed at once")
+    parser.add_argument("--extract-workers", type=int, help="unzip processes")
+    parser.add_argument(
+        "--max-bytes-per-second",
+        "--bandwidth",
+        dest="max_bytes_per_second",
+        type=parse_size,
+        help="bandwidth cap, e.g. 20M",
+    )
+    parser.add_argument(
+        "--max-in-flight-bytes",
+        type=parse_size,
+        help="listed bytes downloading at once, e.g. 2G",
+    )
+    parser.add_argument(
+        "--summary",
+        default="-",
+        help="path of the JSON summary, - for stdout (default)",
+    )
+    return parser
+
+
+def load_job_file(path) -> dict:
+    """
+    Load a job file
+    Either a list of jobs, or a mapping with jobs and optional settings (batch options) and defaults
+    (arguments shared by every job).
+    :param path: path of a .yaml, .yml or .json file
+    :return: dict with settings, defaults and jobs
+    """
+    with open(path, encoding="utf-8") as file:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise BinanceBulkDownloaderParamsError(
+                    "YAML job files require the pyyaml package."
+                )
+            content = yaml.safe_load(file)
+        else:
+            content = json.load(file)
+    if isinstance(content, list):
+        content = {"jobs": content}
+    if not isinstance(content, dict) or not isinstance(content.get("jobs"), list):
+        raise BinanceBulkDownloaderParamsError(
+            f"{path} must hold a list of jobs or a mapping with jobs."
+        )
+    return {
+        "settings": content.get("settings") or {},
+        "defaults": content.get("defaults") or {},
+        "jobs": content["jobs"],
+    }
+
+
+def make_jobs(args) -> tuple:
+    """
+    Build batch settings and job specs from the parsed arguments
+    :param args: parsed arguments
+    :return: tuple of (settings dict, list of job dicts)
+    """
+    job_file = (
+        load_job_file(args.job_file)
+        if args.job_file
+        else {"settings": {}, "defaults": {}, "jobs": []}
+    )
+    settings = dict(job_file["settings"])
+    settings.update(
+        {
+            name: getattr(args, name)
+            for name in _BATCH_SETTINGS
+            if getattr(args, name, None) is not None
+        }
+    )
+
+    defaults = dict(job_file["defaults"])
+    flags = {
+        "asset": args.asset,
+        "data_frequency": (
+            args.data_frequency[0]
+            if args.data_frequency and len(args.data_frequency) == 1
+            else args.data_frequency
+        ),
+        "timeperiod_per_file": args.timeperiod_per_file,
+        "symbols": args.symbols,
+        "start_date": args.start_date,
+        "end_date": args.end_date,
+        "destination_dir": args.destination_dir,
+        "use_manifest": args.use_manifest,
+        "listing_endpoints": args.listing_endpoints,
+        "download_endpoints": args.download_endpoints,
+    }
+    defaults.update({name: value for name, value in flags.items() if value is not None})
+    if args.format:
+        defaults["keep_compressed"] = _FORMATS[args.format]
+
+    jobs = list(job_file["jobs"])
+    if args.data_type:
+        jobs.extend({"data_type": data_type} for data_type in args.data_type)
+    if not jobs:
+        jobs = [{}]
+    return settings, [{**defaults, **job} for job in jobs]
+
+
+def make_summary(batch: BatchDownloader, error: Optional[str] = None) -> dict:
+    """
+    Summarize a batch run
+    :param batch: BatchDownloader after run_download
+    :param error: Optional. Error that stopped the run
+    :return: JSON serializable summary
+    """
+    jobs = []
+    for job in batch.jobs:
+        failed = dict(job.failed_list)
+        jobs.append(
+            {
+                "job": batch.describe(job),
+                "downloaded": len(job.downloaded_list),
+                "failed": [
+                    {"key": key, "error": message} for key, message in failed.items()
+                ],
+            }
+        )
+    failed_count = sum(len(job["failed"]) for job in jobs)
+    return {
+        "ok": error is None and failed_count == 0,
+        "error": error,
+        "downloaded": sum(job["downloaded"] for job in jobs),
+        "failed": failed_count,
+        "jobs": jobs,
+    }
+
+
+def write_summary(summary, path) -> None:
+    """
+    Write the summary as JSON
+    On stdout, it is written as a single line after the progress display, so that it can be read as the last line.
+    :param summary: summary dict
+    :param path: file path, or - for stdout
+    :return: None
+    """
+    if path == "-":
+        sys.stdout.write("\n" + json.dumps(summary) + "\n")
+        return
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(summary, file, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the command line
+    :param argv: Optional. Arguments, defaults to sys.argv[1:]
+    :return: exit code (0 if every file was downloaded, 1 if some failed, 2 for invalid parameters)
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        settings, jobs = make_jobs(args)
+        batch = BatchDownloader(jobs, **settings)
+        batch._check_params()
+    except (BinanceBulkDownloaderParamsError, OSError, ValueError, TypeError) as e:
+        sys.stderr.write(f"binance-bulk-downloader: {str(e)}\n")
+        return EXIT_PARAMS_ERROR
+
+    error = None
+    try:
+        batch.run_download()
+    except BinanceBulkDownloaderDownloadError as e:
+        error = str(e)
+    summary = make_summary(batch, error)
+    write_summary(summary, args.summary)
+    return EXIT_OK if summary["ok"] else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
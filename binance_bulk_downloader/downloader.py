@@ -3,12 +3,32 @@ Binance Bulk Downloader
 """
 
 # import standard libraries
+import gzip
+import hashlib
+import heapq
+import io
+import math
+import queue
+from collections import deque
+from datetime import date
 import os
+import shutil
+import threading
+import time
 import zipfile
-from concurrent.futures import ThreadPoolExecutor
+import zlib
+from dataclasses import dataclass, field
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    CancelledError,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from xml.etree import ElementTree
 from zipfile import BadZipfile
-from typing import Optional, List, Union
+from typing import Callable, Iterator, Optional, List, Tuple, Union
 
 # import third-party libraries
 import requests
@@ -19,9 +39,276 @@ from rich.text import Text
 
 # import my libraries
 from binance_bulk_downloader.exceptions import (
+    BinanceBulkDownloaderDiskSpaceError,
     BinanceBulkDownloaderDownloadError,
+    BinanceBulkDownloaderMemoryError,
     BinanceBulkDownloaderParamsError,
 )
+from binance_bulk_downloader.file_key import FileKey
+from binance_bulk_downloader.endpoints import EndpointPool
+from binance_bulk_downloader.lock import KeyLock
+from binance_bulk_downloader.throttle import BandwidthLimiter
+from binance_bulk_downloader.validate import validate_files
+from binance_bulk_downloader.hive import link_file, write_catalog
+from binance_bulk_downloader.manifest import DownloadManifest
+from binance_bulk_downloader.normalize import CsvNormalizer
+from binance_bulk_downloader.resample import (
+    KlineResampler,
+    compare_klines,
+    write_klines,
+)
+from binance_bulk_downloader.reader import (
+    LOCAL_FILE_SUFFIXES,
+    TIME_COLUMNS,
+    find_local_file,
+    get_columns,
+    import_numpy,
+    import_zstandard,
+    local_file_candidates,
+    parse_csv,
+    read_array,
+    read_member,
+)
+
+# Suffix of files being written, renamed once complete
+_PART_SUFFIX = ".part"
+
+
+def _fits_budget(budget, used, size, busy) -> bool:
+    """
+    Check if a file can start within a budget of in-flight bytes
+    A file is always admitted when nothing is in flight, so that files larger than the budget still download.
+    :param budget: budget of bytes, None for no budget
+    :param used: bytes already in flight
+    :param size: listed size of the file
+    :param busy: True if files are in flight
+    :return: True if the file can start
+    """
+    return budget is None or not busy or used + size <= budget
+
+
+def _copy(source, target) -> None:
+    """
+    Copy a zip member as it is
+    :param source: binary file object to read
+    :param target: binary file object to write
+    :return: None
+    """
+    shutil.copyfileobj(source, target, 1024 * 1024)
+
+
+def _write_member(
+    existing_zip, member, directory, keep_compressed=None, normalizer=None
+) -> str:
+    """
+    Stream a zip member to a csv, or into a gzip or zstd file without writing the csv to disk
+    The file is written under a temporary name and renamed, so it is never seen half written.
+    :param existing_zip: opened ZipFile
+    :param member: ZipInfo of the member
+    :param directory: directory of the written file
+    :param keep_compressed: Optional. gzip or zstd
+    :param normalizer: Optional. CsvNormalizer rewriting the header and timestamps of csv members
+    :return: path of the written file
+    """
+    extension = {None: "", "gzip": ".gz", "zstd": ".zst"}[keep_compressed]
+    path = os.path.join(directory, os.path.basename(member.filename) + extension)
+    part_path = path + _PART_SUFFIX
+    copy = _copy
+    if normalizer is not None and member.filename.endswith(".csv"):
+        copy = normalizer.copy
+    try:
+        with existing_zip.open(member) as source:
+            if keep_compressed is None:
+                with open(part_path, "wb") as target:
+                    copy(source, target)
+            elif keep_compressed == "gzip":
+                with gzip.open(part_path, "wb", compresslevel=6) as target:
+                    copy(source, target)
+            else:
+                zstandard = import_zstandard()
+                with zstandard.ZstdCompressor(level=3).stream_writer(
+                    open(part_path, "wb"), closefd=True
+                ) as target:
+                    copy(source, target)
+        os.replace(part_path, path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return path
+
+
+def _remove_part_file(part_path) -> None:
+    """
+    Remove a partly written file, if it was created
+    :param part_path: path of the file
+    :return: None
+    """
+    try:
+        os.remove(part_path)
+    except OSError:
+        pass
+
+
+def _extract_archive(
+    zip_destination_path, keep_compressed=None, normalizer=None
+) -> None:
+    """
+    Extract a downloaded zip next to itself and delete the zip.
+    Module level so that it can be sent to a worker process.
+    The CRC of each member is verified by zipfile while it is inflated.
+    :param zip_destination_path: path to the downloaded zip file, optionally still named with the .part suffix
+    :param keep_compressed: Optional. Keep the data compressed at rest instead of extracting it:
+                            zip keeps the verified archive, gzip or zstd recompress each member
+    :param normalizer: Optional. CsvNormalizer rewriting the header and timestamps of csv members
+    :return: None
+    """
+    try:
+        unzipped_path = os.path.dirname(zip_destination_path)
+        with zipfile.ZipFile(zip_destination_path) as existing_zip:
+            if keep_compressed == "zip":
+                bad_member = existing_zip.testzip()
+                if bad_member is not None:
+                    raise BadZipfile(f"Bad CRC-32 for {bad_member}")
+            else:
+                for member in existing_zip.infolist():
+                    if not member.is_dir():
+                        _write_member(
+                            existing_zip,
+                            member,
+                            unzipped_path,
+                            keep_compressed,
+                            normalizer,
+                        )
+        if keep_compressed == "zip":
+            if zip_destination_path.endswith(_PART_SUFFIX):
+                os.replace(
+                    zip_destination_path, zip_destination_path[: -len(_PART_SUFFIX)]
+                )
+            return
+    except BadZipfile as e:
+        if os.path.exists(zip_destination_path):
+            os.remove(zip_destination_path)
+        raise BinanceBulkDownloaderDownloadError(
+            f"Bad Zip File: {zip_destination_path}"
+        )
+    except OSError as e:
+        if os.path.exists(zip_destination_path):
+            os.remove(zip_destination_path)
+        raise BinanceBulkDownloaderDownloadError(f"Unzip error: {str(e)}")
+    except ValueError as e:
+        if os.path.exists(zip_destination_path):
+            os.remove(zip_destination_path)
+        raise BinanceBulkDownloaderDownloadError(f"Normalization error: {str(e)}")
+
+    # Delete zip file
+    try:
+        os.remove(zip_destination_path)
+    except OSError as e:
+        raise BinanceBulkDownloaderDownloadError(f"File removal error: {str(e)}")
+
+
+class _HiddenLive:
+    """
+    Stand-in for Live when a display must not be shown, e.g. while a batch lists several jobs at once
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+    def update(self, renderable) -> None:
+        pass
+
+
+def _format_bytes(size) -> str:
+    """
+    Format a number of bytes for display
+    :param size: number of bytes
+    :return: formatted size (e.g. 1.5 GiB)
+    """
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(size) < 1024 or unit == "TiB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
+
+@dataclass
+class DownloadPlan:
+    """
+    Result of BinanceBulkDownloader.plan: what a run would download and whether it fits on disk.
+    """
+
+    file_count: int
+    skipped_count: int
+    download_bytes: int
+    extracted_bytes: int
+    required_bytes: int
+    free_bytes: int
+    estimated_seconds: float
+    file_list: list = field(default_factory=list, repr=False)
+
+    @property
+    def fits_on_disk(self) -> bool:
+        return self.required_bytes <= self.free_bytes
+
+    def summary(self) -> str:
+        """
+        Human readable summary
+        :return: summary text
+        """
+        return (
+            f"Files to download: {self.file_count} (skipped: {self.skipped_count})\n"
+            f"Download size: {_format_bytes(self.download_bytes)}\n"
+            f"Estimated extracted size: {_format_bytes(self.extracted_bytes)}\n"
+            f"Required disk space: {_format_bytes(self.required_bytes)} "
+            f"(free: {_format_bytes(self.free_bytes)})\n"
+            f"Estimated time: {self.estimated_seconds / 60:.1f} min"
+        )
+
+
+@dataclass
+class DownloadResult:
+    """
+    Outcome of one file of a run, yielded by BinanceBulkDownloader.iter_download as soon as the file is complete.
+    """
+
+    STATUS_DOWNLOADED = DownloadManifest.STATUS_DOWNLOADED
+    STATUS_SKIPPED = "skipped"
+    STATUS_FAILED = DownloadManifest.STATUS_FAILED
+
+    key: str
+    local_path: Optional[str]
+    size: int
+    duration: float
+    status: str
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status != self.STATUS_FAILED
+
+
+@dataclass
+class DateGaps:
+    """
+    Dates missing from the local files of a symbol, found by BinanceBulkDownloader.find_gaps.
+    Dates are YYYY-MM-DD for daily files and YYYY-MM for monthly files.
+    """
+
+    symbol: str
+    interval: Optional[str]
+    first_date: str
+    last_date: str
+    local_count: int
+    missing_keys: list = field(default_factory=list)
+    unpublished_dates: list = field(default_factory=list)
+
+    @property
+    def missing_dates(self) -> list:
+        return [FileKey.parse(key).date for key in self.missing_keys]
 
 
 class BinanceBulkDownloader:
@@ -31,10 +318,33 @@ class BinanceBulkDownloader:
     """
 
     _CHUNK_SIZE = 100
+    _LISTING_PAGE_SIZE = 1000
+    _LISTING_STRATEGY = ("auto", "per_symbol", "parent")
+    _SYMBOL_UNIVERSE_CACHE: dict = {}
+    _SCHEDULE = ("listing", "largest_first", "interleave")
+    _SHARD_BY = ("key", "symbol")
+    _ESTIMATED_BYTES_PER_SECOND = 20 * 1024 * 1024
+    # Rough csv / zip size ratios observed on Binance Vision archives
+    _DEFAULT_EXTRACTED_SIZE_RATIO = 5.0
+    _EXTRACTED_SIZE_RATIO_BY_DATA_TYPE = {
+        "aggTrades": 3.5,
+        "trades": 3.5,
+        "klines": 4.5,
+        "indexPriceKlines": 5.0,
+        "markPriceKlines": 5.0,
+        "premiumIndexKlines": 5.0,
+        "bookTicker": 4.0,
+        "bookDepth": 6.0,
+        "metrics": 6.0,
+    }
+    # Memory used by parsing a file on top of its archive, its csv and its array
+    _LOAD_OVERHEAD_BYTES = 4 * 1024 * 1024
     _BINANCE_DATA_S3_BUCKET_URL = (
         "https://s3-ap-northeast-1.amazonaws.com/data.binance.vision"
     )
     _BINANCE_DATA_DOWNLOAD_BASE_URL = "https://data.binance.vision"
+    # Connect and read timeouts, so that a stalled endpoint fails over instead of hanging
+    _REQUEST_TIMEOUT = (10, 60)
     _FUTURES_ASSET = ("um", "cm")
     _OPTIONS_ASSET = ("option",)
     _ASSET = ("spot",)
@@ -126,17 +436,94 @@ class BinanceBulkDownloader:
         asset="um",
         timeperiod_per_file="daily",
         symbols: Optional[Union[str, List[str]]] = None,
+        extract_workers: Optional[int] = None,
+        extract_queue_size: Optional[int] = None,
+        use_manifest: bool = False,
+        refresh: bool = False,
+        listing_strategy: str = "auto",
+        schedule: str = "listing",
+        max_workers: Optional[int] = None,
+        keep_compressed: Optional[str] = None,
+        shard_index: Optional[int] = None,
+        shard_count: Optional[int] = None,
+        shard_by: str = "key",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        max_bytes_per_second: Optional[float] = None,
+        listing_endpoints: Optional[List[str]] = None,
+        download_endpoints: Optional[List[str]] = None,
+        probe_endpoints: bool = True,
+        stream_listing: bool = False,
+        csv_header: Optional[str] = None,
+        timestamp_unit: Optional[str] = None,
+        hive_dir: Optional[str] = None,
+        post_download: Optional[Callable[[DownloadResult], None]] = None,
+        max_in_flight_bytes: Optional[int] = None,
     ) -> None:
         """
         Initialize BinanceBulkDownloader
 
         :param destination_dir: Destination directory for downloaded files
         :param data_type: Type of data to download (klines, aggTrades, etc.)
-        :param data_frequency: Frequency of data to download (1m, 1h, 1d, etc.)
+        :param data_frequency: Frequency of data to download (1m, 1h, 1d, etc.), or a list of frequencies
+                               (e.g. ["1m", "1h"]) to download them all from a single listing
         :param asset: Type of asset to download (um, cm, spot, option)
         :param timeperiod_per_file: Time period per file (daily, monthly)
         :param symbols: Optional. Symbol or list of symbols to download (e.g., "BTCUSDT" or ["BTCUSDT", "ETHUSDT"]).
                        If None or empty list is provided, all available symbols will be downloaded.
+        :param extract_workers: Optional. Number of worker processes used by run_download to unzip archives.
+                                If None, archives are unzipped in the download threads.
+        :param extract_queue_size: Optional. Maximum number of downloaded archives waiting for a worker process.
+                                   Download threads block while the queue is full. Defaults to 2 * extract_workers.
+        :param use_manifest: If True, record every file (size, ETag, LastModified, checksum, status) in a SQLite
+                             manifest under destination_dir and use it to skip files already downloaded.
+        :param refresh: If True, download again files whose listed Size, ETag or LastModified changed since they were
+                        recorded in the manifest (republished by Binance). Implies use_manifest.
+        :param listing_strategy: How files of multiple symbols are listed (auto, per_symbol, parent).
+                                 per_symbol lists each symbol's prefix, parent lists the data type prefix once and
+                                 filters locally, auto picks the one needing fewer listing requests.
+        :param schedule: Order in which files are downloaded (listing, largest_first, interleave).
+                         largest_first starts the biggest listed files first so that no worker is left with a large
+                         file at the end of the run, interleave alternates big and small files.
+        :param max_workers: Optional. Number of download threads. Defaults to the ThreadPoolExecutor default.
+        :param keep_compressed: Optional. Keep data compressed at rest instead of extracting csv files (zip, gzip, zstd).
+                                zip keeps the downloaded archive, gzip and zstd recompress it to .csv.gz or .csv.zst
+                                (zstd requires the zstandard package). Read them back with reader.open_data_file.
+        :param shard_index: Optional. Index (0 to shard_count - 1) of the share of files this node downloads.
+        :param shard_count: Optional. Number of nodes splitting the run. Files are assigned to nodes by a stable
+                            hash, so every node computes the same split without coordination.
+        :param shard_by: What is hashed to assign files to nodes (key, symbol). symbol keeps every file of a symbol
+                         on the same node and lets each node list only its own symbols.
+        :param start_date: Optional. First date to download (YYYY-MM-DD). Monthly files of that month are included.
+        :param end_date: Optional. Last date to download (YYYY-MM-DD), inclusive.
+        :param max_bytes_per_second: Optional. Bandwidth cap shared by the download threads.
+        :param listing_endpoints: Optional. Base URLs answering S3 ListObjects requests.
+                                  Defaults to the ap-northeast-1 S3 bucket URL.
+        :param download_endpoints: Optional. Base URLs serving the files (e.g. data.binance.vision and the S3 bucket
+                                   URL). Defaults to data.binance.vision.
+        :param probe_endpoints: If True and several endpoints are given, time a small request to each one before
+                                the run and use the fastest first. Endpoints that keep failing are put aside and
+                                the next one is used.
+        :param stream_listing: If True, run_download starts downloading after the first listing page instead of
+                               waiting for the complete list. Only applies with the listing schedule and a single
+                               data frequency, as other orders need the complete list. The free disk space is then
+                               checked as files are listed rather than before the first download.
+                               Defaults to False, so that the disk space is checked before any download.
+        :param csv_header: Optional. Header policy of extracted csv files (add, drop). add writes a header row to
+                           every file, drop removes it. Defaults to keeping files as published.
+        :param timestamp_unit: Optional. Unit of the timestamp columns of extracted klines, trades and aggTrades
+                               files (ms, us). Binance spot files switched to microseconds in 2025.
+                               Defaults to keeping files as published. Requires numpy.
+        :param hive_dir: Optional. Directory of a hive-partitioned view of the downloaded files
+                         (asset=um/data_type=klines/interval=1m/symbol=BTCUSDT/date=2024-01-01/part.csv), filled with
+                         hard links as files complete. Its catalog (_catalog.csv) is rewritten at the end of the run.
+        :param post_download: Optional. Called with the DownloadResult of each downloaded file once it is complete on
+                              disk (e.g. bars.BarStage), in a worker thread. An exception marks the file as failed
+                              and removes it, so that the next run downloads it and calls post_download again.
+        :param max_in_flight_bytes: Optional. Budget of listed bytes downloading or extracting at the same time.
+                                    New downloads wait while it is used up, whatever the file count, so that large
+                                    archives do not pile up in memory and disk writes. A file larger than the budget
+                                    is downloaded alone.
         """
         self._destination_dir = destination_dir
         self._data_type = data_type
@@ -147,7 +534,64 @@ class BinanceBulkDownloader:
         self.marker = None
         self.is_truncated = True
         self.downloaded_list: list[str] = []
+        self.failed_list: list[tuple] = []
+        self._finished_count = 0
         self.console = Console()
+        self._extract_workers = extract_workers
+        self._extract_queue_size = extract_queue_size or 2 * (extract_workers or 1)
+        self._extract_executor: Optional[ProcessPoolExecutor] = None
+        self._extract_slots: Optional[threading.BoundedSemaphore] = None
+        self._local_files: Optional[set] = None
+        self._local_dirs: set = set()
+        self._use_manifest = use_manifest or refresh
+        self._refresh = refresh
+        # Republished files of the run and the mtime of their local file when listed (None if missing)
+        self._refresh_mtimes: dict = {}
+        self._listing_strategy = listing_strategy
+        self._last_listing_key_count = 0
+        self._schedule_order = schedule
+        self._max_workers = max_workers
+        self._keep_compressed = keep_compressed
+        self._shard_index = shard_index
+        self._shard_count = shard_count
+        self._shard_by = shard_by
+        self._start_date = start_date
+        self._end_date = end_date
+        self._max_bytes_per_second = max_bytes_per_second
+        self._stream_listing = stream_listing
+        self._csv_header = csv_header
+        self._timestamp_unit = timestamp_unit
+        self._normalizer: Optional[CsvNormalizer] = None
+        self._hive_dir = hive_dir
+        self._hive_linked_count = 0
+        self._post_download = post_download
+        self._post_download_executor: Optional[ThreadPoolExecutor] = None
+        self._post_download_lock = threading.Lock()
+        self._max_in_flight_bytes = max_in_flight_bytes
+        self._listing_sink = None
+        self._listing_stop: Optional[threading.Event] = None
+        self._listing_endpoints = listing_endpoints
+        self._download_endpoints = download_endpoints
+        self._probe_endpoints = probe_endpoints
+        self._listing_pool: Optional[EndpointPool] = None
+        self._download_pool: Optional[EndpointPool] = None
+        self._endpoint_lock = threading.Lock()
+        self._bandwidth: Optional[BandwidthLimiter] = (
+            BandwidthLimiter(max_bytes_per_second) if max_bytes_per_second else None
+        )
+        self._manifest: Optional[DownloadManifest] = None
+        # HTTP client and listing display, replaced by BatchDownloader to share a session between jobs
+        self._http = requests
+        self._show_listing = True
+
+    def _get_data_frequencies(self) -> List[str]:
+        """
+        Get data frequencies as a list
+        :return: list of data frequencies
+        """
+        if isinstance(self._data_frequency, (list, tuple)):
+            return list(self._data_frequency)
+        return [self._data_frequency]
 
     def _check_params(self) -> None:
         """
@@ -167,7 +611,11 @@ class BinanceBulkDownloader:
             )
 
         # Check data frequency
-        if self._data_frequency not in self._DATA_FREQUENCY:
+        data_frequencies = self._get_data_frequencies()
+        if not data_frequencies or any(
+            data_frequency not in self._DATA_FREQUENCY
+            for data_frequency in data_frequencies
+        ):
             raise BinanceBulkDownloaderParamsError(
                 f"data_frequency must be {self._DATA_FREQUENCY}."
             )
@@ -192,63 +640,169 @@ class BinanceBulkDownloader:
                 f"data_type must be one of {valid_data_types}."
             )
 
+        # Check listing strategy
+        if self._listing_strategy not in self._LISTING_STRATEGY:
+            raise BinanceBulkDownloaderParamsError(
+                f"listing_strategy must be one of {self._LISTING_STRATEGY}."
+            )
+
+        # Check schedule
+        if self._schedule_order not in self._SCHEDULE:
+            raise BinanceBulkDownloaderParamsError(
+                f"schedule must be one of {self._SCHEDULE}."
+            )
+
+        # Check workers
+        if self._max_workers is not None and self._max_workers < 1:
+            raise BinanceBulkDownloaderParamsError(
+                "max_workers must be a positive integer."
+            )
+
+        # Check extract workers
+        if self._extract_workers is not None and self._extract_workers < 1:
+            raise BinanceBulkDownloaderParamsError(
+                "extract_workers must be a positive integer."
+            )
+
+        # Check compression at rest
+        if self._keep_compressed not in LOCAL_FILE_SUFFIXES:
+            raise BinanceBulkDownloaderParamsError(
+                f"keep_compressed must be one of {list(LOCAL_FILE_SUFFIXES)}."
+            )
+        if self._keep_compressed == "zstd" and import_zstandard() is None:
+            raise BinanceBulkDownloaderParamsError(
+                "keep_compressed zstd requires the zstandard package."
+            )
+
+        # Check normalization of extracted files
+        self._normalizer = None
+        if self._csv_header is not None or self._timestamp_unit is not None:
+            if self._keep_compressed == "zip":
+                raise BinanceBulkDownloaderParamsError(
+                    "csv_header and timestamp_unit cannot be used with keep_compressed zip."
+                )
+            try:
+                self._normalizer = CsvNormalizer(
+                    self._data_type, self._csv_header, self._timestamp_unit
+                )
+                if self._timestamp_unit is not None:
+                    import_numpy()
+            except (ValueError, ImportError) as e:
+                raise BinanceBulkDownloaderParamsError(str(e))
+
+        # Check sharding
+        if (self._shard_index is None) != (self._shard_count is None):
+            raise BinanceBulkDownloaderParamsError(
+                "shard_index and shard_count must be given together."
+            )
+        if self._shard_count is not None and not (
+            self._shard_count >= 1 and 0 <= self._shard_index < self._shard_count
+        ):
+            raise BinanceBulkDownloaderParamsError(
+                "shard_count must be positive and shard_index between 0 and shard_count - 1."
+            )
+        if self._shard_by not in self._SHARD_BY:
+            raise BinanceBulkDownloaderParamsError(
+                f"shard_by must be one of {self._SHARD_BY}."
+            )
+
+        # Check date range
+        for name, value in (
+            ("start_date", self._start_date),
+            ("end_date", self._end_date),
+        ):
+            if value is None:
+                continue
+            # Newer Pythons also accept e.g. 20240101, which the filter compares as a string
+            try:
+                valid = date.fromisoformat(value).isoformat() == value
+            except (TypeError, ValueError):
+                valid = False
+            if not valid:
+                raise BinanceBulkDownloaderParamsError(f"{name} must be YYYY-MM-DD.")
+        if (
+            self._start_date is not None
+            and self._end_date is not None
+            and self._start_date > self._end_date
+        ):
+            raise BinanceBulkDownloaderParamsError(
+                "start_date must not be after end_date."
+            )
+
+        # Check in-flight budget
+        if self._max_in_flight_bytes is not None and self._max_in_flight_bytes <= 0:
+            raise BinanceBulkDownloaderParamsError(
+                "max_in_flight_bytes must be positive."
+            )
+
+        # Check bandwidth cap
+        if self._max_bytes_per_second is not None and self._max_bytes_per_second <= 0:
+            raise BinanceBulkDownloaderParamsError(
+                "max_bytes_per_second must be positive."
+            )
+
         # Check 1s frequency restriction
-        if self._data_frequency == "1s":
+        if "1s" in data_frequencies:
             if self._asset != "spot":
                 raise BinanceBulkDownloaderParamsError(
                     f"data_frequency 1s is not supported for {self._asset}."
                 )
 
-    def _get_file_list_from_s3_bucket(self, prefix):
+    def _get_file_list_from_s3_bucket(self, prefix) -> List[FileKey]:
         """
         Get file list from s3 bucket
         :param prefix: s3 bucket prefix
         :return: list of files
         """
         files = []
+        listed_key_count = 0
         marker = None
         is_truncated = True
         MAX_DISPLAY_FILES = 5
+        namespace = "{http://s3.amazonaws.com/doc/2006-03-01/}"
 
-        with Live(refresh_per_second=4) as live:
+        # Keys are filtered by exact symbol, so that BTCUSDT does not match BTCUSDT_240628
+        symbols = [self._symbols] if isinstance(self._symbols, str) else self._symbols
+        symbol_set = {symbol.upper() for symbol in symbols} if symbols else None
+
+        with self._listing_live() as live:
             status_text = Text(f"Getting file list: {prefix}")
             live.update(Panel(status_text, style="blue"))
 
-            while is_truncated:
-                params = {"prefix": prefix, "max-keys": 1000}
+            while is_truncated and not (
+                self._listing_stop is not None and self._listing_stop.is_set()
+            ):
+                params = {"prefix": prefix, "max-keys": self._LISTING_PAGE_SIZE}
                 if marker:
                     params["marker"] = marker
 
-                response = requests.get(self._BINANCE_DATA_S3_BUCKET_URL, params=params)
+                response = self._request_listing(params)
                 tree = ElementTree.fromstring(response.content)
 
-                for content in tree.findall(
-                    "{http://s3.amazonaws.com/doc/2006-03-01/}Contents"
-                ):
-                    key = content.find(
-                        "{http://s3.amazonaws.com/doc/2006-03-01/}Key"
-                    ).text
+                page_files = []
+                for content in tree.findall(f"{namespace}Contents"):
+                    key = content.find(f"{namespace}Key").text
+                    marker = key
+                    listed_key_count += 1
                     if key.endswith(".zip"):
-                        # Filter by symbols if multiple symbols are specified
-                        if isinstance(self._symbols, list) and len(self._symbols) > 1:
-                            if any(symbol.upper() in key for symbol in self._symbols):
-                                files.append(key)
-                                marker = key
-                        else:
-                            files.append(key)
-                            marker = key
-
-                        # Update display (latest files and total count)
-                        status_text.plain = f"Getting file list: {prefix}\nTotal files found: {len(files)}"
-                        if files:
-                            status_text.append("\n\nLatest files:")
-                            for recent_file in files[-MAX_DISPLAY_FILES:]:
-                                status_text.append(f"\n{recent_file}")
-                        live.update(Panel(status_text, style="blue"))
-
-                is_truncated_element = tree.find(
-                    "{http://s3.amazonaws.com/doc/2006-03-01/}IsTruncated"
+                        file_key = FileKey.parse(key, *self._parse_object_info(content))
+                        if symbol_set is None or file_key.symbol in symbol_set:
+                            page_files.append(file_key)
+                files.extend(page_files)
+                if self._listing_sink is not None:
+                    self._listing_sink(page_files)
+
+                # Update display (latest files and total count)
+                status_text.plain = (
+                    f"Getting file list: {prefix}\nTotal files found: {len(files)}"
                 )
+                if files:
+                    status_text.append("\n\nLatest files:")
+                    for recent_file in files[-MAX_DISPLAY_FILES:]:
+                        status_text.append(f"\n{recent_file.key}")
+                live.update(Panel(status_text, style="blue"))
+
+                is_truncated_element = tree.find(f"{namespace}IsTruncated")
                 is_truncated = (
                     is_truncated_element is not None
                     and is_truncated_element.text.lower() == "true"
@@ -260,10 +814,281 @@ class BinanceBulkDownloader:
             if files:
                 status_text.append("\n\nLatest files:")
                 for recent_file in files[-MAX_DISPLAY_FILES:]:
-                    status_text.append(f"\n{recent_file}")
+                    status_text.append(f"\n{recent_file.key}")
             live.update(Panel(status_text, style="green"))
+            self._last_listing_key_count = listed_key_count
             return files
 
+    def _get_listing_pool(self) -> EndpointPool:
+        """
+        Get the listing endpoints, probing them on first use
+        :return: EndpointPool
+        """
+        with self._endpoint_lock:
+            if self._listing_pool is None:
+                self._listing_pool = EndpointPool(
+                    self._listing_endpoints or [self._BINANCE_DATA_S3_BUCKET_URL]
+                )
+                if self._probe_endpoints:
+                    self._report_probe(
+                        "listing",
+                        self._listing_pool.probe(
+                            self._http,
+                            params={
+                                "prefix": f"{self._build_data_type_prefix()}/",
+                                "max-keys": 1,
+                            },
+                        ),
+                    )
+            return self._listing_pool
+
+    def _get_download_pool(self) -> EndpointPool:
+        """
+        Get the download endpoints
+        :return: EndpointPool
+        """
+        with self._endpoint_lock:
+            if self._download_pool is None:
+                self._download_pool = EndpointPool(
+                    self._download_endpoints or [self._BINANCE_DATA_DOWNLOAD_BASE_URL]
+                )
+            return self._download_pool
+
+    def _probe_download_endpoints(self, file_list) -> None:
+        """
+        Order download endpoints by the time taken to fetch the start of the first file to download
+        :param file_list: list of files to download
+        :return: None
+        """
+        if self._probe_endpoints and file_list:
+            self._report_probe(
+                "download",
+                self._get_download_pool().probe(self._http, f"/{file_list[0].key}"),
+            )
+
+    def _report_probe(self, kind, probe_seconds) -> None:
+        """
+        Print probe results
+        :param kind: listing or download
+        :param probe_seconds: dict of base URL to seconds (None if unreachable)
+        :return: None
+        """
+        if probe_seconds:
+            self.console.print(
+                f"Probed {kind} endpoints: "
+                + ", ".join(
+                    f"{url} {'unreachable' if seconds is None else f'{seconds * 1000:.0f} ms'}"
+                    for url, seconds in probe_seconds.items()
+                )
+            )
+
+    def _request(self, endpoints: EndpointPool, path="", **kwargs):
+        """
+        GET path from the first healthy endpoint, failing over to the next ones
+        Client errors other than 429 (e.g. 404) are raised at once: other endpoints serve the same content.
+        :param endpoints: EndpointPool
+        :param path: path appended to the base URL (e.g. /data/.../file.zip)
+        :param kwargs: arguments of requests.get
+        :return: response
+        """
+        last_error = None
+        for url in endpoints.candidates():
+            try:
+                response = self._http.get(
+                    f"{url}{path}", timeout=self._REQUEST_TIMEOUT, **kwargs
+                )
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                status_code = getattr(e.response, "status_code", None)
+                if status_code is not None and status_code < 500 and status_code != 429:
+                    raise
+                endpoints.record_failure(url)
+                last_error = e
+                continue
+            endpoints.record_success(url)
+            return response
+        raise last_error
+
+    def _request_listing(self, params):
+        """
+        Send a listing request to the listing endpoints
+        :param params: query parameters of ListObjects
+        :return: response
+        """
+        try:
+            return self._request(self._get_listing_pool(), params=params)
+        except requests.exceptions.RequestException as e:
+            raise BinanceBulkDownloaderDownloadError(f"Listing error: {str(e)}")
+
+    def _listing_live(self):
+        """
+        Live display of the file listing, hidden when disabled
+        :return: Live or _HiddenLive
+        """
+        if self._show_listing:
+            return Live(refresh_per_second=4)
+        return _HiddenLive()
+
+    def _get_symbol_universe(self, cached=True) -> List[str]:
+        """
+        Get symbol directories of the data type, cached per process
+        Listed with a delimiter, so a single request usually covers every symbol.
+        :param cached: if False, list the symbols again, e.g. to choose which symbols to download.
+                       The cache is only good enough for cost estimates, as new symbols keep being listed.
+        :return: sorted list of symbols
+        """
+        prefix = f"{self._build_data_type_prefix()}/"
+        if cached and prefix in self._SYMBOL_UNIVERSE_CACHE:
+            return self._SYMBOL_UNIVERSE_CACHE[prefix]
+
+        namespace = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+        symbols = []
+        marker = None
+        is_truncated = True
+        while is_truncated:
+            params = {
+                "prefix": prefix,
+                "delimiter": "/",
+                "max-keys": self._LISTING_PAGE_SIZE,
+            }
+            if marker:
+                params["marker"] = marker
+            response = self._request_listing(params)
+            tree = ElementTree.fromstring(response.content)
+            common_prefixes = tree.findall(f"{namespace}CommonPrefixes")
+            symbols.extend(
+                common_prefix.findtext(f"{namespace}Prefix")[len(prefix) :].rstrip("/")
+                for common_prefix in common_prefixes
+            )
+            is_truncated = (
+                tree.findtext(f"{namespace}IsTruncated") or ""
+            ).lower() == "true"
+            marker = tree.findtext(f"{namespace}NextMarker") or (
+                common_prefixes[-1].findtext(f"{namespace}Prefix")
+                if common_prefixes
+                else None
+            )
+            if marker is None:
+                break
+
+        self._SYMBOL_UNIVERSE_CACHE[prefix] = symbols
+        return symbols
+
+    def _get_symbol_universe_size(self) -> int:
+        """
+        Get the number of symbol directories of the data type
+        :return: number of symbols
+        """
+        return len(self._get_symbol_universe())
+
+    def _estimate_listing_requests(self, symbol_count, keys_per_symbol) -> tuple:
+        """
+        Estimate listing requests of the per-symbol and parent-prefix strategies
+        Each symbol is assumed to hold as many keys as the sampled one.
+        :param symbol_count: number of symbols still to list
+        :param keys_per_symbol: number of keys listed under the sampled symbol prefix
+        :return: tuple of (per-symbol requests, parent-prefix requests)
+        """
+
+        def pages(key_count):
+            return max(1, math.ceil(key_count / self._LISTING_PAGE_SIZE))
+
+        # A symbol prefix holds a single interval directory when one frequency is requested,
+        # whereas the parent prefix holds every interval of every symbol.
+        interval_factor = 1
+        if (
+            self._data_type in self._DATA_FREQUENCY_REQUIRED_BY_DATA_TYPE
+            and len(self._get_data_frequencies()) == 1
+        ):
+            interval_factor = len(self._DATA_FREQUENCY)
+        parent_key_count = (
+            self._get_symbol_universe_size() * keys_per_symbol * interval_factor
+        )
+        return symbol_count * pages(keys_per_symbol), pages(parent_key_count)
+
+    def _list_files(self) -> List[FileKey]:
+        """
+        List files of every requested symbol, or only the symbols of this shard when sharding by symbol
+        :return: list of files
+        """
+        if self._shard_count is None or self._shard_by != "symbol":
+            return self._list_symbol_files()
+
+        symbols = self._symbols or self._get_symbol_universe(cached=False)
+        shard_symbols = [
+            symbol
+            for symbol in symbols
+            if self._shard_of(symbol.upper()) == self._shard_index
+        ]
+        self.console.print(
+            f"Shard {self._shard_index + 1}/{self._shard_count}: "
+            f"{len(shard_symbols)} of {len(symbols)} symbols"
+        )
+        if not shard_symbols:
+            return []
+        original_symbols = self._symbols
+        try:
+            self._symbols = shard_symbols
+            return self._list_symbol_files()
+        finally:
+            self._symbols = original_symbols
+
+    def _list_symbol_files(self) -> List[FileKey]:
+        """
+        List files of every requested symbol
+        For multiple symbols, the first symbol prefix is listed as a sample to choose between
+        listing the other symbols one by one and listing the parent prefix once.
+        :return: list of files
+        """
+        if not (isinstance(self._symbols, list) and len(self._symbols) > 1):
+            return self._get_file_list_from_s3_bucket(self._build_prefix())
+
+        original_symbols = self._symbols
+        file_list = []
+        list_parent = self._listing_strategy == "parent"
+        try:
+            for index, symbol in enumerate(original_symbols):
+                if list_parent:
+                    break
+                self._symbols = symbol  # Temporarily set to single symbol
+                file_list.extend(
+                    self._get_file_list_from_s3_bucket(self._build_prefix())
+                )
+                if index == 0 and self._listing_strategy == "auto":
+                    per_symbol, parent = self._estimate_listing_requests(
+                        len(original_symbols) - 1, self._last_listing_key_count
+                    )
+                    list_parent = parent < per_symbol
+                    if list_parent:
+                        self.console.print(
+                            f"Listing parent prefix (~{parent} requests) instead of "
+                            f"each symbol (~{per_symbol} requests)"
+                        )
+        finally:
+            self._symbols = original_symbols  # Restore original symbols
+
+        if list_parent:
+            return self._get_file_list_from_s3_bucket(
+                f"{self._build_data_type_prefix()}/"
+            )
+        return file_list
+
+    @staticmethod
+    def _parse_object_info(content) -> tuple:
+        """
+        Parse Size, ETag and LastModified of a listed object
+        :param content: Contents element of the listing
+        :return: tuple of (size, etag, last_modified)
+        """
+        namespace = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+        size = content.findtext(f"{namespace}Size")
+        etag = content.findtext(f"{namespace}ETag")
+        return (
+            int(size) if size is not None else None,
+            etag.strip('"') if etag is not None else None,
+            content.findtext(f"{namespace}LastModified"),
+        )
+
     def _make_asset_type(self) -> str:
         """
         Convert asset to asset type
@@ -291,17 +1116,26 @@ class BinanceBulkDownloader:
         """
         self._timeperiod_per_file = timeperiod_per_file
 
+    def _build_data_type_prefix(self) -> str:
+        """
+        Build prefix of the data type directory, shared by all symbols
+        :return: s3 bucket prefix (e.g. data/futures/um/daily/klines)
+        """
+        return "/".join(
+            [
+                "data",
+                self._make_asset_type(),
+                self._timeperiod_per_file,
+                self._data_type,
+            ]
+        )
+
     def _build_prefix(self) -> str:
         """
         Build prefix to download
         :return: s3 bucket prefix
         """
-        url_parts = [
-            "data",
-            self._make_asset_type(),
-            self._timeperiod_per_file,
-            self._data_type,
-        ]
+        url_parts = [self._build_data_type_prefix()]
 
         # If single symbol is specified, add it to the prefix
         if isinstance(self._symbols, list) and len(self._symbols) == 1:
@@ -317,94 +1151,594 @@ class BinanceBulkDownloader:
             if self._data_type in ["trades", "aggTrades"]:
                 url_parts.append(symbol)
 
-        # If data frequency is required and specified, add it to the prefix
+        # If data frequency is required and specified, add it to the prefix.
+        # With several frequencies, the symbol directory is listed once for all of them.
         if (
             self._data_type in self._DATA_FREQUENCY_REQUIRED_BY_DATA_TYPE
             and self._data_frequency
+            and len(url_parts) > 1
         ):
-            if isinstance(self._symbols, (str, list)):
-                url_parts.append(f"{self._data_frequency}/")
+            data_frequencies = self._get_data_frequencies()
+            if len(data_frequencies) == 1:
+                url_parts.append(f"{data_frequencies[0]}/")
+            else:
+                url_parts.append("")
 
         return "/".join(url_parts)
 
-    def _download(self, prefix) -> None:
+    def _scan_local_files(self, root_prefix) -> set:
         """
-        Execute download
-        :param prefix: s3 bucket prefix
-        :return: None
+        Index files already on disk with a single recursive scandir walk
+        Directories found on the way are remembered so that _download does not stat them again.
+        :param root_prefix: prefix of the directory to walk (e.g. data/futures/um/daily/klines)
+        :return: set of file paths relative to destination_dir, separated by "/"
         """
-        try:
-            self._check_params()
-            zip_destination_path = os.path.join(self._destination_dir, prefix)
-            csv_destination_path = os.path.join(
-                self._destination_dir, prefix.replace(".zip", ".csv")
-            )
-
-            # Make directory if not exists
-            if not os.path.exists(os.path.dirname(zip_destination_path)):
-                try:
-                    os.makedirs(os.path.dirname(zip_destination_path))
-                except (PermissionError, OSError) as e:
-                    raise BinanceBulkDownloaderDownloadError(
-                        f"Directory creation error: {str(e)}"
-                    )
-
-            # Don't download if already exists
-            if os.path.exists(csv_destination_path):
-                return
+        local_files = set()
+        stack = [root_prefix]
+        while stack:
+            relative_dir = stack.pop()
+            try:
+                with os.scandir(
+                    os.path.join(self._destination_dir, relative_dir)
+                ) as entries:
+                    for entry in entries:
+                        relative_path = f"{relative_dir}/{entry.name}"
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(relative_path)
+                        else:
+                            local_files.add(relative_path)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            self._local_dirs.add(relative_dir)
+        return local_files
 
-            url = f"{self._BINANCE_DATA_DOWNLOAD_BASE_URL}/{prefix}"
+    def _local_path(self, prefix) -> str:
+        """
+        Get the local file an archive is stored as with the keep_compressed mode of this downloader
+        :param prefix: s3 bucket prefix
+        :return: path relative to destination_dir
+        """
+        return prefix[: -len(".zip")] + LOCAL_FILE_SUFFIXES[self._keep_compressed]
 
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
-            except (
-                requests.exceptions.RequestException,
-                requests.exceptions.HTTPError,
-                requests.exceptions.ConnectionError,
-                requests.exceptions.Timeout,
-            ) as e:
-                raise BinanceBulkDownloaderDownloadError(f"Download error: {str(e)}")
+    def _local_candidates(self, prefix) -> list:
+        """
+        Get local files that count as a download of an archive, whatever mode stored them
+        A zip only counts when archives are kept as zip, otherwise it is a download in progress.
+        :param prefix: s3 bucket prefix
+        :return: list of paths relative to destination_dir
+        """
+        return [
+            candidate
+            for candidate in local_file_candidates(prefix)
+            if candidate != prefix or self._keep_compressed == "zip"
+        ]
 
-            try:
-                with open(zip_destination_path, "wb") as file:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        file.write(chunk)
-            except OSError as e:
-                raise BinanceBulkDownloaderDownloadError(f"File write error: {str(e)}")
+    def _is_downloaded(self, prefix) -> bool:
+        """
+        Check if the local file of a prefix already exists, using the local file index when it is built
+        :param prefix: s3 bucket prefix
+        :return: True if already downloaded
+        """
+        if self._local_files is not None:
+            return any(
+                candidate in self._local_files
+                for candidate in self._local_candidates(prefix)
+            )
+        return self._exists_on_disk(prefix)
 
-            try:
-                unzipped_path = "/".join(zip_destination_path.split("/")[:-1])
-                with zipfile.ZipFile(zip_destination_path) as existing_zip:
-                    existing_zip.extractall(
-                        csv_destination_path.replace(
-                            csv_destination_path, unzipped_path
-                        )
-                    )
-            except BadZipfile as e:
-                if os.path.exists(zip_destination_path):
-                    os.remove(zip_destination_path)
-                raise BinanceBulkDownloaderDownloadError(
-                    f"Bad Zip File: {zip_destination_path}"
-                )
-            except OSError as e:
-                if os.path.exists(zip_destination_path):
-                    os.remove(zip_destination_path)
-                raise BinanceBulkDownloaderDownloadError(f"Unzip error: {str(e)}")
+    def _exists_on_disk(self, prefix) -> bool:
+        """
+        Check on disk if the local file of a prefix exists, e.g. written by another process
+        A republished file only counts once it is written again after it was listed.
+        :param prefix: s3 bucket prefix
+        :return: True if already downloaded
+        """
+        if prefix in self._refresh_mtimes:
+            listed_mtime = self._refresh_mtimes[prefix]
+            local_mtime = self._get_local_mtime(prefix)
+            return local_mtime is not None and (
+                listed_mtime is None or local_mtime > listed_mtime
+            )
+        return any(
+            os.path.exists(os.path.join(self._destination_dir, candidate))
+            for candidate in self._local_candidates(prefix)
+        )
 
-            # Delete zip file
+    def _get_local_mtime(self, prefix) -> Optional[float]:
+        """
+        Get the latest modification time of the local files of a prefix
+        :param prefix: s3 bucket prefix
+        :return: mtime, or None if the file is not on disk
+        """
+        mtimes = []
+        for candidate in self._local_candidates(prefix):
             try:
-                os.remove(zip_destination_path)
-            except OSError as e:
-                raise BinanceBulkDownloaderDownloadError(
-                    f"File removal error: {str(e)}"
+                mtimes.append(
+                    os.stat(os.path.join(self._destination_dir, candidate)).st_mtime
                 )
+            except OSError:
+                continue
+        return max(mtimes, default=None)
 
-        except Exception as e:
-            if not isinstance(e, BinanceBulkDownloaderDownloadError):
-                raise BinanceBulkDownloaderDownloadError(f"Unexpected error: {str(e)}")
+    def _record_result(self, file_key: FileKey, status, checksum=None) -> None:
+        """
+        Record the result of a file in the manifest, if enabled
+        :param file_key: file to record
+        :param status: downloaded or failed
+        :param checksum: sha256 of the downloaded archive
+        :return: None
+        """
+        if self._manifest is None:
+            return
+        prefix = file_key.key
+        size, etag, last_modified = file_key.listed_info
+        self._manifest.record(
+            prefix,
+            status,
+            size=size,
+            etag=etag,
+            last_modified=last_modified,
+            local_path=(
+                self._local_path(prefix)
+                if status == DownloadManifest.STATUS_DOWNLOADED
+                else None
+            ),
+            checksum=checksum,
+        )
+
+    def _on_extract_done(
+        self, future, file_key: FileKey, checksum, key_lock: KeyLock
+    ) -> None:
+        """
+        Release the extract queue slot and the key lock, and record the result of an extraction
+        :param future: future of the extraction
+        :param file_key: extracted file
+        :param checksum: sha256 of the downloaded archive
+        :param key_lock: lock held on the file since its download
+        :return: None
+        """
+        self._extract_slots.release()
+        completed = not future.cancelled() and future.exception() is None
+        key_lock.release()
+        if completed:
+            self._record_result(file_key, DownloadManifest.STATUS_DOWNLOADED, checksum)
+        else:
+            self._record_result(file_key, DownloadManifest.STATUS_FAILED)
+
+    def _get_recorded_info(self) -> dict:
+        """
+        Get listed Size, ETag and LastModified of files recorded in the manifest
+        A failed refetch keeps the info of the last download, so the file is compared against it again.
+        :return: dict of s3 bucket prefix to (size, etag, last_modified)
+        """
+        return {
+            row["key"]: (row["size"], row["etag"], row["last_modified"])
+            for row in self._manifest.rows(prefix=self._build_data_type_prefix())
+        }
+
+    def _find_republished(self, file_list, recorded_info) -> set:
+        """
+        Find listed files whose Size, ETag or LastModified differ from those recorded in the manifest
+        Files without a manifest row (e.g. found on disk only) cannot be compared and are never returned.
+        :param file_list: list of listed files
+        :param recorded_info: result of _get_recorded_info
+        :return: set of s3 bucket prefixes to download again
+        """
+        republished = set()
+        for file_key in file_list:
+            prefix = file_key.key
+            if (
+                prefix in recorded_info
+                and file_key.listed_info != (None, None, None)
+                and recorded_info[prefix] != file_key.listed_info
+            ):
+                republished.add(prefix)
+        return republished
+
+    def _submit_extract(
+        self,
+        zip_destination_path,
+        file_key: FileKey,
+        checksum,
+        key_lock: KeyLock,
+        result: Optional[DownloadResult] = None,
+    ) -> Future:
+        """
+        Hand a downloaded zip over to the extract worker processes
+        Blocks while extract_queue_size archives are already waiting.
+        :param zip_destination_path: path to the downloaded zip file
+        :param file_key: downloaded file
+        :param checksum: sha256 of the downloaded archive
+        :param key_lock: lock held on the file, released once it is extracted
+        :param result: Optional. DownloadResult of the file, passed to post_download
+        :return: future of the extraction, and of post_download if any
+        """
+        self._extract_slots.acquire()
+        try:
+            future = self._extract_executor.submit(
+                _extract_archive,
+                zip_destination_path,
+                self._keep_compressed,
+                self._normalizer,
+            )
+        except Exception:
+            self._extract_slots.release()
+            raise
+        future.add_done_callback(
+            lambda done: self._on_extract_done(done, file_key, checksum, key_lock)
+        )
+        if self._post_download is None or result is None:
+            return future
+        return self._chain_post_download(future, file_key, result)
+
+    def _get_post_download_executor(self) -> ThreadPoolExecutor:
+        """
+        Get the threads running post_download after extract worker processes, started on first use
+        :return: ThreadPoolExecutor
+        """
+        with self._post_download_lock:
+            if self._post_download_executor is None:
+                self._post_download_executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers
+                )
+            return self._post_download_executor
+
+    def _chain_post_download(
+        self, extract_future: Future, file_key: FileKey, result: DownloadResult
+    ) -> Future:
+        """
+        Run post_download in a thread once an extraction is done, the callbacks of the extraction staying short
+        :param extract_future: future of the extraction
+        :param file_key: extracted file
+        :param result: DownloadResult of the file
+        :return: future done once both are, failing if either failed. Cancelling it cancels the extraction.
+        """
+        future = Future()
+        future.add_done_callback(
+            lambda done: extract_future.cancel() if done.cancelled() else None
+        )
+
+        def on_post_download_done(done):
+            error = done.exception()
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+        def on_extract_done(done):
+            # Runs after _on_extract_done, which recorded the extraction in the manifest
+            if not future.set_running_or_notify_cancel():
+                return
+            if done.cancelled():
+                future.set_exception(CancelledError())
+                return
+            if done.exception() is not None:
+                future.set_exception(done.exception())
+                return
+            try:
+                self._get_post_download_executor().submit(
+                    self._run_post_download, file_key, result
+                ).add_done_callback(on_post_download_done)
+            except Exception as e:
+                future.set_exception(e)
+
+        extract_future.add_done_callback(on_extract_done)
+        return future
+
+    def _run_post_download(self, file_key: FileKey, result: DownloadResult) -> None:
+        """
+        Run post_download on a file complete on disk
+        A file whose post_download fails is removed and recorded as failed, so that the next run downloads it again.
+        :param file_key: downloaded file
+        :param result: DownloadResult of the file
+        :return: None
+        :raise BinanceBulkDownloaderDownloadError: if post_download raised
+        """
+        try:
+            self._post_download(result)
+        except Exception as e:
+            try:
+                os.remove(result.local_path)
+            except OSError:
+                pass
+            self._record_result(file_key, DownloadManifest.STATUS_FAILED)
+            raise BinanceBulkDownloaderDownloadError(f"Post-download error: {str(e)}")
+
+    def _download(
+        self, prefix: Union[str, FileKey], result: Optional[DownloadResult] = None
+    ) -> Optional[Future]:
+        """
+        Execute download
+        :param prefix: s3 bucket prefix, or a FileKey from the listing
+        :param result: Optional. DownloadResult receiving the size of the file, or the skipped status
+        :return: future of the extraction if extract workers are running, otherwise None
+        """
+        file_key = prefix if isinstance(prefix, FileKey) else FileKey.parse(prefix)
+        prefix = file_key.key
+        try:
+            zip_destination_path = os.path.join(self._destination_dir, prefix)
+            prefix_dir = os.path.dirname(prefix)
+
+            # Make directory if not exists
+            if prefix_dir not in self._local_dirs:
+                if not os.path.exists(os.path.dirname(zip_destination_path)):
+                    try:
+                        os.makedirs(
+                            os.path.dirname(zip_destination_path), exist_ok=True
+                        )
+                    except (PermissionError, OSError) as e:
+                        raise BinanceBulkDownloaderDownloadError(
+                            f"Directory creation error: {str(e)}"
+                        )
+                self._local_dirs.add(prefix_dir)
+
+            # Don't download if already exists
+            if self._is_downloaded(prefix):
+                if result is not None:
+                    result.status = DownloadResult.STATUS_SKIPPED
+                return None
+
+            # Another process may be downloading the same file into destination_dir
+            key_lock = KeyLock(f"{zip_destination_path}.lock")
+            try:
+                key_lock.acquire()
+            except OSError as e:
+                raise BinanceBulkDownloaderDownloadError(f"Lock error: {str(e)}")
+            try:
+                if self._exists_on_disk(prefix):
+                    if result is not None:
+                        result.status = DownloadResult.STATUS_SKIPPED
+                    return None
+
+                try:
+                    response = self._request(
+                        self._get_download_pool(), f"/{prefix}", stream=True
+                    )
+                except (
+                    requests.exceptions.RequestException,
+                    requests.exceptions.HTTPError,
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                ) as e:
+                    raise BinanceBulkDownloaderDownloadError(
+                        f"Download error: {str(e)}"
+                    )
+
+                # Written under a temporary name, so that a crash never leaves a truncated zip
+                part_path = zip_destination_path + _PART_SUFFIX
+                sha256 = hashlib.sha256() if self._manifest is not None else None
+                try:
+                    with open(part_path, "wb") as file:
+                        for chunk in response.iter_content(chunk_size=8192):
+                            if self._bandwidth is not None:
+                                self._bandwidth.consume(len(chunk))
+                            file.write(chunk)
+                            if sha256 is not None:
+                                sha256.update(chunk)
+                            if result is not None:
+                                result.size += len(chunk)
+                # RequestException subclasses OSError: a stream failing partway is not a write error
+                except requests.exceptions.RequestException as e:
+                    _remove_part_file(part_path)
+                    raise BinanceBulkDownloaderDownloadError(
+                        f"Download error: {str(e)}"
+                    )
+                except OSError as e:
+                    _remove_part_file(part_path)
+                    raise BinanceBulkDownloaderDownloadError(
+                        f"File write error: {str(e)}"
+                    )
+                except BaseException:
+                    _remove_part_file(part_path)
+                    raise
+                finally:
+                    response.close()
+                checksum = sha256.hexdigest() if sha256 is not None else None
+
+                if self._extract_executor is not None:
+                    future = self._submit_extract(
+                        part_path, file_key, checksum, key_lock, result
+                    )
+                    key_lock = None  # Released by _on_extract_done
+                    return future
+                _extract_archive(part_path, self._keep_compressed, self._normalizer)
+                self._record_result(
+                    file_key, DownloadManifest.STATUS_DOWNLOADED, checksum
+                )
+                if self._post_download is not None and result is not None:
+                    self._run_post_download(file_key, result)
+                return None
+            finally:
+                if key_lock is not None:
+                    key_lock.release()
+
+        except Exception as e:
+            self._record_result(file_key, DownloadManifest.STATUS_FAILED)
+            if not isinstance(e, BinanceBulkDownloaderDownloadError):
+                raise BinanceBulkDownloaderDownloadError(f"Unexpected error: {str(e)}")
             raise
 
+    def _filter_by_data_frequency(self, file_list) -> List[FileKey]:
+        """
+        Keep files of the requested data frequencies, partitioning them by interval in one pass
+        :param file_list: list of listed files
+        :return: list of files, grouped by data frequency in the requested order
+        """
+        partitions = {
+            data_frequency: [] for data_frequency in self._get_data_frequencies()
+        }
+        for file_key in file_list:
+            partition = partitions.get(file_key.interval)
+            if partition is not None:
+                partition.append(file_key)
+        if len(partitions) > 1:
+            self.console.print(
+                " | ".join(
+                    f"{data_frequency}: {len(partition)} files"
+                    for data_frequency, partition in partitions.items()
+                )
+            )
+        return [file_key for partition in partitions.values() for file_key in partition]
+
+    def _filter_by_date(self, file_list) -> List[FileKey]:
+        """
+        Keep files within start_date and end_date
+        A monthly file is kept if its month overlaps the range. Files without a parsed date are kept.
+        :param file_list: list of listed files
+        :return: list of files
+        """
+        if self._start_date is None and self._end_date is None:
+            return file_list
+        return [
+            file_key
+            for file_key in file_list
+            if file_key.date is None
+            or (
+                (
+                    self._start_date is None
+                    or file_key.date >= self._start_date[: len(file_key.date)]
+                )
+                and (
+                    self._end_date is None
+                    or file_key.date <= self._end_date[: len(file_key.date)]
+                )
+            )
+        ]
+
+    def _shard_of(self, value) -> int:
+        """
+        Get the shard a key or symbol belongs to, stable across processes and machines
+        :param value: s3 bucket prefix or symbol
+        :return: shard index
+        """
+        return zlib.crc32(value.encode()) % self._shard_count
+
+    def _filter_by_shard(self, file_list) -> List[FileKey]:
+        """
+        Keep files assigned to this shard
+        :param file_list: list of listed files
+        :return: list of files
+        """
+        if self._shard_count is None:
+            return file_list
+        return [
+            file_key
+            for file_key in file_list
+            if self._shard_of(
+                file_key.symbol
+                if self._shard_by == "symbol" and file_key.symbol
+                else file_key.key
+            )
+            == self._shard_index
+        ]
+
+    def _schedule(self, file_list) -> List[FileKey]:
+        """
+        Order files for download using their listed sizes
+        :param file_list: list of files
+        :return: list of files in download order
+        """
+        if self._schedule_order == "listing":
+            return file_list
+        by_size = sorted(
+            file_list, key=lambda file_key: file_key.size or 0, reverse=True
+        )
+        if self._schedule_order == "largest_first":
+            return by_size
+
+        # Interleave: biggest, smallest, second biggest, second smallest, ...
+        scheduled = []
+        left, right = 0, len(by_size) - 1
+        while left <= right:
+            scheduled.append(by_size[left])
+            left += 1
+            if left <= right:
+                scheduled.append(by_size[right])
+                right -= 1
+        return scheduled
+
+    def _download_file(
+        self, file_key: FileKey
+    ) -> Tuple[DownloadResult, Optional[Future]]:
+        """
+        Download a file, turning errors into a failed result
+        :param file_key: file to download
+        :return: tuple of (result, future of the extraction if extract workers are running)
+        """
+        result = DownloadResult(
+            key=file_key.key,
+            local_path=os.path.join(
+                self._destination_dir, self._local_path(file_key.key)
+            ),
+            size=0,
+            duration=0.0,
+            status=DownloadResult.STATUS_DOWNLOADED,
+        )
+        start = time.monotonic()
+        extract_future = None
+        try:
+            extract_future = self._download(file_key, result=result)
+        except Exception as e:
+            result.status = DownloadResult.STATUS_FAILED
+            result.error = str(e)
+        if result.status == DownloadResult.STATUS_SKIPPED:
+            result.local_path = find_local_file(self._destination_dir, file_key.key)
+        elif result.status == DownloadResult.STATUS_FAILED:
+            result.local_path = None
+        result.duration = time.monotonic() - start
+        return result, extract_future
+
+    @staticmethod
+    def _finish_extract(result: DownloadResult, extract_future, start) -> None:
+        """
+        Complete the result of a file once its extraction is done
+        :param result: result of the download
+        :param extract_future: done future of the extraction
+        :param start: time.monotonic() value when the extraction was known to be pending
+        :return: None
+        """
+        result.duration += time.monotonic() - start
+        try:
+            extract_future.result()
+        except Exception as e:
+            result.status = DownloadResult.STATUS_FAILED
+            result.error = str(e)
+            result.local_path = None
+
+    def _report_result(self, result: DownloadResult, total, live, status) -> None:
+        """
+        Record the result of a file and update the progress display
+        :param result: result of the file
+        :param total: number of files to download in this run, None while the listing is in progress
+        :param live: Optional. Live display
+        :param status: Optional. status Text of the display
+        :return: None
+        """
+        if self._hive_dir is not None and result.local_path is not None:
+            try:
+                if link_file(
+                    self._hive_dir, FileKey.parse(result.key), result.local_path
+                ):
+                    self._hive_linked_count += 1
+            except OSError as e:
+                result.status = DownloadResult.STATUS_FAILED
+                result.error = f"Hive layout error: {str(e)}"
+        self._finished_count += 1
+        if result.status == DownloadResult.STATUS_DOWNLOADED:
+            self.downloaded_list.append(result.key)
+        elif result.status == DownloadResult.STATUS_FAILED:
+            self.failed_list.append((result.key, result.error))
+        if live is None:
+            return
+        if result.status == DownloadResult.STATUS_FAILED:
+            status.plain = f"Error: {result.error}"
+        elif total is None:
+            status.plain = f"[{self._finished_count}/?] Listing in progress | Latest: {os.path.basename(result.key)}"
+        else:
+            progress = self._finished_count / total * 100
+            status.plain = f"[{self._finished_count}/{total}] Progress: {progress:.1f}% | Latest: {os.path.basename(result.key)}"
+        live.update(status)
+
     @staticmethod
     def make_chunks(lst, n) -> list:
         """
@@ -415,63 +1749,1022 @@ class BinanceBulkDownloader:
         """
         return [lst[i : i + n] for i in range(0, len(lst), n)]
 
+    def _open_skip_index(self) -> None:
+        """
+        Build the index of files already downloaded, opening the manifest if enabled
+        The manifest is trusted once it has rows for the data type, otherwise the disk is walked.
+        :return: None
+        """
+        self._local_dirs = set()
+        self._local_files = None
+        if self._use_manifest:
+            self._manifest = DownloadManifest(self._destination_dir)
+            self._local_files = self._manifest.local_paths(
+                self._build_data_type_prefix()
+            )
+        if not self._local_files:
+            self._local_files = self._scan_local_files(self._build_data_type_prefix())
+
+    def _iter_listed_pages(self) -> Iterator[List[FileKey]]:
+        """
+        List files in a background thread, yielding each listing page as soon as it is received
+        Files returned by _list_files but not seen page by page are yielded at the end.
+        :return: iterator of lists of files
+        """
+        pages = queue.Queue()
+        # Scoped to this listing, so that stopping it never affects later listings of the instance
+        stop = threading.Event()
+
+        def list_in_background():
+            self._listing_sink = lambda page: pages.put((False, page))
+            self._listing_stop = stop
+            try:
+                pages.put((True, self._list_files()))
+            except BaseException as e:
+                pages.put((True, e))
+            finally:
+                self._listing_sink = None
+                self._listing_stop = None
+
+        thread = threading.Thread(target=list_in_background, daemon=True)
+        thread.start()
+        seen = set()
+        try:
+            while True:
+                done, page = pages.get()
+                if isinstance(page, BaseException):
+                    raise page
+                new_files = [file_key for file_key in page if file_key.key not in seen]
+                seen.update(file_key.key for file_key in new_files)
+                yield new_files
+                if done:
+                    return
+        finally:
+            stop.set()
+
+    def _iter_prepared_pages(self, counts, stream=False) -> Iterator[List[FileKey]]:
+        """
+        List files and drop those filtered out or already downloaded, page by page when streaming
+        Call _open_skip_index first.
+        :param counts: dict updated with the number of listed, refreshed and skipped files
+        :param stream: if True, yield each listing page as it arrives, otherwise yield the complete list once
+        :return: iterator of lists of files to download
+        """
+        data_frequencies = (
+            set(self._get_data_frequencies())
+            if self._data_type in self._DATA_FREQUENCY_REQUIRED_BY_DATA_TYPE
+            else None
+        )
+        recorded_info = self._get_recorded_info() if self._refresh else None
+        pages = self._iter_listed_pages() if stream else iter([self._list_files()])
+        for file_list in pages:
+            # Filter by data frequency (also drops 1mo when 1m is requested)
+            if data_frequencies is not None:
+                if stream:
+                    file_list = [
+                        file_key
+                        for file_key in file_list
+                        if file_key.interval in data_frequencies
+                    ]
+                else:
+                    file_list = self._filter_by_data_frequency(file_list)
+            file_list = self._filter_by_date(file_list)
+            file_list = self._filter_by_shard(file_list)
+            counts["listed"] += len(file_list)
+
+            if recorded_info is not None:
+                republished = self._find_republished(file_list, recorded_info)
+                for prefix in republished:
+                    self._local_files.difference_update(local_file_candidates(prefix))
+                    self._refresh_mtimes[prefix] = self._get_local_mtime(prefix)
+                counts["refreshed"] += len(republished)
+            listed_count = len(file_list)
+            file_list = [
+                file_key
+                for file_key in file_list
+                if not self._is_downloaded(file_key.key)
+            ]
+            counts["skipped"] += listed_count - len(file_list)
+            yield file_list
+
+    def _iter_streamed_files(self, counts) -> Iterator[FileKey]:
+        """
+        Yield files to download as listing pages arrive
+        Free disk space is checked against the files listed so far, and download endpoints are probed
+        with the first file.
+        :param counts: dict updated with the number of listed, refreshed and skipped files
+        :return: iterator of files to download
+        """
+        free_bytes = self._get_free_bytes(self._destination_dir)
+        ratio = self._get_extracted_size_ratio()
+        in_flight = self._get_download_workers()
+        extracted_bytes = 0
+        largest = (
+            []
+        )  # Heap of the largest archives, which may be on disk at the same time
+        largest_bytes = 0
+        probed = False
+        for page in self._iter_prepared_pages(counts, stream=True):
+            for file_key in page:
+                size = file_key.size or 0
+                extracted_bytes += size * ratio
+                heapq.heappush(largest, size)
+                largest_bytes += size
+                if len(largest) > in_flight:
+                    largest_bytes -= heapq.heappop(largest)
+                if extracted_bytes + largest_bytes > free_bytes:
+                    raise BinanceBulkDownloaderDiskSpaceError(
+                        f"Not enough disk space in {self._destination_dir}: "
+                        f"{_format_bytes(extracted_bytes + largest_bytes)} required for the files "
+                        f"listed so far (free: {_format_bytes(free_bytes)})"
+                    )
+                if not probed:
+                    self._probe_download_endpoints([file_key])
+                    probed = True
+                yield file_key
+
+    def _report_counts(self, counts) -> None:
+        """
+        Print the number of refreshed and skipped files
+        :param counts: counts filled by _iter_prepared_pages
+        :return: None
+        """
+        if counts["refreshed"]:
+            self.console.print(f"Refreshing {counts['refreshed']} republished files")
+        if counts["skipped"]:
+            self.console.print(f"Skipping {counts['skipped']} files already downloaded")
+
+    def _prepare_file_list(self) -> tuple:
+        """
+        List files and drop those already downloaded, as run_download does before scheduling
+        Opens the manifest if enabled; the caller must call _close_run.
+        :return: tuple of (list of files to download, number of skipped files)
+        """
+        self._open_skip_index()
+        counts = {"listed": 0, "refreshed": 0, "skipped": 0}
+        file_list = [
+            file_key for page in self._iter_prepared_pages(counts) for file_key in page
+        ]
+        self._report_counts(counts)
+        return file_list, counts["skipped"]
+
+    def _close_run(self) -> None:
+        """
+        Release what a run opened: local file index, extract workers and manifest,
+        and rewrite the catalog of the hive layout if files were added to it
+        :return: None
+        """
+        if self._hive_linked_count:
+            self._hive_linked_count = 0
+            write_catalog(self._hive_dir)
+        self._local_files = None
+        self._refresh_mtimes = {}
+        self._listing_pool = None
+        self._download_pool = None
+        if self._extract_executor is not None:
+            self._extract_executor.shutdown()
+            self._extract_executor = None
+            self._extract_slots = None
+        if self._post_download_executor is not None:
+            self._post_download_executor.shutdown()
+            self._post_download_executor = None
+        if self._manifest is not None:
+            self._manifest.close()
+            self._manifest = None
+
+    @staticmethod
+    def _get_free_bytes(path) -> int:
+        """
+        Get free disk space of the file system holding path, which may not exist yet
+        :param path: destination directory
+        :return: free bytes
+        """
+        path = os.path.abspath(path)
+        while True:
+            try:
+                return shutil.disk_usage(path).free
+            except FileNotFoundError:
+                parent = os.path.dirname(path)
+                if parent == path:
+                    raise
+                path = parent
+
+    def _get_extracted_size_ratio(self) -> float:
+        """
+        Get the estimated ratio of the size on disk of a file to the size of its archive
+        :return: ratio
+        """
+        if self._keep_compressed is not None:
+            # Recompressed csv files are about the size of the archive
+            return 1.0
+        return self._EXTRACTED_SIZE_RATIO_BY_DATA_TYPE.get(
+            self._data_type, self._DEFAULT_EXTRACTED_SIZE_RATIO
+        )
+
+    def _get_download_workers(self) -> int:
+        """
+        Get the number of download threads
+        :return: max_workers, or the ThreadPoolExecutor default
+        """
+        return self._max_workers or min(32, (os.cpu_count() or 1) + 4)
+
+    def _make_plan(self, file_list, skipped_count, bytes_per_second=None):
+        """
+        Estimate bytes, disk space and duration of downloading files
+        :param file_list: list of files to download
+        :param skipped_count: number of listed files already downloaded
+        :param bytes_per_second: Optional. Expected download throughput
+        :return: DownloadPlan
+        """
+        download_bytes = sum(file_key.size or 0 for file_key in file_list)
+        extracted_bytes = int(download_bytes * self._get_extracted_size_ratio())
+
+        # Archives in flight are on disk next to their extracted csv until they are deleted
+        in_flight = self._get_download_workers()
+        largest = sorted((file_key.size or 0 for file_key in file_list), reverse=True)
+        required_bytes = extracted_bytes + sum(largest[:in_flight])
+
+        bytes_per_second = bytes_per_second or self._ESTIMATED_BYTES_PER_SECOND
+        return DownloadPlan(
+            file_count=len(file_list),
+            skipped_count=skipped_count,
+            download_bytes=download_bytes,
+            extracted_bytes=extracted_bytes,
+            required_bytes=required_bytes,
+            free_bytes=self._get_free_bytes(self._destination_dir),
+            estimated_seconds=download_bytes / bytes_per_second,
+            file_list=file_list,
+        )
+
+    def plan(self, bytes_per_second: Optional[float] = None) -> "DownloadPlan":
+        """
+        Dry run: list files and skip those already downloaded like run_download, without downloading
+        :param bytes_per_second: Optional. Expected download throughput used for the ETA
+        :return: DownloadPlan
+        """
+        self._check_params()
+        try:
+            file_list, skipped_count = self._prepare_file_list()
+        finally:
+            self._close_run()
+        download_plan = self._make_plan(file_list, skipped_count, bytes_per_second)
+        self.console.print(
+            Panel(
+                download_plan.summary(),
+                style="green" if download_plan.fits_on_disk else "red",
+            )
+        )
+        return download_plan
+
+    def _start_run(self) -> tuple:
+        """
+        Prepare a run: list the files (or start streaming them), check disk space, probe endpoints and
+        start extract workers
+        :return: tuple of (iterator of files to download, progress dict with total and submitted counts)
+        """
+        self._finished_count = 0
+
+        # Files can be downloaded in listing order as they arrive, unless they are reordered
+        # by size (schedule) or grouped by data frequency
+        stream = (
+            self._stream_listing
+            and self._schedule_order == "listing"
+            and len(self._get_data_frequencies()) == 1
+        )
+        if stream:
+            # Downloads start after the first listing page, the total is known once listing ends
+            self._open_skip_index()
+            counts = {"listed": 0, "refreshed": 0, "skipped": 0}
+            file_keys = self._iter_streamed_files(counts)
+            progress = {"total": None, "submitted": 0, "counts": counts}
+            self._show_listing = False
+        else:
+            file_list, skipped_count = self._prepare_file_list()
+
+            # Refuse to start if the files would not fit on disk
+            download_plan = self._make_plan(file_list, skipped_count)
+            if not download_plan.fits_on_disk:
+                raise BinanceBulkDownloaderDiskSpaceError(
+                    f"Not enough disk space in {self._destination_dir}: "
+                    f"{download_plan.summary()}"
+                )
+
+            self._probe_download_endpoints(file_list)
+            file_keys = self._schedule(file_list)
+            progress = {"total": len(file_list), "submitted": 0, "counts": None}
+
+        self._start_extract_workers()
+        return file_keys, progress
+
+    def _start_extract_workers(self) -> None:
+        """
+        Start extract worker processes if requested
+        :return: None
+        """
+        if self._extract_workers:
+            self._extract_executor = ProcessPoolExecutor(
+                max_workers=self._extract_workers
+            )
+            self._extract_slots = threading.BoundedSemaphore(self._extract_queue_size)
+
+    def _download_with_progress(self, file_keys, progress) -> None:
+        """
+        Download files with the progress display
+        :param file_keys: iterator of files to download
+        :param progress: progress dict of _start_run
+        :return: None
+        """
+        with Live(refresh_per_second=4) as live:
+            status = Text()
+            for result in self._iter_results(file_keys, progress):
+                self._report_result(result, progress["total"], live, status)
+
+    def _iter_results(self, file_keys, progress) -> Iterator[DownloadResult]:
+        """
+        Download files concurrently, yielding each result as soon as the file is complete
+        Files are submitted in schedule order, keeping at most _CHUNK_SIZE downloads queued, and with
+        max_in_flight_bytes, at most that many listed bytes downloading or extracting.
+        A single pool avoids idle workers waiting for the slowest file of a chunk.
+        :param file_keys: iterator of files to download
+        :param progress: progress dict of _start_run, its total is set once every file is submitted
+        :return: iterator of DownloadResult
+        """
+        file_keys = iter(file_keys)
+        listing_done = False
+        next_key = None
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            # Listed sizes of the files downloading and extracting, by future
+            in_flight = {}
+            extracting = {}
+            in_flight_bytes = 0
+            try:
+                while True:
+                    while not listing_done and len(in_flight) < self._CHUNK_SIZE:
+                        if next_key is None:
+                            next_key = next(file_keys, None)
+                        if next_key is None:
+                            listing_done = True
+                            if progress["total"] is None:
+                                progress["total"] = progress["submitted"]
+                            if progress["counts"] is not None:
+                                self._report_counts(progress["counts"])
+                            break
+                        size = next_key.size or 0
+                        if not _fits_budget(
+                            self._max_in_flight_bytes,
+                            in_flight_bytes,
+                            size,
+                            bool(in_flight or extracting),
+                        ):
+                            break
+                        future = executor.submit(self._download_file, next_key)
+                        in_flight[future] = size
+                        in_flight_bytes += size
+                        next_key = None
+                        progress["submitted"] += 1
+                    if not in_flight and not extracting:
+                        return
+
+                    done, _ = wait(
+                        list(in_flight) + list(extracting), return_when=FIRST_COMPLETED
+                    )
+                    for future in done:
+                        if future in in_flight:
+                            size = in_flight.pop(future)
+                            result, extract_future = future.result()
+                            if extract_future is not None:
+                                # Yielded once the archive is extracted by a worker process
+                                extracting[extract_future] = (
+                                    result,
+                                    time.monotonic(),
+                                    size,
+                                )
+                                continue
+                        else:
+                            result, start, size = extracting.pop(future)
+                            self._finish_extract(result, future, start)
+                        in_flight_bytes -= size
+                        yield result
+            except GeneratorExit:
+                # The caller stopped iterating: drop queued downloads, only those running are awaited
+                for future in list(in_flight) + list(extracting):
+                    future.cancel()
+                if hasattr(file_keys, "close"):
+                    file_keys.close()
+                raise
+
+    def iter_download(self) -> Iterator[DownloadResult]:
+        """
+        Download concurrently, yielding the result of each file as soon as it is complete
+        Files already on disk before the run are not yielded. downloaded_list and failed_list are filled
+        as results are yielded. Stopping the iteration cancels queued downloads, waits for those already running,
+        then ends the run.
+        :return: iterator of DownloadResult
+        """
+        self._check_params()
+        results = None
+        try:
+            file_keys, progress = self._start_run()
+            results = self._iter_results(file_keys, progress)
+            for result in results:
+                self._report_result(result, progress["total"], None, None)
+                yield result
+        finally:
+            if results is not None:
+                results.close()
+            self._show_listing = True
+            self._close_run()
+
     def run_download(self):
         """
         Download concurrently
         :return: None
         """
+        self._check_params()
         self.console.print(
             Panel(f"Starting download for {self._data_type}", style="blue bold")
         )
+        try:
+            file_keys, progress = self._start_run()
+            self._download_with_progress(file_keys, progress)
+        finally:
+            self._show_listing = True
+            self._close_run()
 
-        file_list = []
-        # Handle multiple symbols by getting each symbol's files separately
-        if isinstance(self._symbols, list) and len(self._symbols) > 1:
-            original_symbols = self._symbols
-            for symbol in original_symbols:
-                self._symbols = symbol  # Temporarily set to single symbol
-                symbol_files = self._get_file_list_from_s3_bucket(self._build_prefix())
-                file_list.extend(symbol_files)
-            self._symbols = original_symbols  # Restore original symbols
-        else:
-            file_list = self._get_file_list_from_s3_bucket(self._build_prefix())
+    @staticmethod
+    def _get_available_memory() -> Optional[int]:
+        """
+        Get the memory available to new allocations
+        :return: available bytes, or None if unknown on this platform
+        """
+        try:
+            with open("/proc/meminfo") as meminfo:
+                for line in meminfo:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        try:
+            return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (AttributeError, ValueError, OSError):
+            return None
 
-        # Filter by data frequency only if not already filtered by prefix
-        if (
-            self._data_type in self._DATA_FREQUENCY_REQUIRED_BY_DATA_TYPE
-            and not isinstance(self._symbols, (str, list))
-        ):
-            file_list = [
-                prefix
-                for prefix in file_list
-                if prefix.count(self._data_frequency) == 2
+    def _load_file(self, file_key: FileKey) -> tuple:
+        """
+        Download an archive into memory and parse its csv, turning errors into a failed result
+        :param file_key: file to load
+        :return: tuple of (DownloadResult, structured array or None if it failed)
+        """
+        result = DownloadResult(
+            key=file_key.key,
+            local_path=None,
+            size=0,
+            duration=0.0,
+            status=DownloadResult.STATUS_DOWNLOADED,
+        )
+        start = time.monotonic()
+        array = None
+        try:
+            response = self._request(
+                self._get_download_pool(), f"/{file_key.key}", stream=True
+            )
+            buffer = io.BytesIO()
+            try:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if self._bandwidth is not None:
+                        self._bandwidth.consume(len(chunk))
+                    buffer.write(chunk)
+            finally:
+                response.close()
+            result.size = buffer.tell()
+            with zipfile.ZipFile(buffer) as archive:
+                names = archive.namelist()
+                members = [name for name in names if name.endswith(".csv")] or names
+                array = parse_csv(read_member(archive, members[0]), self._data_type)
+        except requests.exceptions.RequestException as e:
+            result.error = f"Download error: {str(e)}"
+        except BadZipfile as e:
+            result.error = f"Bad Zip File: {str(e)}"
+        except Exception as e:
+            result.error = f"Parse error: {str(e)}"
+        if result.error is not None:
+            result.status = DownloadResult.STATUS_FAILED
+        result.duration = time.monotonic() - start
+        return result, array
+
+    def _concatenate(self, parts):
+        """
+        Concatenate the arrays of a symbol in time order
+        :param parts: list of (key, structured array)
+        :return: structured array
+        """
+        numpy = import_numpy()
+        parts.sort(key=lambda part: part[0])
+        array = numpy.concatenate([part for _, part in parts])
+        times = array[TIME_COLUMNS[self._data_type]]
+        if len(times) > 1 and (numpy.diff(times) < 0).any():
+            array = array[numpy.argsort(times, kind="stable")]
+        return array
+
+    def download_to_memory(
+        self, memory_limit: Optional[int] = None, as_frame: bool = False
+    ) -> dict:
+        """
+        Download files into memory without writing anything to disk
+        Archives are inflated in memory and parsed into NumPy structured arrays, concatenated per symbol in
+        time order. Requires numpy, and pandas for as_frame. Supports klines, trades and aggTrades data types.
+        Failed files are recorded in failed_list, like run_download.
+        :param memory_limit: Optional. Maximum bytes held by parsed data and files being loaded.
+                             Defaults to the memory available when the run starts.
+        :param as_frame: If True, return pandas DataFrames instead of structured arrays
+        :return: dict of symbol to structured array (or DataFrame)
+        """
+        self._check_params()
+        try:
+            get_columns(self._data_type)
+        except ValueError as e:
+            raise BinanceBulkDownloaderParamsError(str(e))
+        if len(self._get_data_frequencies()) > 1:
+            raise BinanceBulkDownloaderParamsError(
+                "download_to_memory takes a single data frequency."
+            )
+        import_numpy()
+        if as_frame:
+            try:
+                import pandas
+            except ImportError:
+                raise ImportError("as_frame requires the pandas package.")
+        if memory_limit is None:
+            memory_limit = self._get_available_memory()
+
+        self.console.print(
+            Panel(f"Loading {self._data_type} into memory", style="blue bold")
+        )
+        self._finished_count = 0
+        try:
+            file_list = self._list_files()
+            if self._data_type in self._DATA_FREQUENCY_REQUIRED_BY_DATA_TYPE:
+                file_list = self._filter_by_data_frequency(file_list)
+            file_list = self._filter_by_shard(self._filter_by_date(file_list))
+
+            # Parsed arrays take about the size of the csv
+            ratio = self._EXTRACTED_SIZE_RATIO_BY_DATA_TYPE.get(
+                self._data_type, self._DEFAULT_EXTRACTED_SIZE_RATIO
+            )
+            estimated_bytes = (
+                sum((file_key.size or 0) for file_key in file_list) * ratio
+            )
+            if memory_limit is not None and estimated_bytes > memory_limit:
+                raise BinanceBulkDownloaderMemoryError(
+                    f"Not enough memory: {len(file_list)} files take about "
+                    f"{_format_bytes(estimated_bytes)} once parsed "
+                    f"(limit: {_format_bytes(memory_limit)})"
+                )
+
+            parts = {}
+            held_bytes = 0
+            workers = self._get_download_workers()
+            with Live(refresh_per_second=4) as live, ThreadPoolExecutor(
+                max_workers=workers
+            ) as executor:
+                status = Text()
+                queued = deque(file_list)
+                in_flight = {}
+                while queued or in_flight:
+                    # The archive, its csv and its array (smaller than the csv) are held at once while a file is parsed
+                    while queued and len(in_flight) < workers:
+                        reserved = (queued[0].size or 0) * (
+                            1 + 2 * ratio
+                        ) + self._LOAD_OVERHEAD_BYTES
+                        reserved_bytes = held_bytes + sum(in_flight.values())
+                        if (
+                            in_flight
+                            and memory_limit is not None
+                            and reserved_bytes + reserved > memory_limit
+                        ):
+                            break
+                        file_key = queued.popleft()
+                        in_flight[executor.submit(self._load_file, file_key)] = reserved
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del in_flight[future]
+                        result, array = future.result()
+                        if array is not None:
+                            held_bytes += array.nbytes
+                            parts.setdefault(
+                                FileKey.parse(result.key).symbol, []
+                            ).append((result.key, array))
+                        self._report_result(result, len(file_list), live, status)
+                    if memory_limit is not None and held_bytes > memory_limit:
+                        for future in in_flight:
+                            future.cancel()
+                        raise BinanceBulkDownloaderMemoryError(
+                            f"Not enough memory: parsed data reached "
+                            f"{_format_bytes(held_bytes)} "
+                            f"(limit: {_format_bytes(memory_limit)})"
+                        )
+        finally:
+            self._close_run()
+
+        arrays = {symbol: self._concatenate(parts[symbol]) for symbol in sorted(parts)}
+        if as_frame:
+            return {symbol: pandas.DataFrame(array) for symbol, array in arrays.items()}
+        return arrays
+
+    def _iter_local_file_keys(self) -> Iterator[tuple]:
+        """
+        Iterate over the local files of the index built by _open_skip_index
+        :return: iterator of (path relative to destination_dir, FileKey of its archive)
+        """
+        # A zip only counts when archives are kept as zip, like in _local_candidates
+        suffixes = [
+            suffix
+            for suffix in LOCAL_FILE_SUFFIXES.values()
+            if suffix != ".zip" or self._keep_compressed == "zip"
+        ]
+        for path in sorted(self._local_files):
+            for suffix in suffixes:
+                if path.endswith(suffix):
+                    file_key = FileKey.parse(path[: -len(suffix)] + ".zip")
+                    if file_key.date is not None:
+                        yield path, file_key
+                    break
+
+    def _select_local_files(
+        self, data_frequencies: Optional[List[str]] = None
+    ) -> List[tuple]:
+        """
+        Get the local files matching the symbols, data frequencies and date range of this downloader
+        :param data_frequencies: Optional. Data frequencies to select instead of those of this downloader
+        :return: list of (path relative to destination_dir, FileKey of its archive)
+        """
+        data_frequencies = set(data_frequencies or self._get_data_frequencies())
+        symbols = (
+            {symbol.upper() for symbol in self._symbols} if self._symbols else None
+        )
+        local_files = [
+            (path, file_key)
+            for path, file_key in self._iter_local_file_keys()
+            if (symbols is None or file_key.symbol in symbols)
+            and (
+                self._data_type not in self._DATA_FREQUENCY_REQUIRED_BY_DATA_TYPE
+                or file_key.interval in data_frequencies
+            )
+        ]
+        in_date_range = set(
+            self._filter_by_date([file_key for _, file_key in local_files])
+        )
+        return [
+            (path, file_key)
+            for path, file_key in local_files
+            if file_key in in_date_range
+        ]
+
+    def build_hive_layout(self) -> str:
+        """
+        Add the local files matching this downloader to the hive layout and rewrite its catalog
+        Files downloaded before hive_dir was set, or by another downloader, are added this way. No request is sent.
+        :return: path of the catalog
+        """
+        self._check_params()
+        if self._hive_dir is None:
+            raise BinanceBulkDownloaderParamsError("hive_dir is not set.")
+        try:
+            self._open_skip_index()
+            for path, file_key in self._select_local_files():
+                link_file(
+                    self._hive_dir,
+                    file_key,
+                    os.path.join(self._destination_dir, path),
+                )
+        except OSError as e:
+            raise BinanceBulkDownloaderDownloadError(f"Hive layout error: {str(e)}")
+        finally:
+            self._hive_linked_count = 0
+            self._close_run()
+        return write_catalog(self._hive_dir)
+
+    def _check_resample_params(self, source_interval) -> None:
+        """
+        Check that the data frequencies of this downloader can be built from source_interval klines
+        :param source_interval: data frequency of the local source klines
+        :return: None
+        """
+        self._check_params()
+        if self._data_type not in self._DATA_FREQUENCY_REQUIRED_BY_DATA_TYPE:
+            raise BinanceBulkDownloaderParamsError(
+                f"data_type must be one of {self._DATA_FREQUENCY_REQUIRED_BY_DATA_TYPE}."
+            )
+        if source_interval not in self._DATA_FREQUENCY:
+            raise BinanceBulkDownloaderParamsError(
+                f"source_interval must be {self._DATA_FREQUENCY}."
+            )
+        try:
+            import_numpy()
+            for interval in self._get_data_frequencies():
+                KlineResampler(interval, source_interval)
+        except (ValueError, ImportError) as e:
+            raise BinanceBulkDownloaderParamsError(str(e))
+
+    def _split_by_file(self, pending, interval, resampled) -> Iterator[tuple]:
+        """
+        Add resampled klines to the target file they belong to, yielding the files they complete
+        :param pending: dict of data frequency to (date, list of arrays) of the target file being filled
+        :param interval: data frequency of the klines
+        :param resampled: structured array of klines in time order
+        :return: iterator of (date, structured array) of completed target files
+        """
+        numpy = import_numpy()
+        unit = (
+            "datetime64[M]"
+            if self._timeperiod_per_file == "monthly"
+            else "datetime64[D]"
+        )
+        open_times, _ = KlineResampler._to_milliseconds(resampled["open_time"])
+        dates = open_times.astype("datetime64[ms]").astype(unit).astype(str)
+        bounds = numpy.flatnonzero(dates[1:] != dates[:-1]) + 1
+        for start, end in zip(numpy.r_[0, bounds], numpy.r_[bounds, len(resampled)]):
+            file_date, parts = pending.get(interval, (None, []))
+            if file_date is not None and file_date != dates[start]:
+                yield file_date, numpy.concatenate(parts)
+                parts = []
+            pending[interval] = (str(dates[start]), parts + [resampled[start:end]])
+
+    def _iter_resampled(self, source_interval) -> Iterator[tuple]:
+        """
+        Resample the local klines of source_interval into every data frequency of this downloader
+        Source files are read one at a time, in date order, and each is parsed once for all data frequencies.
+        :param source_interval: data frequency of the local source klines
+        :return: iterator of (FileKey of a target file, structured array of its klines)
+        """
+        numpy = import_numpy()
+        sources = {}
+        for path, file_key in self._select_local_files([source_interval]):
+            sources.setdefault(file_key.symbol, []).append((file_key.date, path))
+
+        for symbol in sorted(sources):
+            resamplers = [
+                KlineResampler(interval, source_interval)
+                for interval in self._get_data_frequencies()
             ]
+            pending = {}
+            paths = [path for _, path in sorted(sources[symbol])]
+            # None marks the end of the history, flushing the last klines
+            for path in paths + [None]:
+                if path is not None:
+                    array = read_array(
+                        os.path.join(self._destination_dir, path), self._data_type
+                    )
+                for resampler in resamplers:
+                    interval = resampler.interval
+                    resampled = (
+                        resampler.update(array)
+                        if path is not None
+                        else resampler.flush()
+                    )
+                    if resampled is not None and len(resampled):
+                        for file_date, klines in self._split_by_file(
+                            pending, interval, resampled
+                        ):
+                            yield self._make_file_key(
+                                symbol, interval, file_date
+                            ), klines
+                    if path is None and interval in pending:
+                        file_date, parts = pending.pop(interval)
+                        yield self._make_file_key(
+                            symbol, interval, file_date
+                        ), numpy.concatenate(parts)
 
-        # Create progress display
-        with Live(refresh_per_second=4) as live:
-            status = Text()
-            chunks = self.make_chunks(file_list, self._CHUNK_SIZE)
-            total_chunks = len(chunks)
-
-            # Download files in chunks
-            for chunk_index, prefix_chunk in enumerate(chunks, 1):
-                with ThreadPoolExecutor() as executor:
-                    futures = []
-                    for prefix in prefix_chunk:
-                        future = executor.submit(self._download, prefix)
-                        futures.append((future, prefix))
-
-                    # Update status as files complete
-                    for future, prefix in futures:
-                        try:
-                            future.result()
-                            progress = (
-                                (len(self.downloaded_list) + 1) / len(file_list) * 100
+    def _make_file_key(self, symbol, interval, file_date) -> FileKey:
+        """
+        Make the key of a file of this downloader's asset, period and data type
+        :param symbol: symbol
+        :param interval: data frequency
+        :param file_date: date of the file (YYYY-MM-DD for daily, YYYY-MM for monthly)
+        :return: FileKey
+        """
+        return FileKey(
+            self._make_asset_type(),
+            self._timeperiod_per_file,
+            self._data_type,
+            symbol,
+            interval,
+            file_date,
+        )
+
+    def resample(self, source_interval: str = "1m") -> List[str]:
+        """
+        Build the data frequencies of this downloader from local klines of a finer frequency instead of downloading
+        them. Files are written like downloaded ones (csv without header, keep_compressed mode, same paths), so later
+        runs skip them. Klines missing source rows are left out. Files already on disk are not overwritten.
+        Requires numpy.
+        :param source_interval: data frequency of the local source klines (e.g. 1m, or 1s for spot)
+        :return: list of s3 keys of the files written
+        """
+        self._check_resample_params(source_interval)
+        written = []
+        try:
+            self._open_skip_index()
+            for file_key, array in self._iter_resampled(source_interval):
+                prefix = file_key.key
+                if not len(array) or self._exists_on_disk(prefix):
+                    continue
+                write_klines(
+                    os.path.join(self._destination_dir, self._local_path(prefix)),
+                    array,
+                )
+                self._record_result(file_key, DownloadManifest.STATUS_DOWNLOADED)
+                written.append(prefix)
+        except OSError as e:
+            raise BinanceBulkDownloaderDownloadError(f"Resample error: {str(e)}")
+        finally:
+            self._close_run()
+        self.console.print(f"Resampled {len(written)} files from {source_interval}")
+        return written
+
+    def verify_resample(self, source_interval: str = "1m") -> dict:
+        """
+        Compare klines resampled from local klines of a finer frequency with the downloaded files of the data
+        frequencies of this downloader. Nothing is written. Requires numpy.
+        :param source_interval: data frequency of the local source klines
+        :return: dict of s3 key to list of differences, for downloaded files that differ
+        """
+        self._check_resample_params(source_interval)
+        differences = {}
+        compared_count = 0
+        try:
+            self._open_skip_index()
+            for file_key, array in self._iter_resampled(source_interval):
+                path = find_local_file(self._destination_dir, file_key.key)
+                if path is None:
+                    continue
+                compared_count += 1
+                problems = compare_klines(array, path)
+                if problems:
+                    differences[file_key.key] = problems
+        finally:
+            self._close_run()
+        self.console.print(
+            f"{len(differences)} of {compared_count} downloaded files differ"
+        )
+        return differences
+
+    def _get_local_dates(self) -> dict:
+        """
+        Get dates of the local files of the data type, from the manifest if enabled, otherwise from the disk
+        :return: dict of (symbol, interval) to list of dates
+        """
+        local_dates = {}
+        for _, file_key in self._iter_local_file_keys():
+            local_dates.setdefault((file_key.symbol, file_key.interval), []).append(
+                file_key.date
+            )
+        return local_dates
+
+    def find_gaps(self, download: bool = False) -> List[DateGaps]:
+        """
+        Find dates missing from the local files, per symbol
+        The expected calendar of a symbol runs from its first to its last listed date. Dates of the calendar that
+        are listed but not on disk are missing (e.g. a failed download), those that are not listed are unpublished.
+        Requires numpy.
+        :param download: If True, download the missing files
+        :return: list of DateGaps of the symbols with gaps
+        """
+        self._check_params()
+        numpy = import_numpy()
+        unit = (
+            "datetime64[M]"
+            if self._timeperiod_per_file == "monthly"
+            else "datetime64[D]"
+        )
+        try:
+            self._open_skip_index()
+            file_list = self._list_files()
+            if self._data_type in self._DATA_FREQUENCY_REQUIRED_BY_DATA_TYPE:
+                file_list = self._filter_by_data_frequency(file_list)
+            file_list = self._filter_by_shard(self._filter_by_date(file_list))
+            local_dates = self._get_local_dates()
+
+            listed = {}
+            for file_key in file_list:
+                if file_key.date is not None:
+                    listed.setdefault((file_key.symbol, file_key.interval), {})[
+                        file_key.date
+                    ] = file_key
+
+            gaps = []
+            for (symbol, interval), listed_files in sorted(
+                listed.items(), key=lambda item: (item[0][0], item[0][1] or "")
+            ):
+                listed_dates = numpy.array(sorted(listed_files), dtype=unit)
+                calendar = numpy.arange(
+                    listed_dates[0], listed_dates[-1] + 1, dtype=unit
+                )
+                local = numpy.unique(
+                    numpy.array(local_dates.get((symbol, interval), []), dtype=unit)
+                )
+                missing = numpy.setdiff1d(calendar, local, assume_unique=True)
+                if not len(missing):
+                    continue
+                missing_listed = numpy.intersect1d(
+                    missing, listed_dates, assume_unique=True
+                )
+                gaps.append(
+                    DateGaps(
+                        symbol=symbol,
+                        interval=interval,
+                        first_date=str(calendar[0]),
+                        last_date=str(calendar[-1]),
+                        local_count=int(numpy.isin(local, calendar).sum()),
+                        missing_keys=[
+                            listed_files[str(date)].key for date in missing_listed
+                        ],
+                        unpublished_dates=[
+                            str(date)
+                            for date in numpy.setdiff1d(
+                                missing, listed_dates, assume_unique=True
                             )
-                            status.plain = f"[{chunk_index}/{total_chunks}] Progress: {progress:.1f}% | Latest: {os.path.basename(prefix)}"
-                            live.update(status)
-                        except Exception as e:
-                            status.plain = f"Error: {str(e)}"
-                            live.update(status)
+                        ],
+                    )
+                )
+
+            missing_count = sum(len(gap.missing_keys) for gap in gaps)
+            unpublished_count = sum(len(gap.unpublished_dates) for gap in gaps)
+            self.console.print(
+                f"Gaps: {missing_count} missing files and {unpublished_count} unpublished dates "
+                f"in {len(gaps)} of {len(listed)} symbols"
+            )
+            if download and missing_count:
+                missing_files = [
+                    listed[(gap.symbol, gap.interval)][date]
+                    for gap in gaps
+                    for date in gap.missing_dates
+                ]
+                self._finished_count = 0
+                self._start_extract_workers()
+                self._download_with_progress(
+                    missing_files,
+                    {"total": missing_count, "submitted": 0, "counts": None},
+                )
+        finally:
+            self._close_run()
+        return gaps
 
-                self.downloaded_list.extend(prefix_chunk)
+    def validate(
+        self, redownload: bool = False, max_workers: Optional[int] = None
+    ) -> dict:
+        """
+        Check the content of the local files of the data type in worker processes
+        See validate.validate_file for the checks. Supports klines, trades and aggTrades data types.
+        Requires numpy.
+        :param redownload: If True, delete the invalid files and download them again
+        :param max_workers: Optional. Number of worker processes. Defaults to extract_workers, or the number of CPUs.
+        :return: dict of s3 key to list of problems, for invalid files only
+        """
+        self._check_params()
+        try:
+            get_columns(self._data_type)
+        except ValueError as e:
+            raise BinanceBulkDownloaderParamsError(str(e))
+        import_numpy()
+
+        try:
+            self._open_skip_index()
+            local_files = self._select_local_files()
+            self.console.print(f"Validating {len(local_files)} files")
+            invalid = validate_files(
+                [os.path.join(self._destination_dir, path) for path, _ in local_files],
+                self._data_type,
+                [file_key.interval for _, file_key in local_files],
+                max_workers=max_workers or self._extract_workers,
+            )
+            problems = {}
+            invalid_files = []
+            for path, file_key in local_files:
+                file_problems = invalid.get(os.path.join(self._destination_dir, path))
+                if file_problems:
+                    problems[file_key.key] = file_problems
+                    invalid_files.append((path, file_key))
+            self.console.print(
+                f"{len(invalid_files)} of {len(local_files)} files are invalid"
+            )
+
+            if redownload and invalid_files:
+                for path, file_key in invalid_files:
+                    try:
+                        os.remove(os.path.join(self._destination_dir, path))
+                    except OSError as e:
+                        raise BinanceBulkDownloaderDownloadError(
+                            f"File removal error: {str(e)}"
+                        )
+                    self._local_files.discard(path)
+                self._finished_count = 0
+                self._start_extract_workers()
+                self._download_with_progress(
+                    [file_key for _, file_key in invalid_files],
+                    {"total": len(invalid_files), "submitted": 0, "counts": None},
+                )
+        finally:
+            self._close_run()
+        return problems
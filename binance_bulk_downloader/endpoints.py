@@ -0,0 +1,113 @@
+"""
+Endpoint selection: latency probe, health tracking and failover between mirrors of Binance Vision
+"""
+
+# import standard libraries
+import threading
+import time
+from typing import Dict, List, Optional
+
+# import third-party libraries
+import requests
+
+
+class EndpointPool:
+    """
+    Ordered list of base URLs serving the same content
+    The order comes from a startup probe (fastest first). An endpoint failing max_failures requests in a row
+    is put aside for cooldown seconds and the next one is used; it is tried again once the cooldown has passed.
+    """
+
+    def __init__(self, urls: List[str], max_failures=3, cooldown=60.0) -> None:
+        """
+        :param urls: base URLs, in order of preference until probed. Duplicates are dropped.
+        :param max_failures: consecutive failures after which an endpoint is put aside
+        :param cooldown: seconds an endpoint stays aside
+        """
+        self.urls = list(dict.fromkeys(url.rstrip("/") for url in urls))
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.probe_seconds: Dict[str, Optional[float]] = {}
+        self._failures = {url: 0 for url in self.urls}
+        self._down_until = {url: 0.0 for url in self.urls}
+        self._lock = threading.Lock()
+
+    def candidates(self) -> List[str]:
+        """
+        Get endpoints to try for a request, healthy ones first
+        :return: list of base URLs
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = [url for url in self.urls if self._down_until[url] <= now]
+            resting = [url for url in self.urls if self._down_until[url] > now]
+        return healthy + sorted(resting, key=self._down_until.get)
+
+    def record_success(self, url) -> None:
+        """
+        Record a successful request
+        :param url: base URL
+        :return: None
+        """
+        with self._lock:
+            self._failures[url] = 0
+            self._down_until[url] = 0.0
+
+    def record_failure(self, url) -> None:
+        """
+        Record a failed request, putting the endpoint aside after max_failures in a row
+        :param url: base URL
+        :return: None
+        """
+        with self._lock:
+            self._failures[url] += 1
+            if self._failures[url] >= self.max_failures:
+                self._down_until[url] = time.monotonic() + self.cooldown
+                self._failures[url] = 0
+
+    def probe(self, http, path="", params=None, probe_bytes=256 * 1024, timeout=10.0):
+        """
+        Time a small request to every endpoint and order them fastest first
+        The first probe_bytes of the response are read, so that both round trip time and throughput count.
+        Unreachable endpoints go last and are put aside.
+        :param http: requests module or session
+        :param path: path requested on each endpoint (e.g. /data/.../file.zip)
+        :param params: Optional. query parameters
+        :param probe_bytes: number of bytes read from each response
+        :param timeout: request timeout in seconds
+        :return: dict of base URL to seconds (None if unreachable)
+        """
+        if len(self.urls) < 2:
+            return {}
+        headers = {"Range": f"bytes=0-{probe_bytes - 1}"} if path else None
+        for url in self.urls:
+            start = time.monotonic()
+            try:
+                response = http.get(
+                    f"{url}{path}",
+                    params=params,
+                    headers=headers,
+                    stream=True,
+                    timeout=timeout,
+                )
+                response.raise_for_status()
+                received = 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    received += len(chunk)
+                    if received >= probe_bytes:
+                        break
+                response.close()
+            except requests.exceptions.RequestException:
+                self.probe_seconds[url] = None
+                with self._lock:
+                    self._down_until[url] = time.monotonic() + self.cooldown
+                continue
+            self.probe_seconds[url] = time.monotonic() - start
+        with self._lock:
+            self.urls.sort(
+                key=lambda url: (
+                    self.probe_seconds.get(url) is None,
+                    self.probe_seconds.get(url) or 0.0,
+                )
+            )
+        return dict(self.probe_seconds)
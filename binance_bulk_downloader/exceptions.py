@@ -19,3 +19,21 @@ class BinanceBulkDownloaderDownloadError(Exception):
     """
 
     pass
+
+
+class BinanceBulkDownloaderDiskSpaceError(BinanceBulkDownloaderDownloadError):
+    """
+    BinanceBulkDownloader disk space error
+    This exception is raised when the files to download would not fit in the destination directory.
+    """
+
+    pass
+
+
+class BinanceBulkDownloaderMemoryError(BinanceBulkDownloaderDownloadError):
+    """
+    BinanceBulkDownloader memory error
+    This exception is raised when the files to load into memory would exceed the memory limit.
+    """
+
+    pass
@@ -0,0 +1,247 @@
+"""
+Structured representation of Binance Vision keys
+"""
+
+# import standard libraries
+import calendar
+import re
+import sys
+import time
+from typing import Optional, Union
+
+_KEY_PATTERN = re.compile(
+    r"^data/(?P<asset_type>futures/um|futures/cm|spot|option)"
+    r"/(?P<period>daily|monthly)"
+    r"/(?P<data_type>[^/]+)"
+    r"/(?P<symbol>[^/]+)"
+    r"/(?:(?P<interval>[^/]+)/)?"
+    r"(?P=symbol)-(?:(?P=interval)|(?P=data_type))"
+    r"-(?P<date>\d{4}-\d{2}(?:-\d{2})?)\.zip$"
+)
+_LOOSE_KEY_PATTERN = re.compile(
+    r"^data/(?P<asset_type>futures/um|futures/cm|spot|option)"
+    r"/(?P<period>daily|monthly)"
+    r"/(?P<data_type>[^/]+)"
+    r"/(?P<symbol>[^/]+)"
+    r"/(?:(?P<interval>[^/]+)/)?[^/]+$"
+)
+
+# Single-part ETags are the quoted md5 of the file, LastModified is an ISO 8601 UTC time with milliseconds
+_ETAG_PATTERN = re.compile(r'^"([0-9a-f]{32})"$')
+_LAST_MODIFIED_PATTERN = re.compile(
+    r"^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})\.(\d{3})Z$"
+)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """
+    Intern a string so that records of the same listing share it
+    :param value: string or None
+    :return: interned string or None
+    """
+    return sys.intern(value) if value is not None else None
+
+
+def _pack_etag(etag: Optional[str]) -> Union[int, str, None]:
+    """
+    Store an md5 ETag as a 128-bit int instead of a 34-character string
+    :param etag: ETag listed in the bucket, with its quotes
+    :return: int, or the ETag itself if it is not a single-part md5
+    """
+    match = _ETAG_PATTERN.match(etag) if etag is not None else None
+    return int(match.group(1), 16) if match else etag
+
+
+def _unpack_etag(value: Union[int, str, None]) -> Optional[str]:
+    """
+    Rebuild an ETag stored by _pack_etag
+    :param value: stored value
+    :return: ETag as listed in the bucket
+    """
+    return f'"{value:032x}"' if isinstance(value, int) else value
+
+
+def _pack_last_modified(last_modified: Optional[str]) -> Union[int, str, None]:
+    """
+    Store a LastModified time as int epoch milliseconds instead of a 24-character string
+    :param last_modified: LastModified listed in the bucket (e.g. 2024-01-02T08:00:00.000Z)
+    :return: int, or the value itself if it is not in the listing format
+    """
+    match = (
+        _LAST_MODIFIED_PATTERN.match(last_modified)
+        if last_modified is not None
+        else None
+    )
+    if not match:
+        return last_modified
+    fields = [int(field) for field in match.groups()]
+    return calendar.timegm(fields[:6]) * 1000 + fields[6]
+
+
+def _unpack_last_modified(value: Union[int, str, None]) -> Optional[str]:
+    """
+    Rebuild a LastModified time stored by _pack_last_modified
+    :param value: stored value
+    :return: LastModified as listed in the bucket
+    """
+    if not isinstance(value, int):
+        return value
+    seconds, milliseconds = divmod(value, 1000)
+    return (
+        time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+        + f".{milliseconds:03d}Z"
+    )
+
+
+class FileKey:
+    """
+    Parsed key of a file in the Binance Vision bucket.
+    Fields repeated across keys (asset type, period, data type, symbol, interval, date) are interned,
+    so a multi-million-key listing costs little more than one small object per key.
+    ETags and LastModified times are stored as ints when they have the usual listing format.
+    """
+
+    __slots__ = (
+        "asset_type",
+        "period",
+        "data_type",
+        "symbol",
+        "interval",
+        "date",
+        "size",
+        "_etag",
+        "_last_modified",
+        "_raw_key",
+    )
+
+    def __init__(
+        self,
+        asset_type: str,
+        period: str,
+        data_type: str,
+        symbol: str,
+        interval: Optional[str],
+        date: Optional[str],
+        size: Optional[int] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        raw_key: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize FileKey
+
+        :param asset_type: asset type in the key (futures/um, futures/cm, spot, option)
+        :param period: time period per file (daily, monthly)
+        :param data_type: data type (klines, trades, etc.)
+        :param symbol: symbol (e.g. BTCUSDT)
+        :param interval: data frequency for klines-like data types, otherwise None
+        :param date: date of the file (YYYY-MM-DD for daily, YYYY-MM for monthly)
+        :param size: Optional. Size listed in the bucket
+        :param etag: Optional. ETag listed in the bucket
+        :param last_modified: Optional. LastModified listed in the bucket
+        :param raw_key: Optional. Original key, kept only when it cannot be rebuilt from the fields
+        """
+        self.asset_type = _intern(asset_type)
+        self.period = _intern(period)
+        self.data_type = _intern(data_type)
+        self.symbol = _intern(symbol)
+        self.interval = _intern(interval)
+        self.date = _intern(date)
+        self.size = size
+        self._etag = _pack_etag(etag)
+        self._last_modified = _pack_last_modified(last_modified)
+        self._raw_key = raw_key
+
+    @classmethod
+    def parse(
+        cls,
+        key: str,
+        size: Optional[int] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> "FileKey":
+        """
+        Parse a key of the bucket
+        :param key: s3 key (e.g. data/spot/daily/klines/BTCUSDT/1m/BTCUSDT-1m-2024-01-01.zip)
+        :param size: Optional. Size listed in the bucket
+        :param etag: Optional. ETag listed in the bucket
+        :param last_modified: Optional. LastModified listed in the bucket
+        :return: FileKey
+        """
+        match = _KEY_PATTERN.match(key)
+        if match:
+            return cls(
+                size=size, etag=etag, last_modified=last_modified, **match.groupdict()
+            )
+        match = _LOOSE_KEY_PATTERN.match(key)
+        if match:
+            return cls(
+                date=None,
+                size=size,
+                etag=etag,
+                last_modified=last_modified,
+                raw_key=key,
+                **match.groupdict(),
+            )
+        return cls(
+            asset_type=None,
+            period=None,
+            data_type=None,
+            symbol=None,
+            interval=None,
+            date=None,
+            size=size,
+            etag=etag,
+            last_modified=last_modified,
+            raw_key=key,
+        )
+
+    @property
+    def key(self) -> str:
+        """
+        s3 key of the file
+        :return: s3 key
+        """
+        if self._raw_key is not None:
+            return self._raw_key
+        directory = (
+            f"data/{self.asset_type}/{self.period}/{self.data_type}/{self.symbol}"
+        )
+        if self.interval is not None:
+            return f"{directory}/{self.interval}/{self.symbol}-{self.interval}-{self.date}.zip"
+        return f"{directory}/{self.symbol}-{self.data_type}-{self.date}.zip"
+
+    @property
+    def etag(self) -> Optional[str]:
+        """
+        ETag listed in the bucket
+        :return: ETag, or None if it was not listed
+        """
+        return _unpack_etag(self._etag)
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        """
+        LastModified listed in the bucket
+        :return: LastModified, or None if it was not listed
+        """
+        return _unpack_last_modified(self._last_modified)
+
+    @property
+    def listed_info(self) -> tuple:
+        """
+        Metadata listed in the bucket
+        :return: tuple of (size, etag, last_modified)
+        """
+        return self.size, self.etag, self.last_modified
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FileKey):
+            return NotImplemented
+        return self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"FileKey({self.key!r}, size={self.size})"
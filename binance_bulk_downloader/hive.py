@@ -0,0 +1,100 @@
+"""
+Hive-partitioned view of downloaded files, for query engines that prune partitions
+"""
+
+# import standard libraries
+import csv
+import os
+import shutil
+from typing import Optional
+
+# import my libraries
+from binance_bulk_downloader.file_key import FileKey
+from binance_bulk_downloader.reader import LOCAL_FILE_SUFFIXES
+
+CATALOG_FILE_NAME = "_catalog.csv"
+CATALOG_COLUMNS = ("path", "asset", "data_type", "interval", "symbol", "date", "size")
+# Suffixes of local files, longest first so that .csv.gz is not taken for .csv
+_SUFFIXES = sorted(LOCAL_FILE_SUFFIXES.values(), key=len, reverse=True)
+
+
+def hive_path(file_key: FileKey, local_path) -> Optional[str]:
+    """
+    Get the path of a file in the hive layout
+    e.g. asset=um/data_type=klines/interval=1m/symbol=BTCUSDT/date=2024-01-01/part.csv
+    :param file_key: downloaded file
+    :param local_path: path of the local file, whose suffix is kept
+    :return: path relative to the hive directory, or None if the key has no date or symbol
+    """
+    if file_key.date is None or file_key.symbol is None:
+        return None
+    suffix = next(
+        (suffix for suffix in _SUFFIXES if local_path.endswith(suffix)),
+        os.path.splitext(local_path)[1],
+    )
+    partitions = [
+        f"asset={file_key.asset_type.split('/')[-1]}",
+        f"data_type={file_key.data_type}",
+    ]
+    if file_key.interval is not None:
+        partitions.append(f"interval={file_key.interval}")
+    partitions += [f"symbol={file_key.symbol}", f"date={file_key.date}"]
+    return os.path.join(*partitions, "part" + suffix)
+
+
+def link_file(hive_dir, file_key: FileKey, local_path) -> Optional[str]:
+    """
+    Add a local file to the hive layout as a hard link, or as a copy where links are not supported
+    A file already in the layout is replaced, so that refreshed files are picked up.
+    :param hive_dir: root directory of the hive layout
+    :param file_key: downloaded file
+    :param local_path: path of the local file
+    :return: path of the file in the hive layout, or None if the key cannot be partitioned
+    """
+    relative_path = hive_path(file_key, local_path)
+    if relative_path is None:
+        return None
+    path = os.path.join(hive_dir, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    part_path = path + ".part"
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    try:
+        os.link(local_path, part_path)
+    except OSError:
+        shutil.copyfile(local_path, part_path)
+    os.replace(part_path, path)
+    return path
+
+
+def write_catalog(hive_dir) -> str:
+    """
+    Write the catalog of the hive layout, listing every file with its partition values
+    The catalog is rebuilt from the files on disk, so it can be regenerated at any time.
+    :param hive_dir: root directory of the hive layout
+    :return: path of the catalog
+    """
+    rows = []
+    for root, dirs, files in os.walk(hive_dir):
+        dirs.sort()
+        relative_dir = os.path.relpath(root, hive_dir)
+        partitions = dict(
+            part.split("=", 1) for part in relative_dir.split(os.sep) if "=" in part
+        )
+        for name in sorted(files):
+            if not name.startswith("part.") or name.endswith(".part"):
+                continue
+            relative_path = os.path.join(relative_dir, name)
+            rows.append(
+                [relative_path.replace(os.sep, "/")]
+                + [partitions.get(column, "") for column in CATALOG_COLUMNS[1:-1]]
+                + [os.path.getsize(os.path.join(root, name))]
+            )
+    os.makedirs(hive_dir, exist_ok=True)
+    path = os.path.join(hive_dir, CATALOG_FILE_NAME)
+    with open(path + ".part", "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(CATALOG_COLUMNS)
+        writer.writerows(rows)
+    os.replace(path + ".part", path)
+    return path
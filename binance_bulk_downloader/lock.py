@@ -0,0 +1,78 @@
+"""
+Advisory file locks shared by every process downloading into a destination directory
+"""
+
+# import standard libraries
+import os
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: files are still written atomically, but not locked
+    fcntl = None
+
+
+class KeyLock:
+    """
+    Exclusive advisory lock (flock) on a lock file next to the file it protects
+    flock locks belong to the open file, so threads of the same process exclude each other too.
+    The lock file is removed on release, so that no lock file is left behind. A holder that was waiting on the
+    removed file notices it on acquire and locks the current lock file instead, then checks the protected file.
+    """
+
+    def __init__(self, path) -> None:
+        """
+        :param path: path of the lock file
+        """
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> None:
+        """
+        Block until the lock is held
+        :return: None
+        """
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is None:
+                self._fd = fd
+                return
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                # The previous holder may have removed the file while we were waiting on it
+                if os.fstat(fd).st_ino == os.stat(self.path).st_ino:
+                    self._fd = fd
+                    return
+            except FileNotFoundError:
+                pass
+            except OSError:
+                os.close(fd)
+                raise
+            os.close(fd)
+
+    def release(self, remove=True) -> None:
+        """
+        Release the lock
+        :param remove: if True, remove the lock file first
+        :return: None
+        """
+        if self._fd is None:
+            return
+        try:
+            if remove:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
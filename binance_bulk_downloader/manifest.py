@@ -0,0 +1,189 @@
+"""
+Download manifest
+"""
+
+# import standard libraries
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, List
+
+
+class DownloadManifest:
+    """
+    Persistent record of downloaded files, stored as a SQLite database under the destination directory.
+    Rows are buffered and written in batched transactions so that worker threads can record results cheaply.
+    A failed row of a recorded key only updates its status: the listed info of the last download is kept, so a
+    file republished since then is still seen as changed by later refresh runs.
+    """
+
+    FILE_NAME = "manifest.sqlite3"
+    STATUS_DOWNLOADED = "downloaded"
+    STATUS_FAILED = "failed"
+    _BATCH_SIZE = 500
+    _COLUMNS = (
+        "key",
+        "size",
+        "etag",
+        "last_modified",
+        "local_path",
+        "checksum",
+        "status",
+        "updated_at",
+    )
+
+    def __init__(self, destination_dir=".", batch_size: Optional[int] = None) -> None:
+        """
+        Open (and create if needed) the manifest of a destination directory
+
+        :param destination_dir: Destination directory for downloaded files
+        :param batch_size: Optional. Number of buffered rows that triggers a write transaction.
+        """
+        os.makedirs(destination_dir, exist_ok=True)
+        self.path = os.path.join(destination_dir, self.FILE_NAME)
+        self._batch_size = batch_size or self._BATCH_SIZE
+        self._pending: List[tuple] = []
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    key TEXT PRIMARY KEY,
+                    size INTEGER,
+                    etag TEXT,
+                    last_modified TEXT,
+                    local_path TEXT,
+                    checksum TEXT,
+                    status TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """)
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS files_status ON files (status, key)"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def record(
+        self,
+        key: str,
+        status: str,
+        size: Optional[int] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        local_path: Optional[str] = None,
+        checksum: Optional[str] = None,
+    ) -> None:
+        """
+        Buffer the result of a file, writing the buffer when it is full
+        :param key: s3 key of the file
+        :param status: downloaded or failed. A failed key already recorded keeps its other columns.
+        :param size: size listed in the bucket
+        :param etag: ETag listed in the bucket
+        :param last_modified: LastModified listed in the bucket
+        :param local_path: path of the local file, relative to destination_dir
+        :param checksum: sha256 of the downloaded archive
+        :return: None
+        """
+        row = (
+            key,
+            size,
+            etag,
+            last_modified,
+            local_path,
+            checksum,
+            status,
+            time.time(),
+        )
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self._batch_size:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """
+        Write buffered rows in a single transaction
+        :return: None
+        """
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        """
+        Write buffered rows; the caller must hold the lock
+        :return: None
+        """
+        if not self._pending:
+            return
+        insert = (
+            f"INTO files ({', '.join(self._COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(self._COLUMNS))})"
+        )
+        with self._connection:
+            for row in self._pending:
+                key, status, updated_at = row[0], row[-2], row[-1]
+                if status == self.STATUS_FAILED:
+                    self._connection.execute(
+                        "UPDATE files SET status = ?, updated_at = ? WHERE key = ?",
+                        (status, updated_at, key),
+                    )
+                    self._connection.execute(f"INSERT OR IGNORE {insert}", row)
+                else:
+                    self._connection.execute(f"INSERT OR REPLACE {insert}", row)
+        self._pending = []
+
+    def close(self) -> None:
+        """
+        Flush and close the database
+        :return: None
+        """
+        self.flush()
+        self._connection.close()
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Get the row of a key
+        :param key: s3 key of the file
+        :return: row as a dict, or None if the key is not recorded
+        """
+        self.flush()
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM files WHERE key = ?", (key,)
+            ).fetchone()
+        return dict(zip(self._COLUMNS, row)) if row else None
+
+    def rows(self, status: Optional[str] = None, prefix: str = "") -> List[dict]:
+        """
+        Get rows, optionally filtered by status and key prefix
+        :param status: Optional. downloaded or failed
+        :param prefix: Optional. s3 key prefix
+        :return: list of rows as dicts, ordered by key
+        """
+        query = (
+            f"SELECT {', '.join(self._COLUMNS)} FROM files WHERE key >= ? AND key < ?"
+        )
+        params = [prefix, prefix + "\uffff"]
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        self.flush()
+        with self._lock:
+            cursor = self._connection.execute(query + " ORDER BY key", params)
+            return [dict(zip(self._COLUMNS, row)) for row in cursor]
+
+    def local_paths(self, prefix: str = "") -> set:
+        """
+        Get local paths of files downloaded under a prefix
+        :param prefix: Optional. s3 key prefix
+        :return: set of paths relative to destination_dir
+        """
+        return {
+            row["local_path"]
+            for row in self.rows(status=self.STATUS_DOWNLOADED, prefix=prefix)
+        }
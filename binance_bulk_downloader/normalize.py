@@ -0,0 +1,184 @@
+"""
+Normalize the header row and timestamp unit of csv files while they are extracted
+"""
+
+# import standard libraries
+import shutil
+from typing import Optional
+
+# import my libraries
+from binance_bulk_downloader.reader import (
+    MICROSECONDS_THRESHOLD,
+    TIMESTAMP_COLUMNS,
+    get_columns,
+    has_header,
+    import_numpy,
+)
+
+HEADER_POLICIES = ("add", "drop")
+TIMESTAMP_UNITS = ("ms", "us")
+
+
+class CsvNormalizer:
+    """
+    Rewrite csv files with one header policy and one timestamp unit, so that they can be concatenated byte-wise.
+    Files already in the requested form are copied as they are. Timestamps are converted with NumPy over batches
+    of bytes. Picklable, so that it can be sent to extract worker processes.
+    """
+
+    _BATCH_BYTES = 1024 * 1024
+
+    def __init__(
+        self,
+        data_type,
+        header: Optional[str] = None,
+        timestamp_unit: Optional[str] = None,
+    ) -> None:
+        """
+        :param data_type: data type of the files
+        :param header: Optional. add writes a header row to every file, drop removes it. None keeps files as they are.
+        :param timestamp_unit: Optional. Unit of every timestamp column (ms, us). None keeps timestamps as they are.
+        """
+        if header is not None and header not in HEADER_POLICIES:
+            raise ValueError(f"header must be one of {HEADER_POLICIES}.")
+        if timestamp_unit is not None and timestamp_unit not in TIMESTAMP_UNITS:
+            raise ValueError(f"timestamp_unit must be one of {TIMESTAMP_UNITS}.")
+        if header == "add" or timestamp_unit is not None:
+            get_columns(data_type)
+        self.data_type = data_type
+        self.header = header
+        self.timestamp_unit = timestamp_unit
+
+    def _get_header(self, column_count, newline) -> bytes:
+        """
+        Get the header row of a file
+        :param column_count: number of columns of the file
+        :param newline: line ending of the file
+        :return: header row
+        """
+        names = [name for name, _ in get_columns(self.data_type, column_count)]
+        return ",".join(names).encode() + newline
+
+    @staticmethod
+    def _locate_fields(data, column_count):
+        """
+        Locate the commas and newlines ending the fields of whole lines
+        :param data: uint8 array of csv lines
+        :param column_count: number of columns of the file
+        :return: array of the end offset of each field (rows x columns), or None if a line has another column count
+        """
+        numpy = import_numpy()
+        is_newline = data == ord("\n")
+        separators = numpy.flatnonzero(is_newline | (data == ord(",")))
+        if len(separators) % column_count:
+            return None
+        fields = separators.reshape(-1, column_count)
+        if is_newline[fields[:, :-1]].any() or not is_newline[fields[:, -1]].all():
+            return None
+        return fields
+
+    def _convert(self, batch, indexes, column_count, newline) -> bytes:
+        """
+        Convert the timestamp columns of a batch of whole lines to the target unit
+        Fields are located with NumPy over the bytes of the batch. A millisecond timestamp has fewer than 15 digits,
+        a microsecond one 16, so converting appends or removes three digits without parsing values. Each value is
+        converted on its own, so files mixing both units come out uniform.
+        :param batch: whole csv lines
+        :param indexes: indexes of the timestamp columns
+        :param column_count: number of columns of the file
+        :param newline: line ending of the file
+        :return: converted lines
+        """
+        numpy = import_numpy()
+        # The last line of a file may have no line ending, it is left without one
+        missing_ending = not batch.endswith(b"\n")
+        ended = batch + newline if missing_ending else batch
+        data = numpy.frombuffer(ended, dtype=numpy.uint8)
+        fields = self._locate_fields(data, column_count)
+        if fields is None:
+            # Blank lines are rare: drop them and locate fields again
+            lines = [line for line in ended.split(b"\n") if line.strip()]
+            ended = b"\n".join(lines) + b"\n" if lines else b""
+            batch = ended[: -len(newline)] if missing_ending and lines else ended
+            data = numpy.frombuffer(ended, dtype=numpy.uint8)
+            fields = self._locate_fields(data, column_count)
+        if fields is None:
+            raise ValueError(f"{self.data_type} rows must have {column_count} columns.")
+        if not len(fields):
+            return batch
+
+        row_starts = numpy.r_[0, fields[:-1, -1] + 1]
+        starts = numpy.stack(
+            [
+                row_starts if index == 0 else fields[:, index - 1] + 1
+                for index in indexes
+            ]
+        )
+        ends = fields[:, indexes].T
+        lengths = ends - starts
+        if lengths.min() < 1 or lengths.max() > 18:
+            raise ValueError("Timestamps must be integers of 1 to 18 digits.")
+        offsets = ends[..., None] - numpy.arange(lengths.max(), 0, -1)
+        in_field = offsets >= starts[..., None]
+        digits = data[numpy.where(in_field, offsets, 0)]
+        if (in_field & ((digits < ord("0")) | (digits > ord("9")))).any():
+            raise ValueError("Timestamps must be integers of 1 to 18 digits.")
+
+        is_microseconds = lengths >= len(str(MICROSECONDS_THRESHOLD))
+        if self.timestamp_unit == "ms":
+            positions = ends[is_microseconds]
+            if not len(positions):
+                return batch
+            keep = numpy.ones(len(data), dtype=bool)
+            keep[(positions[:, None] - numpy.arange(1, 4)).ravel()] = False
+            converted = data[keep].tobytes()
+        else:
+            positions = numpy.sort(ends[~is_microseconds])
+            if not len(positions):
+                return batch
+            converted = numpy.insert(
+                data, numpy.repeat(positions, 3), ord("0")
+            ).tobytes()
+        return converted[: -len(newline)] if missing_ending else converted
+
+    def copy(self, source, target) -> None:
+        """
+        Copy a csv from one binary stream to another, normalizing its header and timestamps
+        :param source: binary file object to read
+        :param target: binary file object to write
+        :return: None
+        """
+        first_line = source.readline()
+        header_line = None
+        if has_header(first_line):
+            header_line, first_line = first_line, source.readline()
+        newline = b"\r\n" if (header_line or first_line).endswith(b"\r\n") else b"\n"
+        if not first_line.strip():
+            if header_line is not None and self.header != "drop":
+                target.write(header_line)
+            target.write(first_line)
+            shutil.copyfileobj(source, target, 1024 * 1024)
+            return
+
+        column_count = first_line.count(b",") + 1
+        if self.header == "add":
+            target.write(self._get_header(column_count, newline))
+        elif header_line is not None and self.header is None:
+            target.write(header_line)
+
+        if self.timestamp_unit is None:
+            target.write(first_line)
+            shutil.copyfileobj(source, target, 1024 * 1024)
+            return
+        columns = get_columns(self.data_type, column_count)
+        indexes = [
+            index
+            for index, (name, _) in enumerate(columns)
+            if name in TIMESTAMP_COLUMNS[self.data_type]
+        ]
+        batch = first_line + source.read(self._BATCH_BYTES)
+        while batch:
+            if not batch.endswith(b"\n"):
+                batch += source.readline()
+            target.write(self._convert(batch, indexes, column_count, newline))
+            batch = source.read(self._BATCH_BYTES)
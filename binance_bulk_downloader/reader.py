@@ -0,0 +1,327 @@
+"""
+Read downloaded files whether they are kept as csv, zip, gzip or zstd
+"""
+
+# import standard libraries
+import gzip
+import io
+import os
+import zipfile
+from typing import Optional
+
+# Columns of the csv files of each data type, as (name, numpy type). Booleans are read as text first.
+_KLINE_COLUMNS = (
+    ("open_time", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+    ("close_time", "i8"),
+    ("quote_volume", "f8"),
+    ("count", "i8"),
+    ("taker_buy_volume", "f8"),
+    ("taker_buy_quote_volume", "f8"),
+    ("ignore", "f8"),
+)
+DATA_COLUMNS = {
+    "klines": _KLINE_COLUMNS,
+    "indexPriceKlines": _KLINE_COLUMNS,
+    "markPriceKlines": _KLINE_COLUMNS,
+    "premiumIndexKlines": _KLINE_COLUMNS,
+    "trades": (
+        ("id", "i8"),
+        ("price", "f8"),
+        ("qty", "f8"),
+        ("quote_qty", "f8"),
+        ("time", "i8"),
+        ("is_buyer_maker", "?"),
+    ),
+    "aggTrades": (
+        ("agg_trade_id", "i8"),
+        ("price", "f8"),
+        ("quantity", "f8"),
+        ("first_trade_id", "i8"),
+        ("last_trade_id", "i8"),
+        ("transact_time", "i8"),
+        ("is_buyer_maker", "?"),
+    ),
+}
+# Column ordering the rows of each data type
+TIME_COLUMNS = {
+    "klines": "open_time",
+    "indexPriceKlines": "open_time",
+    "markPriceKlines": "open_time",
+    "premiumIndexKlines": "open_time",
+    "trades": "time",
+    "aggTrades": "transact_time",
+}
+# Columns holding timestamps, by data type
+TIMESTAMP_COLUMNS = {
+    "klines": ("open_time", "close_time"),
+    "indexPriceKlines": ("open_time", "close_time"),
+    "markPriceKlines": ("open_time", "close_time"),
+    "premiumIndexKlines": ("open_time", "close_time"),
+    "trades": ("time",),
+    "aggTrades": ("transact_time",),
+}
+# Spot trades and aggTrades files have an extra last column
+_BEST_MATCH_COLUMN = ("is_best_match", "?")
+# Column holding the unique id of a row, for trades and aggTrades
+ID_COLUMNS = {"trades": "id", "aggTrades": "agg_trade_id"}
+_INTERVAL_UNIT_MILLISECONDS = {
+    "s": 1000,
+    "m": 60 * 1000,
+    "h": 60 * 60 * 1000,
+    "d": 24 * 60 * 60 * 1000,
+    "w": 7 * 24 * 60 * 60 * 1000,
+}
+# Timestamps above this are microseconds (spot files since 2025), below are milliseconds
+MICROSECONDS_THRESHOLD = 10**14
+
+# Approximate csv size of the blocks of rows parsed at once by parse_csv
+_PARSE_BLOCK_BYTES = 256 * 1024
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+# Suffix of the local file of an archive, by keep_compressed mode
+LOCAL_FILE_SUFFIXES = {
+    None: ".csv",
+    "zip": ".zip",
+    "gzip": ".csv.gz",
+    "zstd": ".csv.zst",
+}
+
+
+def import_zstandard():
+    """
+    Import the optional zstandard package
+    :return: zstandard module, or None if it is not installed
+    """
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def import_numpy():
+    """
+    Import the optional numpy package
+    :return: numpy module
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            "Parsing files into arrays requires the numpy package "
+            "(pip install binance-bulk-downloader[numpy])."
+        )
+    return numpy
+
+
+def local_file_candidates(prefix) -> list:
+    """
+    Get every local file name an archive may have been stored as
+    :param prefix: s3 bucket prefix of the archive (ending with .zip)
+    :return: list of paths relative to destination_dir
+    """
+    stem = prefix[: -len(".zip")] if prefix.endswith(".zip") else prefix
+    return [
+        stem + suffix if suffix != ".zip" else prefix
+        for suffix in LOCAL_FILE_SUFFIXES.values()
+    ]
+
+
+def find_local_file(destination_dir, prefix) -> Optional[str]:
+    """
+    Find the local file of an archive, whatever the mode it was stored with
+    :param destination_dir: destination directory of the download
+    :param prefix: s3 bucket prefix of the archive
+    :return: path of the local file, or None if it is not downloaded
+    """
+    for candidate in local_file_candidates(prefix):
+        path = os.path.join(destination_dir, candidate)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def open_data_file(path, mode="rb"):
+    """
+    Open a downloaded csv as a stream, decompressing zip, gzip or zstd transparently
+    :param path: path of a .csv, .zip, .csv.gz or .csv.zst file
+    :param mode: "rb" for bytes or "rt" for text
+    :return: file object
+    """
+    if mode not in ("rb", "rt"):
+        raise ValueError("mode must be rb or rt.")
+    path = os.fspath(path)
+    if path.endswith(".zip"):
+        archive = zipfile.ZipFile(path)
+        members = [name for name in archive.namelist() if name.endswith(".csv")]
+        stream = archive.open(members[0] if members else archive.namelist()[0])
+    elif path.endswith(".gz"):
+        stream = gzip.open(path, "rb")
+    elif path.endswith(".zst"):
+        zstandard = import_zstandard()
+        if zstandard is None:
+            raise ImportError("Reading .zst files requires the zstandard package.")
+        stream = io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        )
+    else:
+        stream = open(path, "rb")
+    if mode == "rt":
+        return io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    return stream
+
+
+def get_columns(data_type, column_count=None) -> tuple:
+    """
+    Get the columns of the csv files of a data type
+    :param data_type: data type (e.g. klines, trades, aggTrades)
+    :param column_count: Optional. Number of columns of the file, to tell spot files from futures files
+    :return: tuple of (name, numpy type)
+    """
+    columns = DATA_COLUMNS.get(data_type)
+    if columns is None:
+        raise ValueError(f"{data_type} files cannot be parsed into arrays.")
+    if column_count == len(columns) + 1 and columns[-1][1] == "?":
+        return columns + (_BEST_MATCH_COLUMN,)
+    if column_count is not None and column_count != len(columns):
+        raise ValueError(
+            f"{data_type} files have {len(columns)} columns, got {column_count}."
+        )
+    return columns
+
+
+def interval_to_milliseconds(interval) -> Optional[int]:
+    """
+    Get the length of a kline interval
+    :param interval: data frequency (e.g. 1m, 4h, 1w)
+    :return: milliseconds, or None for 1mo whose length varies
+    """
+    unit = _INTERVAL_UNIT_MILLISECONDS.get(interval[-1:])
+    if unit is None or interval.endswith("mo"):
+        return None
+    return int(interval[:-1]) * unit
+
+
+def has_header(first_line) -> bool:
+    """
+    Check if the first line of a csv is a header row (Binance files have one or not depending on the date)
+    :param first_line: first line (bytes or str)
+    :return: True if it is a header row
+    """
+    if isinstance(first_line, bytes):
+        first_line = first_line.decode("utf-8", "replace")
+    first_line = first_line.lstrip("\ufeff")
+    return bool(first_line) and not (first_line[0].isdigit() or first_line[0] == "-")
+
+
+def _find_line_end(data, start) -> int:
+    """
+    Find the end of the line starting at an offset
+    :param data: csv content
+    :param start: offset of the line
+    :return: offset of its newline, or the length of the content for the last line
+    """
+    end = data.find(b"\n", start)
+    return len(data) if end < 0 else end
+
+
+def parse_csv(data, data_type):
+    """
+    Parse the content of a csv into a NumPy structured array, with or without a header row
+    Rows are parsed block by block into an array allocated once, so the peak memory stays close to the size of
+    the content plus the size of the array, which is smaller than the csv.
+    :param data: csv content (bytes, or a buffer such as a bytearray)
+    :param data_type: data type of the file
+    :return: structured array with the columns of get_columns
+    """
+    numpy = import_numpy()
+    start = len(_UTF8_BOM) if data[: len(_UTF8_BOM)] == _UTF8_BOM else 0
+    end = _find_line_end(data, start)
+    if has_header(bytes(data[start:end])):
+        start = end + 1
+    # The column count is read on the first row
+    while start < len(data):
+        end = _find_line_end(data, start)
+        first_row = data[start:end].strip()
+        if first_row:
+            break
+        start = end + 1
+    else:
+        return numpy.empty(0, dtype=list(get_columns(data_type)))
+
+    columns = get_columns(data_type, first_row.count(b",") + 1)
+    # Booleans are written true/false or True/False, which loadtxt cannot read as bool: their first letter is read
+    text_dtype = [(name, "S1" if kind == "?" else kind) for name, kind in columns]
+    array = numpy.empty(data.count(b"\n", start) + 1, dtype=text_dtype)
+    row_count = 0
+    while start < len(data):
+        end = data.rfind(b"\n", start, start + _PARSE_BLOCK_BYTES)
+        if start + _PARSE_BLOCK_BYTES >= len(data):
+            end = len(data)
+        elif end < 0:
+            end = _find_line_end(data, start + _PARSE_BLOCK_BYTES)
+        lines = [line for line in str(data[start:end], "utf-8").splitlines() if line]
+        if lines:
+            block = numpy.loadtxt(lines, delimiter=",", dtype=text_dtype, ndmin=1)
+            array[row_count : row_count + len(block)] = block
+            row_count += len(block)
+        start = end + 1
+    array = array[:row_count]
+    for name, kind in columns:
+        if kind == "?":
+            letters = array[name].view(numpy.uint8)
+            letters[...] = (letters | 0x20) == ord("t")
+    return array.view(list(columns))
+
+
+def read_member(archive, name) -> bytearray:
+    """
+    Read a member of a zip archive into a buffer allocated once, instead of joining decompressed chunks
+    :param archive: open zipfile.ZipFile
+    :param name: name of the member
+    :return: content of the member
+    """
+    info = archive.getinfo(name)
+    content = bytearray(info.file_size)
+    position = 0
+    with archive.open(info) as member:
+        while True:
+            chunk = member.read(_PARSE_BLOCK_BYTES)
+            if not chunk:
+                break
+            content[position : position + len(chunk)] = chunk
+            position += len(chunk)
+    del content[position:]
+    return content
+
+
+def iter_arrays(path, data_type, chunk_bytes: int = 64 * 1024 * 1024):
+    """
+    Read a downloaded file chunk by chunk into NumPy structured arrays, so that memory stays bounded
+    :param path: path of the local file
+    :param data_type: data type of the file
+    :param chunk_bytes: approximate csv size of each chunk
+    :return: iterator of structured arrays
+    """
+    with open_data_file(path) as file:
+        while True:
+            lines = file.readlines(chunk_bytes)
+            if not lines:
+                return
+            yield parse_csv(b"".join(lines), data_type)
+
+
+def read_array(path, data_type):
+    """
+    Read a downloaded csv, zip, gzip or zstd file into a NumPy structured array
+    :param path: path of the local file
+    :param data_type: data type of the file
+    :return: structured array
+    """
+    with open_data_file(path) as file:
+        return parse_csv(file.read(), data_type)
@@ -0,0 +1,238 @@
+"""
+Build coarser klines from finer local klines (e.g. 1h from 1m), in the csv format of the downloaded files
+"""
+
+# import standard libraries
+import gzip
+import io
+import os
+import zipfile
+from typing import List
+
+# import my libraries
+from binance_bulk_downloader.reader import (
+    MICROSECONDS_THRESHOLD,
+    get_columns,
+    import_numpy,
+    import_zstandard,
+    interval_to_milliseconds,
+    read_array,
+)
+
+# Weekly klines start on Monday, 4 days after the epoch
+_WEEK_OFFSET_MILLISECONDS = 4 * 24 * 60 * 60 * 1000
+_SUM_COLUMNS = (
+    "volume",
+    "quote_volume",
+    "count",
+    "taker_buy_volume",
+    "taker_buy_quote_volume",
+)
+
+
+def get_bucket_bounds(open_times, interval):
+    """
+    Get the open and close bound of the kline of an interval holding each timestamp
+    :param open_times: int64 array of millisecond timestamps
+    :param interval: data frequency of the klines (e.g. 1h, 1w, 1mo)
+    :return: tuple of int64 arrays (start, end), end being the start of the next kline
+    """
+    numpy = import_numpy()
+    if interval == "1mo":
+        months = open_times.astype("datetime64[ms]").astype("datetime64[M]")
+        starts = months.astype("datetime64[ms]").astype(numpy.int64)
+        ends = (months + 1).astype("datetime64[ms]").astype(numpy.int64)
+        return starts, ends
+    step = interval_to_milliseconds(interval)
+    offset = _WEEK_OFFSET_MILLISECONDS if interval.endswith("w") else 0
+    starts = (open_times - offset) // step * step + offset
+    return starts, starts + step
+
+
+class KlineResampler:
+    """
+    Aggregate klines of a source interval into klines of a coarser interval, file by file
+    Rows of the last kline of a file are kept until the next file completes it, so memory stays bounded by one
+    target kline whatever the length of the history. Klines missing source rows are dropped.
+    Millisecond and microsecond timestamps are both accepted, each kline keeps the unit of its first row.
+    """
+
+    def __init__(self, interval, source_interval) -> None:
+        """
+        :param interval: data frequency to build (e.g. 1h)
+        :param source_interval: data frequency of the source klines (e.g. 1m)
+        """
+        source_step = interval_to_milliseconds(source_interval)
+        step = interval_to_milliseconds(interval)
+        if source_step is None:
+            raise ValueError("source_interval must not be 1mo.")
+        if interval == "1mo":
+            if source_step > 24 * 60 * 60 * 1000:
+                raise ValueError("1mo klines can only be built from 1d or finer.")
+        elif step is None or step <= source_step or step % source_step:
+            raise ValueError(
+                f"{interval} klines cannot be built from {source_interval} klines."
+            )
+        self.interval = interval
+        self.source_interval = source_interval
+        self._source_step = source_step
+        self._carry = None
+
+    def update(self, array):
+        """
+        Add the klines of the next source file
+        :param array: structured array of source klines (see reader.parse_csv), in time order after the previous ones
+        :return: structured array of the klines completed so far
+        """
+        numpy = import_numpy()
+        if self._carry is not None:
+            array = numpy.concatenate([self._carry, array])
+            self._carry = None
+        if not len(array):
+            return array
+        array = self._sort(array)
+        resampled, counts, expected = self._aggregate(array)
+        if counts[-1] < expected[-1]:
+            self._carry = array[len(array) - counts[-1] :]
+            resampled, counts, expected = (
+                resampled[:-1],
+                counts[:-1],
+                expected[:-1],
+            )
+        return resampled[counts == expected]
+
+    def flush(self):
+        """
+        End the history, dropping the last kline if it misses source rows
+        :return: structured array of the last kline, if complete
+        """
+        carry, self._carry = self._carry, None
+        if carry is None:
+            return None
+        resampled, counts, expected = self._aggregate(carry)
+        return resampled[counts == expected]
+
+    @staticmethod
+    def _to_milliseconds(open_times):
+        """
+        Get open times in milliseconds
+        :param open_times: int64 array of millisecond or microsecond timestamps
+        :return: tuple of (millisecond timestamps, mask of the microsecond ones)
+        """
+        numpy = import_numpy()
+        is_microseconds = open_times >= MICROSECONDS_THRESHOLD
+        open_times = numpy.where(is_microseconds, open_times // 1000, open_times)
+        return open_times, is_microseconds
+
+    def _sort(self, array):
+        """
+        Sort source klines by open time, dropping duplicates
+        :param array: structured array of source klines
+        :return: sorted structured array
+        """
+        numpy = import_numpy()
+        open_times, _ = self._to_milliseconds(array["open_time"])
+        _, unique_index = numpy.unique(open_times, return_index=True)
+        return array[unique_index]
+
+    def _aggregate(self, array):
+        """
+        Aggregate sorted source klines into target klines
+        :param array: structured array of source klines
+        :return: tuple of (target klines, source row count of each, expected source row count of each)
+        """
+        numpy = import_numpy()
+        open_times, is_microseconds = self._to_milliseconds(array["open_time"])
+        starts, ends = get_bucket_bounds(open_times, self.interval)
+        first = numpy.flatnonzero(numpy.r_[True, starts[1:] != starts[:-1]])
+        last = numpy.r_[first[1:], len(array)] - 1
+        counts = last - first + 1
+        expected = (ends[first] - starts[first]) // self._source_step
+
+        resampled = numpy.zeros(len(first), dtype=array.dtype)
+        time_factor = numpy.where(is_microseconds[first], 1000, 1)
+        resampled["open_time"] = starts[first] * time_factor
+        resampled["close_time"] = ends[first] * time_factor - 1
+        resampled["open"] = array["open"][first]
+        resampled["close"] = array["close"][last]
+        resampled["high"] = numpy.maximum.reduceat(array["high"], first)
+        resampled["low"] = numpy.minimum.reduceat(array["low"], first)
+        for name in _SUM_COLUMNS:
+            resampled[name] = numpy.add.reduceat(array[name], first)
+        return resampled, counts, expected
+
+
+def format_klines(array) -> bytes:
+    """
+    Write klines as csv rows without header, like the downloaded files
+    :param array: structured array of klines
+    :return: csv content
+    """
+    numpy = import_numpy()
+    formats = [
+        "%d" if kind == "i8" or name == "ignore" else "%.8f"
+        for name, kind in get_columns("klines")
+    ]
+    buffer = io.BytesIO()
+    numpy.savetxt(buffer, array, fmt=formats, delimiter=",")
+    return buffer.getvalue()
+
+
+def write_klines(path, array) -> None:
+    """
+    Write klines to a local file, compressed like the downloaded files of the same suffix
+    The file is written under a temporary name and renamed, so it is never seen half written.
+    :param path: path of a .csv, .zip, .csv.gz or .csv.zst file
+    :param array: structured array of klines
+    :return: None
+    """
+    content = format_klines(array)
+    part_path = path + ".part"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(part_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(os.path.basename(path)[: -len(".zip")] + ".csv", content)
+    elif path.endswith(".gz"):
+        with gzip.open(part_path, "wb", compresslevel=6) as file:
+            file.write(content)
+    elif path.endswith(".zst"):
+        with open(part_path, "wb") as file:
+            file.write(import_zstandard().ZstdCompressor(level=3).compress(content))
+    else:
+        with open(part_path, "wb") as file:
+            file.write(content)
+    os.replace(part_path, path)
+
+
+def compare_klines(resampled, path) -> List[str]:
+    """
+    Compare resampled klines with a downloaded file of the same interval
+    :param resampled: structured array of resampled klines
+    :param path: path of the downloaded file
+    :return: list of differences, empty if the klines match
+    """
+    numpy = import_numpy()
+    official = read_array(path, "klines")
+    problems = []
+    missing = numpy.setdiff1d(official["open_time"], resampled["open_time"])
+    if len(missing):
+        problems.append(f"{len(missing)} klines not resampled")
+    extra = numpy.setdiff1d(resampled["open_time"], official["open_time"])
+    if len(extra):
+        problems.append(f"{len(extra)} klines not in the downloaded file")
+    _, official_index, resampled_index = numpy.intersect1d(
+        official["open_time"], resampled["open_time"], return_indices=True
+    )
+    official, resampled = official[official_index], resampled[resampled_index]
+    for name, kind in get_columns("klines"):
+        if name == "ignore":
+            continue
+        if kind == "i8":
+            different = official[name] != resampled[name]
+        else:
+            different = ~numpy.isclose(
+                official[name], resampled[name], rtol=1e-9, atol=1e-8
+            )
+        if different.any():
+            problems.append(f"{int(different.sum())} klines differ in {name}")
+    return problems
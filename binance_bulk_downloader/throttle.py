@@ -0,0 +1,45 @@
+"""
+Bandwidth cap shared by download threads
+"""
+
+# import standard libraries
+import threading
+import time
+from typing import Optional
+
+
+class BandwidthLimiter:
+    """
+    Token bucket limiting the bytes per second read by every thread sharing it
+    A thread taking more bytes than available sleeps for its share of the debt, so the cap holds on average
+    while threads keep streaming in parallel.
+    """
+
+    def __init__(self, bytes_per_second: float, burst: Optional[float] = None) -> None:
+        """
+        :param bytes_per_second: maximum average throughput
+        :param burst: Optional. Bytes that may be read at once after an idle period. Defaults to one second worth.
+        """
+        self.bytes_per_second = bytes_per_second
+        self._capacity = burst or bytes_per_second
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, size) -> None:
+        """
+        Take size bytes from the bucket, sleeping if the cap is exceeded
+        :param size: number of bytes read
+        :return: None
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._capacity,
+                self._tokens + (now - self._updated) * self.bytes_per_second,
+            )
+            self._updated = now
+            self._tokens -= size
+            delay = -self._tokens / self.bytes_per_second if self._tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
@@ -0,0 +1,132 @@
+"""
+Validation of the content of downloaded kline and trade files
+"""
+
+# import standard libraries
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional
+
+# import my libraries
+from binance_bulk_downloader.reader import (
+    ID_COLUMNS,
+    MICROSECONDS_THRESHOLD,
+    TIME_COLUMNS,
+    import_numpy,
+    interval_to_milliseconds,
+    iter_arrays,
+)
+
+# Approximate csv size of each chunk read while validating a file
+_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def _with_previous(values, previous):
+    """
+    Prepend the last value of the previous chunk, so that steps across chunks are checked too
+    :param values: 1d array of the current chunk
+    :param previous: last value of the previous chunk, or None for the first chunk
+    :return: 1d array
+    """
+    if previous is None:
+        return values
+    return import_numpy().r_[previous, values]
+
+
+def validate_file(
+    path, data_type, interval: Optional[str] = None, chunk_bytes: int = _CHUNK_BYTES
+) -> List[str]:
+    """
+    Check the content of a downloaded file
+    Checks the number of columns, duplicate rows, kline open_time spacing against the interval, and that trade ids
+    and timestamps increase without gaps. The file is read chunk by chunk, carrying the last id and timestamp from
+    one chunk to the next: only the ids (or open times) of the rows are kept whole, to count duplicates.
+    :param path: path of a .csv, .zip, .csv.gz or .csv.zst file
+    :param data_type: data type of the file (klines-like, trades or aggTrades)
+    :param interval: Optional. data frequency of a klines file
+    :param chunk_bytes: Optional. Approximate csv size of each chunk read
+    :return: list of problems, empty if the file is valid
+    """
+    numpy = import_numpy()
+    time_column = TIME_COLUMNS[data_type]
+    id_column = ID_COLUMNS.get(data_type)
+    step = None if id_column or not interval else interval_to_milliseconds(interval)
+    keys = []
+    last_time = last_key = None
+    unordered_count = gap_count = backward_count = break_count = 0
+    try:
+        for array in iter_arrays(path, data_type, chunk_bytes):
+            if not len(array):
+                continue
+            times = array[time_column]
+            chunk_keys = array[id_column] if id_column else times
+            if (
+                step is not None
+                and last_time is None
+                and times[0] >= MICROSECONDS_THRESHOLD
+            ):
+                step *= 1000
+            time_steps = numpy.diff(_with_previous(times, last_time))
+            if id_column:
+                id_steps = numpy.diff(_with_previous(chunk_keys, last_key))
+                unordered_count += int((id_steps <= 0).sum())
+                gap_count += int((id_steps > 1).sum())
+                backward_count += int((time_steps < 0).sum())
+            elif step is None:
+                break_count += int((time_steps <= 0).sum())
+            else:
+                break_count += int((time_steps != step).sum())
+            # Copy the column so that the chunk is not kept alive by a view
+            keys.append(numpy.array(chunk_keys))
+            last_time, last_key = times[-1], chunk_keys[-1]
+    except (ValueError, OSError, EOFError, zipfile.BadZipFile) as e:
+        return [f"Unreadable: {str(e)}"]
+    if not keys:
+        return ["Empty file"]
+
+    problems = []
+    keys = numpy.concatenate(keys)
+    duplicate_count = len(keys) - len(numpy.unique(keys))
+    if duplicate_count:
+        problems.append(f"{duplicate_count} duplicate rows")
+    if id_column:
+        if unordered_count:
+            problems.append(f"{unordered_count} non-increasing {id_column}")
+        if gap_count:
+            problems.append(f"{gap_count} gaps in {id_column}")
+        if backward_count:
+            problems.append(f"{backward_count} decreasing {time_column}")
+    elif break_count:
+        problems.append(f"{break_count} breaks in {time_column} spacing")
+    return problems
+
+
+def validate_files(
+    paths: List[str],
+    data_type,
+    intervals: Optional[List[Optional[str]]] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, List[str]]:
+    """
+    Check the content of many files in worker processes
+    :param paths: paths of the local files
+    :param data_type: data type of the files
+    :param intervals: Optional. data frequency of each file, for klines
+    :param max_workers: Optional. Number of worker processes. Defaults to the number of CPUs.
+    :return: dict of path to list of problems, for invalid files only
+    """
+    if not paths:
+        return {}
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            validate_file,
+            paths,
+            repeat(data_type),
+            intervals if intervals is not None else repeat(None),
+            chunksize=chunksize,
+        )
+        return {path: problems for path, problems in zip(paths, results) if problems}
@@ -0,0 +1,15 @@
+# import binance_bulk_downloader
+from binance_bulk_downloader.batch import BatchDownloader
+
+# describe jobs with the arguments of BinanceBulkDownloader
+jobs = [
+    {"data_type": "trades"},
+    {"data_type": "trades", "asset": "cm"},
+    {"data_type": "klines", "data_frequency": ["1m", "1h"]},
+    {"data_type": "klines", "asset": "spot", "timeperiod_per_file": "monthly"},
+    {"data_type": "fundingRate", "timeperiod_per_file": "monthly"},
+]
+
+# list jobs concurrently and download all files through one shared pool
+batch = BatchDownloader(jobs, max_workers=16, listing_workers=4)
+batch.run_download()
@@ -54,3 +54,7 @@ downloader = BinanceBulkDownloader(
     data_frequency="1m", asset="spot", timeperiod_per_file="monthly"
 )
 downloader.run_download()
+
+# download klines of several frequencies from a single listing (frequency: ["1m", "5m", "1h", "1d"], asset="um")
+downloader = BinanceBulkDownloader(data_frequency=["1m", "5m", "1h", "1d"])
+downloader.run_download()
@@ -5,6 +5,17 @@ setup(
     version="1.1.0.1",
     description="A Python library to efficiently and concurrently download historical data files from Binance. Supports all asset types (spot, futures, options) and all frequencies.",
     install_requires=["requests", "rich", "pytest"],
+    extras_require={
+        "zstd": ["zstandard"],
+        "yaml": ["pyyaml"],
+        "numpy": ["numpy"],
+        "pandas": ["numpy", "pandas"],
+    },
+    entry_points={
+        "console_scripts": [
+            "binance-bulk-downloader=binance_bulk_downloader.cli:main",
+        ],
+    },
     author="aoki-h-jp",
     author_email="aoki.hirotaka.biz@gmail.com",
     license="MIT",
@@ -0,0 +1,64 @@
+"""
+Benchmark download schedules against the local stand-in
+
+python -m tests.benchmark_schedule
+"""
+
+import tempfile
+import time
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from tests.stand_in import StandInServer, make_archive
+
+PREFIX = "data/futures/um/monthly/trades"
+BYTES_PER_SECOND = 4 * 1024 * 1024
+MAX_WORKERS = 4
+
+
+def make_files():
+    """
+    One large archive listed last, like a recent monthly trades file, and many small ones
+    :return: dict of key to archive bytes
+    """
+    files = {
+        f"{PREFIX}/SYM{index:02d}USDT/SYM{index:02d}USDT-trades-2024-01.zip": make_archive(
+            f"SYM{index:02d}USDT-trades-2024-01.zip", 256 * 1024
+        )
+        for index in range(48)
+    }
+    files[f"{PREFIX}/ZZZUSDT/ZZZUSDT-trades-2024-01.zip"] = make_archive(
+        "ZZZUSDT-trades-2024-01.zip", 12 * 1024 * 1024
+    )
+    return files
+
+
+def run(schedule, files):
+    """
+    Download every file with a schedule and measure the wall-clock time
+    :param schedule: schedule order
+    :param files: dict of key to archive bytes
+    :return: seconds
+    """
+    with StandInServer(files, bytes_per_second=BYTES_PER_SECOND) as server:
+        with tempfile.TemporaryDirectory() as destination_dir:
+            downloader = server.use(
+                BinanceBulkDownloader(
+                    destination_dir=destination_dir,
+                    data_type="trades",
+                    timeperiod_per_file="monthly",
+                    schedule=schedule,
+                    max_workers=MAX_WORKERS,
+                )
+            )
+            start = time.perf_counter()
+            downloader.run_download()
+            return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    files = make_files()
+    results = {
+        schedule: run(schedule, files) for schedule in BinanceBulkDownloader._SCHEDULE
+    }
+    for schedule, seconds in results.items():
+        print(f"{schedule:>14}: {seconds:.2f}s")
@@ -0,0 +1,200 @@
+"""
+Local stand-in for the Binance Vision bucket, used by tests and benchmarks
+"""
+
+import hashlib
+import io
+import os
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+
+
+def make_zip(name, content):
+    """
+    Make zip archive bytes with a single member
+    :param name: member name
+    :param content: member content (str or bytes)
+    :return: zip bytes
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def make_archive(key, size):
+    """
+    Make a stored (uncompressed) zip of roughly size bytes for a key
+    :param key: s3 key of the archive
+    :param size: approximate archive size in bytes
+    :return: zip bytes
+    """
+    name = os.path.basename(key).replace(".zip", ".csv")
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        archive.writestr(name, b"0" * size)
+    return buffer.getvalue()
+
+
+def make_downloader(server, destination_dir, **kwargs):
+    """
+    Make a downloader writing to a test directory
+    Test modules bind their own defaults with functools.partial.
+    :param server: StandInServer to point the downloader at, or None to keep its urls
+    :param destination_dir: destination directory (str or py.path)
+    :param kwargs: other BinanceBulkDownloader parameters
+    :return: BinanceBulkDownloader
+    """
+    downloader = BinanceBulkDownloader(destination_dir=str(destination_dir), **kwargs)
+    return downloader if server is None else server.use(downloader)
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """
+    Request handler of StandInServer
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body):
+        stand_in = self.server.stand_in
+        url = urlparse(self.path)
+        stand_in.request_log.append(self.path)
+        if stand_in.latency:
+            time.sleep(stand_in.latency)
+        if stand_in.fail_with:
+            self.send_response(stand_in.fail_with)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if url.path in ("", "/"):
+            body = stand_in.list_objects(parse_qs(url.query))
+            content_type = "application/xml"
+        else:
+            body = stand_in.files.get(url.path.lstrip("/"))
+            content_type = "application/zip"
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not send_body:
+            return
+        chunk_size = 64 * 1024
+        for start in range(0, len(body), chunk_size):
+            chunk = body[start : start + chunk_size]
+            self.wfile.write(chunk)
+            if stand_in.bytes_per_second:
+                time.sleep(len(chunk) / stand_in.bytes_per_second)
+
+
+class StandInServer:
+    """
+    Serve S3 ListObjects (v1) listings and file downloads from an in-memory dict of key to bytes.
+    bytes_per_second throttles each connection, latency delays every response.
+    """
+
+    def __init__(self, files=None, bytes_per_second=None, latency=0.0):
+        self.files = dict(files or {})
+        self.bytes_per_second = bytes_per_second
+        self.latency = latency
+        self.fail_with = None
+        self.last_modified = {}
+        self.request_log = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        self._server.daemon_threads = True
+        self._server.stand_in = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def list_objects(self, query):
+        """
+        Build a ListBucketResult for a query
+        :param query: parsed query string
+        :return: xml bytes
+        """
+        prefix = query.get("prefix", [""])[0]
+        marker = query.get("marker", [""])[0]
+        max_keys = int(query.get("max-keys", ["1000"])[0])
+        delimiter = query.get("delimiter", [None])[0]
+        matched = sorted(
+            key for key in self.files if key.startswith(prefix) and key > marker
+        )
+        body = []
+        if delimiter:
+            common_prefixes = sorted(
+                {
+                    prefix + key[len(prefix) :].split(delimiter)[0] + delimiter
+                    for key in matched
+                }
+            )
+            page = common_prefixes[:max_keys]
+            body += [
+                f"<CommonPrefixes><Prefix>{escape(common_prefix)}</Prefix></CommonPrefixes>"
+                for common_prefix in page
+            ]
+            is_truncated = len(common_prefixes) > max_keys
+            if is_truncated:
+                body.append(f"<NextMarker>{escape(page[-1])}</NextMarker>")
+        else:
+            page = matched[:max_keys]
+            for key in page:
+                content = self.files[key]
+                last_modified = self.last_modified.get(key, "2024-01-01T00:00:00.000Z")
+                body.append(
+                    "<Contents>"
+                    f"<Key>{escape(key)}</Key>"
+                    f"<LastModified>{last_modified}</LastModified>"
+                    f"<ETag>&quot;{hashlib.md5(content).hexdigest()}&quot;</ETag>"
+                    f"<Size>{len(content)}</Size>"
+                    "</Contents>"
+                )
+            is_truncated = len(matched) > max_keys
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            f"<Prefix>{escape(prefix)}</Prefix>"
+            f"<IsTruncated>{str(is_truncated).lower()}</IsTruncated>"
+            + "".join(body)
+            + "</ListBucketResult>"
+        ).encode()
+
+    def use(self, downloader):
+        """
+        Point a downloader at this server for listing and downloading
+        :param downloader: BinanceBulkDownloader
+        :return: downloader
+        """
+        downloader._BINANCE_DATA_S3_BUCKET_URL = self.url
+        downloader._BINANCE_DATA_DOWNLOAD_BASE_URL = self.url
+        return downloader
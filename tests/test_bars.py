@@ -0,0 +1,190 @@
+"""
+Test building custom bars from trades and aggTrades files
+"""
+
+import threading
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+from binance_bulk_downloader.bars import BarBuilder, BarStage, build_bars
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.reader import parse_csv
+from tests.stand_in import StandInServer, make_zip
+
+START = 1704067200000
+SECOND_MS = 1000
+
+
+def make_trades(count, factor=1):
+    """
+    One trade per second, price rising by one, quantity 1 or 2, buyer maker every other trade
+    """
+    return "".join(
+        f"{trade_id},{100 + trade_id},{1 + trade_id % 2},{(100 + trade_id) * (1 + trade_id % 2)},"
+        f"{(START + trade_id * SECOND_MS) * factor},{'true' if trade_id % 2 else 'false'}\n"
+        for trade_id in range(count)
+    )
+
+
+def trades(count, factor=1):
+    return parse_csv(make_trades(count, factor).encode(), "trades")
+
+
+@pytest.mark.parametrize(
+    "kind, threshold, expected_counts",
+    [
+        ("time", "1m", [60, 60, 30]),
+        ("tick", 50, [50, 50, 50]),
+        ("volume", 30, [20, 20, 20, 20, 20, 20, 20, 10]),
+    ],
+)
+def test_bar_sizes(kind, threshold, expected_counts):
+    """
+    Bars close on the interval, trade count or quantity threshold, the last one may be below it
+    """
+    builder = BarBuilder("trades", kind, threshold)
+    bars = numpy.concatenate([builder.update(trades(150)), builder.flush()])
+    assert bars["count"].tolist() == expected_counts
+
+
+def test_bar_aggregation():
+    """
+    Prices, volumes and taker buy volumes of the trades of a bar are aggregated
+    """
+    bars = BarBuilder("trades", "time", "1m").update(trades(150))
+    first = bars[0]
+    assert (first["open_time"], first["close_time"]) == (START, START + 60000 - 1)
+    assert (first["open"], first["high"], first["low"], first["close"]) == (
+        100,
+        159,
+        100,
+        159,
+    )
+    assert first["volume"] == 90
+    # Trades with an even id are taker buys, with quantity 1
+    assert first["taker_buy_volume"] == 30
+    assert first["quote_volume"] == sum(
+        (100 + trade_id) * (1 + trade_id % 2) for trade_id in range(60)
+    )
+
+
+def test_chunks_give_the_same_bars():
+    """
+    Bars do not depend on how the trades are split into chunks, microseconds are read as milliseconds
+    """
+    whole = BarBuilder("trades", "dollar", 5000)
+    expected = numpy.concatenate([whole.update(trades(300)), whole.flush()])
+    chunked = BarBuilder("trades", "dollar", 5000)
+    rows = trades(300, factor=1000)
+    bars = [chunked.update(rows[start : start + 7]) for start in range(0, 300, 7)]
+    bars.append(chunked.flush())
+    assert numpy.array_equal(numpy.concatenate(bars), expected)
+
+
+def test_agg_trades_count_trades():
+    """
+    An aggTrades row counts the trades it aggregates
+    """
+    rows = parse_csv(
+        f"1,100,1,10,12,{START},true\n2,101,2,13,13,{START + 1},false\n".encode(),
+        "aggTrades",
+    )
+    builder = BarBuilder("aggTrades", "tick", 10)
+    assert len(builder.update(rows)) == 0
+    assert builder.flush()["count"].tolist() == [4]
+
+
+def test_build_bars_from_file(tmpdir):
+    """
+    Files are read chunk by chunk
+    """
+    path = tmpdir.join("trades.csv")
+    path.write(make_trades(150))
+    bars = build_bars(str(path), "trades", "tick", 50, chunk_bytes=100)
+    assert bars["count"].tolist() == [50, 50, 50]
+
+
+def test_post_download_stage(tmpdir):
+    """
+    The bars of each downloaded file are written as it completes
+    """
+    prefix = "data/futures/um/daily/trades/BTCUSDT"
+    files = {
+        f"{prefix}/BTCUSDT-trades-2024-01-0{day}.zip": make_zip(
+            f"BTCUSDT-trades-2024-01-0{day}.csv", make_trades(120)
+        )
+        for day in (1, 2)
+    }
+    stage = BarStage(str(tmpdir.join("bars")), "time", "1m")
+    with StandInServer(files) as server:
+        downloader = server.use(
+            BinanceBulkDownloader(
+                destination_dir=str(tmpdir.join("data")),
+                data_type="trades",
+                symbols="BTCUSDT",
+                post_download=stage,
+            )
+        )
+        downloader.run_download()
+
+    for key in files:
+        lines = open(stage.get_path(key)).read().splitlines()
+        assert lines[0].startswith("open_time,open,high,low,close,volume")
+        assert len(lines) == 3
+    assert downloader.failed_list == []
+
+
+@pytest.mark.parametrize(
+    "extract_workers, use_manifest", [(None, False), (1, False), (None, True)]
+)
+def test_post_download_errors_are_retried(tmpdir, extract_workers, use_manifest):
+    """
+    post_download runs in a worker thread, an exception fails the file and the next run downloads it again
+    """
+    key = "data/futures/um/daily/trades/BTCUSDT/BTCUSDT-trades-2024-01-01.zip"
+    files = {key: make_zip("BTCUSDT-trades-2024-01-01.csv", make_trades(1))}
+    threads = []
+
+    def stage(result):
+        threads.append(threading.current_thread())
+        if len(threads) == 1:
+            raise ValueError("bad stage")
+
+    def run(server):
+        downloader = server.use(
+            BinanceBulkDownloader(
+                destination_dir=str(tmpdir),
+                data_type="trades",
+                symbols="BTCUSDT",
+                extract_workers=extract_workers,
+                use_manifest=use_manifest,
+                post_download=stage,
+            )
+        )
+        downloader.run_download()
+        return downloader
+
+    with StandInServer(files) as server:
+        failed = run(server)
+        assert failed.failed_list == [(key, "Post-download error: bad stage")]
+        assert failed.downloaded_list == []
+        assert not tmpdir.join(key.replace(".zip", ".csv")).exists()
+
+        retried = run(server)
+        assert retried.failed_list == []
+        assert retried.downloaded_list == [key]
+    assert threading.main_thread() not in threads
+
+
+@pytest.mark.parametrize(
+    "data_type, kind, threshold",
+    [("klines", "tick", 10), ("trades", "range", 10), ("trades", "time", 10)],
+)
+def test_invalid_bars(data_type, kind, threshold):
+    """
+    Only trades and aggTrades have bars, time bars need an interval
+    """
+    with pytest.raises(ValueError):
+        BarBuilder(data_type, kind, threshold)
@@ -0,0 +1,112 @@
+"""
+Test the batch job API
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from binance_bulk_downloader.batch import BatchDownloader
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.exceptions import BinanceBulkDownloaderParamsError
+from tests.stand_in import StandInServer, make_zip
+
+KEYS = [
+    "data/futures/um/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.zip",
+    "data/futures/um/daily/klines/ETHUSDT/1h/ETHUSDT-1h-2024-01-01.zip",
+    "data/futures/um/daily/trades/BTCUSDT/BTCUSDT-trades-2024-01-01.zip",
+    "data/spot/monthly/klines/BTCUSDT/1d/BTCUSDT-1d-2024-01.zip",
+]
+FILES = {
+    key: make_zip(os.path.basename(key).replace(".zip", ".csv"), "0") for key in KEYS
+}
+
+
+def make_jobs(tmpdir, server):
+    jobs = [
+        {"data_frequency": "1h"},
+        {"data_type": "trades"},
+        {"asset": "spot", "timeperiod_per_file": "monthly", "data_frequency": "1d"},
+    ]
+    return [
+        server.use(BinanceBulkDownloader(destination_dir=str(tmpdir), **job))
+        for job in jobs
+    ]
+
+
+def test_batch_downloads_every_job_through_one_session(tmpdir):
+    """
+    Every file of every job is downloaded, without going through requests.get
+    """
+    with StandInServer(FILES) as server, patch(
+        "requests.get", side_effect=AssertionError("session not shared")
+    ):
+        batch = BatchDownloader(make_jobs(tmpdir, server), max_workers=2)
+        batch.run_download()
+
+    for key in KEYS:
+        assert os.path.exists(tmpdir.join(key.replace(".zip", ".csv")))
+    assert [sorted(job.downloaded_list) for job in batch.jobs] == [
+        KEYS[:2],
+        KEYS[2:3],
+        KEYS[3:],
+    ]
+
+
+def test_jobs_are_validated_before_listing(tmpdir):
+    """
+    An invalid job fails the batch before any request is sent
+    """
+    with StandInServer(FILES) as server:
+        jobs = make_jobs(tmpdir, server)
+        jobs.append(BinanceBulkDownloader(data_type="invalid"))
+        with pytest.raises(BinanceBulkDownloaderParamsError, match="job 3"):
+            BatchDownloader(jobs).run_download()
+        assert server.request_log == []
+
+
+def test_jobs_from_dicts():
+    """
+    Job specs may be given as dicts of BinanceBulkDownloader arguments
+    """
+    batch = BatchDownloader([{"data_type": "trades", "asset": "spot"}])
+    assert batch.describe(batch.jobs[0]) == "spot/daily/trades"
+
+
+def test_failed_listing_does_not_stop_other_jobs(tmpdir):
+    """
+    A job whose listing fails records the failure while the other jobs are downloaded
+    """
+    with StandInServer(FILES) as server:
+        jobs = make_jobs(tmpdir, server)
+        jobs[1]._listing_endpoints = ["http://127.0.0.1:9"]
+        batch = BatchDownloader(jobs, max_workers=2)
+        batch.run_download()
+
+    assert [len(job.failed_list) for job in batch.jobs] == [0, 1, 0]
+    assert batch.jobs[1].failed_list[0][0] == "data/futures/um/daily/trades"
+    assert batch.jobs[1].downloaded_list == []
+    assert sorted(batch.jobs[0].downloaded_list + batch.jobs[2].downloaded_list) == (
+        sorted(KEYS[:2] + KEYS[3:])
+    )
+
+
+def test_jobs_share_free_disk_space(tmpdir):
+    """
+    Jobs that fit on disk one by one are refused once together they would not
+    """
+    with StandInServer(FILES) as server:
+        required = [job.plan().required_bytes for job in make_jobs(tmpdir, server)]
+        free_bytes = sum(required) - 1
+        with patch.object(
+            BinanceBulkDownloader, "_get_free_bytes", return_value=free_bytes
+        ):
+            batch = BatchDownloader(
+                make_jobs(tmpdir, server), max_workers=2, listing_workers=1
+            )
+            batch.run_download()
+
+    assert max(required) <= free_bytes
+    assert [bool(job.failed_list) for job in batch.jobs] == [False, False, True]
+    assert "Not enough disk space" in batch.jobs[2].failed_list[0][1]
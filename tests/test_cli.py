@@ -0,0 +1,155 @@
+"""
+Test the command-line entry point
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from binance_bulk_downloader.cli import main, parse_size
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from tests.stand_in import StandInServer, make_zip
+
+KEYS = [
+    "data/futures/um/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.zip",
+    "data/futures/um/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-02.zip",
+    "data/futures/um/daily/trades/BTCUSDT/BTCUSDT-trades-2024-01-01.zip",
+    "data/futures/um/daily/trades/BTCUSDT/BTCUSDT-trades-2024-01-02.zip",
+]
+FILES = {
+    key: make_zip(os.path.basename(key).replace(".zip", ".csv"), "0") for key in KEYS
+}
+
+
+@pytest.fixture
+def server():
+    with StandInServer(FILES) as stand_in, patch.object(
+        BinanceBulkDownloader, "_BINANCE_DATA_S3_BUCKET_URL", stand_in.url
+    ), patch.object(
+        BinanceBulkDownloader, "_BINANCE_DATA_DOWNLOAD_BASE_URL", stand_in.url
+    ):
+        yield stand_in
+
+
+def test_job_file(server, tmpdir):
+    """
+    Jobs of a JSON file are downloaded with the flags as defaults
+    """
+    job_file = tmpdir.join("jobs.json")
+    job_file.write(
+        json.dumps(
+            {
+                "settings": {"max_workers": 2},
+                "jobs": [{"data_frequency": "1h"}, {"data_type": "trades"}],
+            }
+        )
+    )
+    summary_path = tmpdir.join("summary.json")
+    exit_code = main(
+        [
+            "--job-file",
+            str(job_file),
+            "--destination-dir",
+            str(tmpdir),
+            "--end-date",
+            "2024-01-01",
+            "--summary",
+            str(summary_path),
+        ]
+    )
+
+    assert exit_code == 0
+    summary = json.loads(summary_path.read())
+    assert summary["ok"] and summary["downloaded"] == 2 and summary["failed"] == 0
+    for key in KEYS:
+        downloaded = os.path.exists(tmpdir.join(key.replace(".zip", ".csv")))
+        assert downloaded == key.endswith("01.zip")
+
+
+def test_failed_files_exit_non_zero(server, tmpdir, capsys):
+    """
+    A file that cannot be extracted fails the run and is listed in the summary
+    """
+    server.files[KEYS[2]] = b"not a zip"
+    exit_code = main(
+        ["--data-type", "trades", "--destination-dir", str(tmpdir), "--format", "gzip"]
+    )
+
+    assert exit_code == 1
+    summary = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert not summary["ok"]
+    assert summary["jobs"][0]["downloaded"] == 1
+    assert [failed["key"] for failed in summary["jobs"][0]["failed"]] == [KEYS[2]]
+    assert os.path.exists(tmpdir.join(KEYS[3].replace(".zip", ".csv.gz")))
+
+
+def test_unreachable_listing_writes_summary(tmpdir, capsys):
+    """
+    A listing that cannot reach any endpoint fails the job and still writes the summary
+    """
+    exit_code = main(
+        [
+            "--data-type",
+            "trades",
+            "--symbols",
+            "BTCUSDT",
+            "--destination-dir",
+            str(tmpdir),
+            "--listing-endpoints",
+            "http://127.0.0.1:9",
+        ]
+    )
+
+    assert exit_code == 1
+    summary = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert not summary["ok"]
+    assert summary["failed"] == 1
+    assert "Listing error" in summary["jobs"][0]["failed"][0]["error"]
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--data-type", "invalid"],
+        ["--start-date", "2024-13-01"],
+        ["--start-date", "20240101"],
+        ["--job-file", "x"],
+    ],
+)
+def test_invalid_params(argv, tmpdir):
+    """
+    Invalid parameters exit with 2 before any request
+    """
+    with tmpdir.as_cwd():
+        assert main(argv) == 2
+
+
+def test_parse_size():
+    assert parse_size("20M") == 20 * 1024**2
+    assert parse_size("512k") == 512 * 1024
+    assert parse_size("1000") == 1000
+
+
+def test_yaml_job_file(tmpdir):
+    """
+    YAML job files hold settings, defaults and jobs
+    """
+    pytest.importorskip("yaml")
+    from binance_bulk_downloader.cli import load_job_file
+
+    job_file = tmpdir.join("jobs.yaml")
+    job_file.write(
+        "settings:\n  max_workers: 4\n"
+        "defaults:\n  asset: spot\n"
+        "jobs:\n  - data_type: trades\n  - data_type: klines\n    data_frequency: [1m, 1h]\n"
+    )
+    assert load_job_file(str(job_file)) == {
+        "settings": {"max_workers": 4},
+        "defaults": {"asset": "spot"},
+        "jobs": [
+            {"data_type": "trades"},
+            {"data_type": "klines", "data_frequency": ["1m", "1h"]},
+        ],
+    }
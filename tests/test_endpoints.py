@@ -0,0 +1,86 @@
+"""
+Test endpoint probing, health tracking and failover against several stand-ins
+"""
+
+import os
+from functools import partial
+
+from binance_bulk_downloader.endpoints import EndpointPool
+from tests.stand_in import StandInServer, make_zip, make_downloader
+
+PREFIX = "data/futures/um/daily/trades/BTCUSDT"
+FILES = {
+    f"{PREFIX}/BTCUSDT-trades-2024-01-0{day}.zip": make_zip(
+        f"BTCUSDT-trades-2024-01-0{day}.csv", "0"
+    )
+    for day in range(1, 7)
+}
+
+
+make_downloader = partial(
+    make_downloader,
+    None,
+    data_type="trades",
+    symbols="BTCUSDT",
+    max_workers=1,
+)
+
+
+def downloads(server):
+    return [path for path in server.request_log if path.startswith("/data")]
+
+
+def test_fastest_endpoint_is_used(tmpdir):
+    """
+    The probe puts the fastest stand-in first, for listing and downloading
+    """
+    with StandInServer(FILES, latency=0.2) as slow, StandInServer(FILES) as fast:
+        urls = [slow.url, fast.url]
+        make_downloader(
+            tmpdir, listing_endpoints=urls, download_endpoints=urls
+        ).run_download()
+        slow_requests = list(slow.request_log)
+
+    # The slow stand-in only answered the two probes
+    assert len(slow_requests) == 2
+    assert len(downloads(fast)) == len(FILES) + 1
+    for key in FILES:
+        assert os.path.exists(tmpdir.join(key.replace(".zip", ".csv")))
+
+
+def test_failing_endpoint_is_put_aside(tmpdir):
+    """
+    Once the first endpoint keeps failing, requests go to the next one
+    """
+    with StandInServer(FILES) as failing, StandInServer(FILES) as healthy:
+        urls = [failing.url, healthy.url]
+        downloader = make_downloader(
+            tmpdir, listing_endpoints=urls, download_endpoints=urls
+        )
+        downloader._probe_endpoints = False
+        failing.fail_with = 503
+        downloader.run_download()
+        failing_requests = list(failing.request_log)
+
+    # Listing and download endpoints are tracked apart: one failed listing request,
+    # then max_failures download attempts before it is put aside
+    assert len(failing_requests) == 1 + 3
+    assert sorted(downloads(healthy)) == sorted(f"/{key}" for key in FILES)
+    assert downloader.failed_list == []
+
+
+def test_endpoint_pool_cooldown():
+    """
+    An endpoint is put aside after max_failures in a row and comes back after the cooldown
+    """
+    pool = EndpointPool(
+        ["http://a/", "http://b", "http://a"], max_failures=2, cooldown=0
+    )
+    assert pool.urls == ["http://a", "http://b"]
+    pool.cooldown = 60
+    pool.record_failure("http://a")
+    assert pool.candidates() == ["http://a", "http://b"]
+    pool.record_failure("http://a")
+    assert pool.candidates() == ["http://b", "http://a"]
+    pool.record_success("http://a")
+    assert pool.candidates() == ["http://a", "http://b"]
@@ -133,3 +133,19 @@ class TestBinanceBulkDownloaderErrors:
         with m:
             with pytest.raises(BinanceBulkDownloaderDownloadError):
                 downloader._download("test/prefix/file.zip")
+
+    @patch("requests.get")
+    def test_stream_error_removes_part_file(self, mock_get, tmpdir):
+        """Test case for a connection broken while the archive is streamed"""
+
+        def iter_content(chunk_size):
+            yield b"partial content"
+            raise requests.exceptions.ChunkedEncodingError("Connection broken")
+
+        mock_response = MagicMock()
+        mock_response.iter_content.side_effect = iter_content
+        mock_get.return_value = mock_response
+        downloader = BinanceBulkDownloader(destination_dir=str(tmpdir))
+        with pytest.raises(BinanceBulkDownloaderDownloadError, match="Download error"):
+            downloader._download("test/prefix/file.zip")
+        assert tmpdir.join("test", "prefix").listdir() == []
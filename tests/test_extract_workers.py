@@ -0,0 +1,58 @@
+"""
+Test extracting archives in worker processes
+"""
+
+import os
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.file_key import FileKey
+from binance_bulk_downloader.exceptions import BinanceBulkDownloaderParamsError
+from tests.stand_in import make_zip
+
+
+@pytest.mark.parametrize("extract_workers", [None, 2])
+def test_run_download_extracts_archives(tmpdir, extract_workers):
+    """
+    Every listed archive ends up as a csv, with and without worker processes
+    """
+    file_list = [
+        f"data/futures/um/daily/klines/BTCUSDT/1m/BTCUSDT-1m-2024-01-0{day}.zip"
+        for day in range(1, 6)
+    ]
+
+    def mock_get(url, *args, **kwargs):
+        name = os.path.basename(url).replace(".zip", ".csv")
+        response = MagicMock()
+        response.iter_content.return_value = [make_zip(name, f"{name}\n")]
+        return response
+
+    downloader = BinanceBulkDownloader(
+        destination_dir=str(tmpdir),
+        symbols="BTCUSDT",
+        extract_workers=extract_workers,
+        extract_queue_size=1,
+    )
+    with patch.object(
+        BinanceBulkDownloader,
+        "_get_file_list_from_s3_bucket",
+        return_value=[FileKey.parse(key) for key in file_list],
+    ), patch("requests.get", side_effect=mock_get):
+        downloader.run_download()
+
+    for prefix in file_list:
+        csv_path = tmpdir.join(prefix.replace(".zip", ".csv"))
+        assert os.path.exists(csv_path)
+        assert not os.path.exists(tmpdir.join(prefix))
+    assert downloader._extract_executor is None
+
+
+def test_invalid_extract_workers():
+    """
+    extract_workers must be positive
+    """
+    downloader = BinanceBulkDownloader(extract_workers=0)
+    with pytest.raises(BinanceBulkDownloaderParamsError):
+        downloader._check_params()
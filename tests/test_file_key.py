@@ -0,0 +1,161 @@
+"""
+Test parsing keys into FileKey
+"""
+
+import hashlib
+import tracemalloc
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.file_key import FileKey
+
+
+@pytest.mark.parametrize(
+    "key, expected",
+    [
+        (
+            "data/futures/um/daily/klines/BTCUSDT/1m/BTCUSDT-1m-2024-01-01.zip",
+            ("futures/um", "daily", "klines", "BTCUSDT", "1m", "2024-01-01"),
+        ),
+        (
+            "data/spot/monthly/klines/BTCUSDT/1mo/BTCUSDT-1mo-2024-01.zip",
+            ("spot", "monthly", "klines", "BTCUSDT", "1mo", "2024-01"),
+        ),
+        (
+            "data/futures/cm/daily/trades/BTCUSD_PERP/BTCUSD_PERP-trades-2024-01-01.zip",
+            ("futures/cm", "daily", "trades", "BTCUSD_PERP", None, "2024-01-01"),
+        ),
+        (
+            "data/option/daily/BVOLIndex/BTCBVOLUSDT/BTCBVOLUSDT-BVOLIndex-2023-10-01.zip",
+            ("option", "daily", "BVOLIndex", "BTCBVOLUSDT", None, "2023-10-01"),
+        ),
+    ],
+)
+def test_parse_round_trip(key, expected):
+    """
+    Keys are parsed into fields and rebuilt without keeping the original string
+    """
+    file_key = FileKey.parse(key, size=10)
+    assert (
+        file_key.asset_type,
+        file_key.period,
+        file_key.data_type,
+        file_key.symbol,
+        file_key.interval,
+        file_key.date,
+    ) == expected
+    assert file_key._raw_key is None
+    assert file_key.key == key
+    assert file_key.size == 10
+
+
+def test_parse_unknown_layout_keeps_raw_key():
+    """
+    Keys that cannot be rebuilt from fields keep the original string
+    """
+    key = "data/futures/um/daily/bookDepth/BTCUSDT/BTCUSDT-bookDepth-latest.zip"
+    file_key = FileKey.parse(key)
+    assert file_key.symbol == "BTCUSDT"
+    assert file_key.date is None
+    assert file_key.key == key
+    assert FileKey.parse("test/prefix/file.zip").key == "test/prefix/file.zip"
+
+
+@pytest.mark.parametrize(
+    "etag, last_modified",
+    [
+        ('"0f343b0931126a20f133d67c2b018a3b"', "2024-01-02T08:00:00.123Z"),
+        ('"0f343b0931126a20f133d67c2b018a3b-12"', "2024-01-02 08:00:00"),
+        ("etag-1", None),
+        (None, None),
+    ],
+)
+def test_listed_info_round_trip(etag, last_modified):
+    """
+    ETags and LastModified times are returned as listed, whether they are stored as ints or not
+    """
+    key = "data/spot/daily/klines/BTCUSDT/1m/BTCUSDT-1m-2024-01-01.zip"
+    file_key = FileKey.parse(key, 100, etag, last_modified)
+    assert file_key.listed_info == (100, etag, last_modified)
+
+
+def test_listed_info_memory():
+    """
+    A key with its listed info takes about 225 bytes, 300 with the ETag and LastModified kept as strings
+    """
+    count = 20000
+    keys = [
+        f"data/spot/daily/klines/BTCUSDT/1m/BTCUSDT-1m-2024-01-{index % 28 + 1:02d}.zip"
+        for index in range(count)
+    ]
+    # Listed values are bytes until parsed, like the XML of a listing
+    etags = [
+        f'"{hashlib.md5(str(index).encode()).hexdigest()}"'.encode()
+        for index in range(count)
+    ]
+    last_modified = [
+        f"2024-01-02T08:{index % 60:02d}:00.000Z".encode() for index in range(count)
+    ]
+    file_keys = [None] * count
+    tracemalloc.start()
+    try:
+        for index in range(count):
+            file_keys[index] = FileKey.parse(
+                keys[index],
+                10**6 + index,
+                etags[index].decode(),
+                last_modified[index].decode(),
+            )
+        used = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert used / count < 250
+
+
+def test_listing_filters_by_exact_symbol():
+    """
+    BTCUSDT does not match BTCUSDT_240628 and non-zip keys are dropped
+    """
+    keys = [
+        "data/futures/um/daily/bookDepth/BTCUSDT/BTCUSDT-bookDepth-2024-01-01.zip",
+        "data/futures/um/daily/bookDepth/BTCUSDT/BTCUSDT-bookDepth-2024-01-01.zip.CHECKSUM",
+        "data/futures/um/daily/bookDepth/BTCUSDT_240628/BTCUSDT_240628-bookDepth-2024-01-01.zip",
+    ]
+    listing = (
+        '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+        "<IsTruncated>false</IsTruncated>"
+        + "".join(
+            f"<Contents><Key>{key}</Key><Size>1</Size></Contents>" for key in keys
+        )
+        + "</ListBucketResult>"
+    )
+    response = MagicMock()
+    response.content = listing.encode()
+    downloader = BinanceBulkDownloader(data_type="bookDepth", symbols="BTCUSDT")
+    with patch("requests.get", return_value=response):
+        file_list = downloader._get_file_list_from_s3_bucket(downloader._build_prefix())
+    assert [file_key.key for file_key in file_list] == [keys[0]]
+
+
+def test_frequency_filter_uses_interval():
+    """
+    1m does not match 1mo keys
+    """
+    keys = [
+        "data/spot/monthly/klines/BTCUSDT/1m/BTCUSDT-1m-2024-01.zip",
+        "data/spot/monthly/klines/BTCUSDT/1mo/BTCUSDT-1mo-2024-01.zip",
+    ]
+    downloader = BinanceBulkDownloader(asset="spot", timeperiod_per_file="monthly")
+    with patch.object(
+        BinanceBulkDownloader,
+        "_get_file_list_from_s3_bucket",
+        return_value=[FileKey.parse(key) for key in keys],
+    ), patch.object(
+        BinanceBulkDownloader, "_scan_local_files", return_value=set()
+    ), patch.object(
+        BinanceBulkDownloader, "_download", return_value=None
+    ) as mock_download:
+        downloader.run_download()
+    assert [call.args[0].key for call in mock_download.call_args_list] == [keys[0]]
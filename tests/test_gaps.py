@@ -0,0 +1,78 @@
+"""
+Test finding dates missing from the local dataset
+"""
+
+from functools import partial
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from tests.stand_in import StandInServer, make_zip, make_downloader
+
+PREFIX = "data/futures/um/daily/klines"
+
+
+def key(symbol, day):
+    return f"{PREFIX}/{symbol}/1h/{symbol}-1h-2024-01-{day:02d}.zip"
+
+
+FILES = {
+    key(symbol, day): make_zip(f"{symbol}-1h-2024-01-{day:02d}.csv", "0")
+    for symbol in ["BTCUSDT", "ETHUSDT"]
+    for day in range(1, 7)
+    if (symbol, day) != ("BTCUSDT", 4)
+}
+
+
+make_downloader = partial(
+    make_downloader, data_frequency="1h", symbols=["BTCUSDT", "ETHUSDT"]
+)
+
+
+def write_local(tmpdir, keys):
+    for local_key in keys:
+        tmpdir.join(local_key.replace(".zip", ".csv")).write("0", ensure=True)
+
+
+def test_missing_and_unpublished_dates(tmpdir):
+    """
+    Listed dates absent on disk are missing, dates absent from the listing are unpublished
+    """
+    write_local(tmpdir, [key("BTCUSDT", day) for day in (1, 2, 6)])
+    write_local(tmpdir, [key("ETHUSDT", day) for day in range(1, 7)])
+    with StandInServer(FILES) as server:
+        gaps = make_downloader(server, tmpdir).find_gaps()
+        downloads = [path for path in server.request_log if path.startswith("/data")]
+
+    assert downloads == []
+    assert len(gaps) == 1
+    gap = gaps[0]
+    assert (gap.symbol, gap.interval) == ("BTCUSDT", "1h")
+    assert (gap.first_date, gap.last_date) == ("2024-01-01", "2024-01-06")
+    assert gap.local_count == 3
+    assert gap.missing_keys == [key("BTCUSDT", 3), key("BTCUSDT", 5)]
+    assert gap.missing_dates == ["2024-01-03", "2024-01-05"]
+    assert gap.unpublished_dates == ["2024-01-04"]
+
+
+def test_download_missing_files(tmpdir):
+    """
+    Only the missing files are downloaded, leaving the unpublished dates
+    """
+    write_local(tmpdir, [key("BTCUSDT", day) for day in (1, 2, 6)])
+    with StandInServer(FILES) as server:
+        downloader = make_downloader(server, tmpdir)
+        downloader.find_gaps(download=True)
+        downloads = sorted(
+            path for path in server.request_log if path.startswith("/data")
+        )
+        gaps = make_downloader(server, tmpdir).find_gaps()
+
+    expected = [key("BTCUSDT", 3), key("BTCUSDT", 5)]
+    expected += [key("ETHUSDT", day) for day in range(1, 7)]
+    assert downloads == sorted(f"/{missing}" for missing in expected)
+    assert sorted(downloader.downloaded_list) == sorted(expected)
+    assert [(gap.symbol, gap.missing_keys, gap.unpublished_dates) for gap in gaps] == [
+        ("BTCUSDT", [], ["2024-01-04"])
+    ]
@@ -0,0 +1,106 @@
+"""
+Test the hive-partitioned view of downloaded files
+"""
+
+import csv
+import os
+
+import pytest
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.file_key import FileKey
+from binance_bulk_downloader.hive import hive_path, write_catalog
+from tests.stand_in import StandInServer, make_zip
+
+PREFIX = "data/futures/um/daily/klines"
+
+
+def key(symbol, day):
+    return f"{PREFIX}/{symbol}/1m/{symbol}-1m-2024-01-0{day}.zip"
+
+
+FILES = {
+    key(symbol, day): make_zip(f"{symbol}-1m-2024-01-0{day}.csv", f"{symbol},{day}")
+    for symbol in ["BTCUSDT", "ETHUSDT"]
+    for day in (1, 2)
+}
+
+
+def read_catalog(hive_dir):
+    with open(os.path.join(hive_dir, "_catalog.csv"), newline="") as file:
+        return list(csv.DictReader(file))
+
+
+def test_hive_path():
+    """
+    Partitions are asset, data type, interval when there is one, symbol and date
+    """
+    assert hive_path(FileKey.parse(key("BTCUSDT", 1)), "x/BTCUSDT-1m.csv.gz") == (
+        os.path.join(
+            "asset=um",
+            "data_type=klines",
+            "interval=1m",
+            "symbol=BTCUSDT",
+            "date=2024-01-01",
+            "part.csv.gz",
+        )
+    )
+    trades = FileKey.parse(
+        "data/spot/monthly/trades/BTCUSDT/BTCUSDT-trades-2024-01.zip"
+    )
+    assert hive_path(trades, "BTCUSDT-trades-2024-01.csv") == os.path.join(
+        "asset=spot", "data_type=trades", "symbol=BTCUSDT", "date=2024-01", "part.csv"
+    )
+
+
+def test_files_are_linked_as_they_complete(tmpdir):
+    """
+    Downloaded files appear in the hive layout without a second copy, and the catalog lists them
+    """
+    hive_dir = str(tmpdir.join("hive"))
+    with StandInServer(FILES) as server:
+        downloader = server.use(
+            BinanceBulkDownloader(
+                destination_dir=str(tmpdir.join("data")),
+                symbols=["BTCUSDT", "ETHUSDT"],
+                hive_dir=hive_dir,
+            )
+        )
+        for result in downloader.iter_download():
+            linked = os.path.join(
+                hive_dir,
+                hive_path(FileKey.parse(result.key), result.local_path),
+            )
+            assert os.path.samefile(linked, result.local_path)
+
+    catalog = read_catalog(hive_dir)
+    assert [(row["symbol"], row["date"]) for row in catalog] == [
+        ("BTCUSDT", "2024-01-01"),
+        ("BTCUSDT", "2024-01-02"),
+        ("ETHUSDT", "2024-01-01"),
+        ("ETHUSDT", "2024-01-02"),
+    ]
+    assert catalog[0]["path"] == (
+        "asset=um/data_type=klines/interval=1m/symbol=BTCUSDT/date=2024-01-01/part.csv"
+    )
+    assert catalog[0]["size"] == str(len("BTCUSDT,1"))
+
+
+@pytest.mark.parametrize("symbols", ["BTCUSDT", "btcusdt"])
+def test_build_layout_from_local_files(tmpdir, symbols):
+    """
+    Files already on disk are added without any request, and the catalog can be regenerated
+    """
+    data_dir = tmpdir.join("data")
+    for local_key in (key("BTCUSDT", 1), key("ETHUSDT", 2)):
+        data_dir.join(local_key.replace(".zip", ".csv")).write("0", ensure=True)
+    hive_dir = str(tmpdir.join("hive"))
+    downloader = BinanceBulkDownloader(
+        destination_dir=str(data_dir), symbols=symbols, hive_dir=hive_dir
+    )
+    downloader.build_hive_layout()
+    assert [row["symbol"] for row in read_catalog(hive_dir)] == ["BTCUSDT"]
+
+    os.remove(os.path.join(hive_dir, "_catalog.csv"))
+    write_catalog(hive_dir)
+    assert len(read_catalog(hive_dir)) == 1
@@ -0,0 +1,105 @@
+"""
+Test the budget of bytes in flight
+"""
+
+import threading
+from functools import partial
+
+import pytest
+
+from binance_bulk_downloader.batch import BatchDownloader
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.exceptions import BinanceBulkDownloaderParamsError
+from tests.stand_in import StandInServer, make_archive, make_downloader
+
+PREFIX = "data/futures/um/monthly/trades/BTCUSDT"
+KEYS = [f"{PREFIX}/BTCUSDT-trades-2024-{month:02d}.zip" for month in range(1, 9)]
+FILES = {key: make_archive(key, 10_000) for key in KEYS}
+SIZE = len(FILES[KEYS[0]])
+
+
+class InFlightRecorder:
+    """
+    Wrap _download_file of downloaders to record the peak of listed bytes downloading at once
+    """
+
+    def __init__(self, *downloaders):
+        self._lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+        for downloader in downloaders:
+            downloader._download_file = self._wrap(downloader._download_file)
+
+    def _wrap(self, download_file):
+        def wrapper(file_key):
+            with self._lock:
+                self.current += file_key.size
+                self.peak = max(self.peak, self.current)
+            try:
+                return download_file(file_key)
+            finally:
+                with self._lock:
+                    self.current -= file_key.size
+
+        return wrapper
+
+
+make_downloader = partial(
+    make_downloader,
+    data_type="trades",
+    timeperiod_per_file="monthly",
+    symbols="BTCUSDT",
+    max_workers=8,
+)
+
+
+@pytest.mark.parametrize("budget, peak", [(None, 8 * SIZE), (3 * SIZE, 3 * SIZE)])
+def test_downloads_stay_within_budget(tmpdir, budget, peak):
+    """
+    New downloads wait while the budget is used up
+    """
+    with StandInServer(FILES, latency=0.05) as server:
+        downloader = make_downloader(server, tmpdir, max_in_flight_bytes=budget)
+        recorder = InFlightRecorder(downloader)
+        downloader.run_download()
+
+    assert sorted(downloader.downloaded_list) == sorted(KEYS)
+    assert recorder.peak == peak
+
+
+def test_file_larger_than_budget_downloads_alone(tmpdir):
+    """
+    A file larger than the budget is still downloaded, one at a time
+    """
+    with StandInServer(FILES, latency=0.02) as server:
+        downloader = make_downloader(server, tmpdir, max_in_flight_bytes=SIZE // 2)
+        recorder = InFlightRecorder(downloader)
+        downloader.run_download()
+
+    assert len(downloader.downloaded_list) == len(KEYS)
+    assert recorder.peak == SIZE
+
+
+def test_batch_shares_budget(tmpdir):
+    """
+    Jobs of a batch share one budget
+    """
+    with StandInServer(FILES, latency=0.05) as server:
+        jobs = [make_downloader(server, tmpdir.join(str(index))) for index in range(2)]
+        recorder = InFlightRecorder(*jobs)
+        batch = BatchDownloader(jobs, max_workers=8, max_in_flight_bytes=2 * SIZE)
+        batch.run_download()
+
+    assert all(len(job.downloaded_list) == len(KEYS) for job in jobs)
+    assert recorder.peak == 2 * SIZE
+
+
+def test_invalid_budget(tmpdir):
+    """
+    The budget must be positive
+    """
+    downloader = BinanceBulkDownloader(
+        destination_dir=str(tmpdir), max_in_flight_bytes=0
+    )
+    with pytest.raises(BinanceBulkDownloaderParamsError):
+        downloader._check_params()
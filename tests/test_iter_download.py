@@ -0,0 +1,77 @@
+"""
+Test yielding results as files complete
+"""
+
+import os
+from functools import partial
+
+from binance_bulk_downloader.downloader import DownloadResult
+from tests.stand_in import StandInServer, make_zip, make_downloader
+
+PREFIX = "data/futures/um/daily/trades/BTCUSDT"
+FILES = {
+    f"{PREFIX}/BTCUSDT-trades-2024-01-{day:02d}.zip": make_zip(
+        f"BTCUSDT-trades-2024-01-{day:02d}.csv", "0,1,2"
+    )
+    for day in range(1, 7)
+}
+
+
+make_downloader = partial(make_downloader, data_type="trades", symbols="BTCUSDT")
+
+
+def test_results_are_yielded_once_on_disk(tmpdir):
+    """
+    Each result points at a complete local file when it is yielded, failures are reported, not raised
+    """
+    files = dict(FILES)
+    broken_key = f"{PREFIX}/BTCUSDT-trades-2024-01-06.zip"
+    files[broken_key] = b"not a zip"
+    with StandInServer(files) as server:
+        downloader = make_downloader(server, tmpdir, max_workers=2)
+        results = {}
+        for result in downloader.iter_download():
+            if result.ok:
+                with open(result.local_path) as file:
+                    assert file.read() == "0,1,2"
+            results[result.key] = result
+
+    assert set(results) == set(files)
+    broken = results.pop(broken_key)
+    assert broken.status == DownloadResult.STATUS_FAILED
+    assert broken.local_path is None
+    assert "Bad Zip File" in broken.error
+    for key, result in results.items():
+        assert result.status == DownloadResult.STATUS_DOWNLOADED
+        assert result.size == len(files[key])
+        assert result.duration > 0
+    assert sorted(downloader.downloaded_list) == sorted(results)
+    assert [key for key, _ in downloader.failed_list] == [broken_key]
+
+
+def test_extracted_files_are_yielded_after_extraction(tmpdir):
+    """
+    With extract workers, a result is yielded only once its archive is extracted
+    """
+    with StandInServer(FILES) as server:
+        downloader = make_downloader(server, tmpdir, extract_workers=2)
+        for result in downloader.iter_download():
+            assert result.status == DownloadResult.STATUS_DOWNLOADED
+            assert os.path.exists(result.local_path)
+            assert not os.path.exists(os.path.join(str(tmpdir), result.key))
+
+
+def test_stopping_early_cancels_queued_downloads(tmpdir):
+    """
+    Breaking out of the loop does not download the rest of the queue
+    """
+    with StandInServer(FILES, latency=0.05) as server:
+        downloader = make_downloader(server, tmpdir, max_workers=1)
+        results = downloader.iter_download()
+        first = next(results)
+        results.close()
+        downloads = [path for path in server.request_log if path.startswith("/data")]
+
+    assert first.status == DownloadResult.STATUS_DOWNLOADED
+    assert len(downloads) <= 2
+    assert downloader._extract_executor is None
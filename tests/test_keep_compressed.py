@@ -0,0 +1,85 @@
+"""
+Test keeping downloaded files compressed at rest
+"""
+
+import os
+from functools import partial
+
+import pytest
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.exceptions import BinanceBulkDownloaderParamsError
+from binance_bulk_downloader.manifest import DownloadManifest
+from binance_bulk_downloader.reader import find_local_file, open_data_file
+from tests.stand_in import StandInServer, make_zip, make_downloader
+
+PREFIX = "data/futures/um/daily/klines/BTCUSDT/1h"
+CONTENT = "open_time,open\n1704067200000,42000.1\n"
+FILES = {
+    f"{PREFIX}/BTCUSDT-1h-2024-01-0{day}.zip": make_zip(
+        f"BTCUSDT-1h-2024-01-0{day}.csv", CONTENT
+    )
+    for day in range(1, 3)
+}
+
+
+make_downloader = partial(
+    make_downloader,
+    data_type="klines",
+    data_frequency="1h",
+    symbols="BTCUSDT",
+    max_workers=1,
+)
+
+
+@pytest.mark.parametrize(
+    "keep_compressed, suffix",
+    [("zip", ".zip"), ("gzip", ".csv.gz"), ("zstd", ".csv.zst")],
+)
+def test_files_are_kept_compressed(tmpdir, keep_compressed, suffix):
+    """
+    No csv is written, the compressed file reads back as the original csv and is skipped next time
+    """
+    with StandInServer(FILES) as server:
+        make_downloader(
+            server, tmpdir, keep_compressed=keep_compressed, use_manifest=True
+        ).run_download()
+        for key in FILES:
+            path = find_local_file(str(tmpdir), key)
+            assert path == os.path.join(str(tmpdir), key[: -len(".zip")] + suffix)
+            assert not os.path.exists(tmpdir.join(key.replace(".zip", ".csv")))
+            with open_data_file(path, "rt") as file:
+                assert file.read() == CONTENT
+            with open_data_file(path) as file:
+                assert file.read() == CONTENT.encode()
+
+        with DownloadManifest(str(tmpdir)) as manifest:
+            assert {row["local_path"] for row in manifest.rows()} == {
+                key[: -len(".zip")] + suffix for key in FILES
+            }
+
+        request_count = len(server.request_log)
+        make_downloader(server, tmpdir, keep_compressed=keep_compressed).run_download()
+        assert not any(
+            path.startswith("/data") for path in server.request_log[request_count:]
+        )
+
+
+def test_csv_counts_as_downloaded(tmpdir):
+    """
+    A csv extracted by an earlier run is not downloaded again to be recompressed
+    """
+    for key in FILES:
+        tmpdir.join(key.replace(".zip", ".csv")).write(CONTENT, ensure=True)
+    with StandInServer(FILES) as server:
+        make_downloader(server, tmpdir, keep_compressed="gzip").run_download()
+        assert not any(path.startswith("/data") for path in server.request_log)
+
+
+def test_invalid_keep_compressed():
+    """
+    keep_compressed is checked
+    """
+    downloader = BinanceBulkDownloader(keep_compressed="bz2")
+    with pytest.raises(BinanceBulkDownloaderParamsError):
+        downloader._check_params()
@@ -0,0 +1,133 @@
+"""
+Test choosing between per-symbol and parent-prefix listing
+"""
+
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+
+
+def make_bucket(symbols, dates, data_type="trades", period="monthly"):
+    """
+    Make keys of a fake bucket, each zip followed by its CHECKSUM
+    :param symbols: list of symbols
+    :param dates: list of dates
+    :param data_type: data type
+    :param period: time period per file
+    :return: sorted list of keys
+    """
+    keys = []
+    for symbol in symbols:
+        for date in dates:
+            key = f"data/futures/um/{period}/{data_type}/{symbol}/{symbol}-{data_type}-{date}.zip"
+            keys.extend([key, f"{key}.CHECKSUM"])
+    return sorted(keys)
+
+
+class FakeBucket:
+    """
+    Answer S3 ListObjects (v1) requests from a list of keys
+    """
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.requests = []
+
+    def __call__(self, url, params=None, **kwargs):
+        self.requests.append(dict(params))
+        prefix = params["prefix"]
+        marker = params.get("marker") or ""
+        max_keys = params["max-keys"]
+        delimiter = params.get("delimiter")
+        matched = [key for key in self.keys if key.startswith(prefix) and key > marker]
+        body = []
+        if delimiter:
+            common_prefixes = sorted(
+                {
+                    prefix + key[len(prefix) :].split(delimiter)[0] + delimiter
+                    for key in matched
+                }
+            )
+            page = common_prefixes[:max_keys]
+            body += [
+                f"<CommonPrefixes><Prefix>{common_prefix}</Prefix></CommonPrefixes>"
+                for common_prefix in page
+            ]
+            truncated = len(common_prefixes) > max_keys
+        else:
+            page = matched[:max_keys]
+            body += [
+                f"<Contents><Key>{key}</Key><Size>1</Size></Contents>" for key in page
+            ]
+            truncated = len(matched) > max_keys
+        response = MagicMock()
+        response.content = (
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            f"<IsTruncated>{str(truncated).lower()}</IsTruncated>"
+            + "".join(body)
+            + "</ListBucketResult>"
+        ).encode()
+        return response
+
+
+@pytest.fixture(autouse=True)
+def clear_symbol_universe_cache():
+    BinanceBulkDownloader._SYMBOL_UNIVERSE_CACHE.clear()
+    yield
+    BinanceBulkDownloader._SYMBOL_UNIVERSE_CACHE.clear()
+
+
+@pytest.mark.parametrize(
+    "dates, selected_count, expected_parent",
+    [
+        # Few keys per symbol: the whole data type fits in a few pages
+        ([f"2024-{month:02d}" for month in range(1, 13)], 30, True),
+        # Few symbols out of a large universe: listing them one by one is cheaper
+        ([f"2024-{month:02d}" for month in range(1, 13)], 2, False),
+    ],
+)
+def test_auto_strategy_returns_same_keys(dates, selected_count, expected_parent):
+    """
+    auto picks the cheaper strategy and every strategy returns the same keys
+    """
+    universe = [f"SYM{index:03d}USDT" for index in range(200)]
+    selected = universe[:selected_count]
+    bucket = FakeBucket(make_bucket(universe, dates))
+
+    results = {}
+    for strategy in BinanceBulkDownloader._LISTING_STRATEGY:
+        bucket.requests.clear()
+        downloader = BinanceBulkDownloader(
+            data_type="trades",
+            timeperiod_per_file="monthly",
+            symbols=selected,
+            listing_strategy=strategy,
+        )
+        with patch("requests.get", side_effect=bucket):
+            results[strategy] = {file_key.key for file_key in downloader._list_files()}
+        if strategy == "auto":
+            listed_parent = any(
+                params["prefix"] == "data/futures/um/monthly/trades/"
+                and "delimiter" not in params
+                for params in bucket.requests
+            )
+            assert listed_parent is expected_parent
+
+    assert len(results["per_symbol"]) == selected_count * len(dates)
+    assert results["auto"] == results["per_symbol"] == results["parent"]
+
+
+def test_symbol_universe_size_is_cached():
+    """
+    The symbol universe is listed once per data type
+    """
+    bucket = FakeBucket(make_bucket(["BTCUSDT", "ETHUSDT", "XRPUSDT"], ["2024-01"]))
+    downloader = BinanceBulkDownloader(
+        data_type="trades", timeperiod_per_file="monthly"
+    )
+    with patch("requests.get", side_effect=bucket):
+        assert downloader._get_symbol_universe_size() == 3
+        assert downloader._get_symbol_universe_size() == 3
+    assert len(bucket.requests) == 1
@@ -0,0 +1,61 @@
+"""
+Test skipping files that are already downloaded
+"""
+
+import os
+from unittest.mock import patch
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.file_key import FileKey
+
+
+def test_scan_local_files(tmpdir):
+    """
+    The scandir walk indexes every file under the data type directory
+    """
+    tmpdir.join("data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.csv").write(
+        "", ensure=True
+    )
+    tmpdir.join("data/spot/daily/klines/ETHUSDT/1h/ETHUSDT-1h-2024-01-01.csv").write(
+        "", ensure=True
+    )
+    downloader = BinanceBulkDownloader(destination_dir=str(tmpdir), asset="spot")
+    local_files = downloader._scan_local_files("data/spot/daily/klines")
+    assert local_files == {
+        "data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.csv",
+        "data/spot/daily/klines/ETHUSDT/1h/ETHUSDT-1h-2024-01-01.csv",
+    }
+    assert "data/spot/daily/klines/BTCUSDT/1h" in downloader._local_dirs
+    assert downloader._scan_local_files("data/spot/daily/trades") == set()
+
+
+def test_existing_files_are_not_scheduled(tmpdir):
+    """
+    Files whose csv exists never reach _download
+    """
+    file_list = [
+        "data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.zip",
+        "data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-02.zip",
+    ]
+    tmpdir.join(file_list[0].replace(".zip", ".csv")).write("", ensure=True)
+    downloader = BinanceBulkDownloader(
+        destination_dir=str(tmpdir),
+        asset="spot",
+        data_frequency="1h",
+        symbols="BTCUSDT",
+    )
+    with patch.object(
+        BinanceBulkDownloader,
+        "_get_file_list_from_s3_bucket",
+        return_value=[FileKey.parse(key) for key in file_list],
+    ), patch.object(
+        BinanceBulkDownloader, "_download", return_value=None
+    ) as mock_download, patch(
+        "os.path.exists"
+    ) as mock_exists:
+        downloader.run_download()
+
+    assert [call.args[0].key for call in mock_download.call_args_list] == [file_list[1]]
+    mock_exists.assert_not_called()
+    assert downloader.downloaded_list == [file_list[1]]
+    assert os.path.exists(tmpdir.join(file_list[0].replace(".zip", ".csv")))
@@ -0,0 +1,113 @@
+"""
+Test locking and atomic writes shared by concurrent runs
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.lock import KeyLock
+from tests.stand_in import StandInServer, make_archive
+
+PREFIX = "data/futures/um/daily/trades/BTCUSDT"
+FILES = {
+    f"{PREFIX}/BTCUSDT-trades-2024-01-0{day}.zip": make_archive(
+        f"BTCUSDT-trades-2024-01-0{day}.zip", 64 * 1024
+    )
+    for day in range(1, 5)
+}
+
+
+def run(url, destination_dir):
+    downloader = BinanceBulkDownloader(
+        destination_dir=destination_dir,
+        data_type="trades",
+        symbols="BTCUSDT",
+        max_workers=2,
+    )
+    downloader._BINANCE_DATA_S3_BUCKET_URL = url
+    downloader._BINANCE_DATA_DOWNLOAD_BASE_URL = url
+    downloader.run_download()
+
+
+def test_key_lock_excludes_threads(tmpdir):
+    """
+    A second holder waits until the lock is released
+    """
+    path = str(tmpdir.join("file.zip.lock"))
+    events = []
+
+    def wait_for_lock():
+        with KeyLock(path):
+            events.append("acquired")
+
+    with KeyLock(path):
+        waiter = threading.Thread(target=wait_for_lock)
+        waiter.start()
+        time.sleep(0.2)
+        events.append("released")
+    waiter.join(5)
+    assert events == ["released", "acquired"]
+
+
+def test_concurrent_runs_download_each_file_once(tmpdir):
+    """
+    Two processes sharing a destination fetch every file once and leave no temporary files
+    """
+    context = multiprocessing.get_context("fork")
+    with StandInServer(FILES, bytes_per_second=256 * 1024) as server:
+        processes = [
+            context.Process(target=run, args=(server.url, str(tmpdir)))
+            for _ in range(2)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+            assert process.exitcode == 0
+        downloads = [path for path in server.request_log if path.startswith("/data")]
+
+    assert sorted(downloads) == sorted(f"/{key}" for key in FILES)
+    for key in FILES:
+        assert os.path.getsize(tmpdir.join(key.replace(".zip", ".csv"))) == 64 * 1024
+    assert sorted(os.listdir(tmpdir.join(PREFIX))) == sorted(
+        os.path.basename(key).replace(".zip", ".csv") for key in FILES
+    )
+
+
+def test_failed_download_leaves_no_lock_file(tmpdir):
+    """
+    The lock file is removed even when the download fails
+    """
+    files = {key: b"not a zip" for key in FILES}
+    with StandInServer(files) as server:
+        downloader = server.use(
+            BinanceBulkDownloader(
+                destination_dir=str(tmpdir), data_type="trades", symbols="BTCUSDT"
+            )
+        )
+        downloader.run_download()
+
+    assert sorted(key for key, _ in downloader.failed_list) == sorted(FILES)
+    assert os.listdir(tmpdir.join(PREFIX)) == []
+
+
+def test_key_lock_follows_removed_lock_file(tmpdir):
+    """
+    A waiter whose lock file was removed by the previous holder locks the current file instead
+    """
+    path = str(tmpdir.join("file.zip.lock"))
+    first = KeyLock(path)
+    first.acquire()
+    waiter = KeyLock(path)
+    thread = threading.Thread(target=waiter.acquire)
+    thread.start()
+    time.sleep(0.1)
+    first.release()
+    thread.join(5)
+
+    assert os.fstat(waiter._fd).st_ino == os.stat(path).st_ino
+    waiter.release()
+    assert not os.path.exists(path)
@@ -0,0 +1,139 @@
+"""
+Test the SQLite download manifest
+"""
+
+import io
+import os
+import zipfile
+from unittest.mock import patch, MagicMock
+
+import pytest
+import requests
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.file_key import FileKey
+from binance_bulk_downloader.manifest import DownloadManifest
+
+LISTING = b"""<?xml version="1.0" encoding="UTF-8"?>
+<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">
+  <IsTruncated>false</IsTruncated>
+  <Contents>
+    <Key>data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.zip</Key>
+    <LastModified>2024-01-02T08:00:00.000Z</LastModified>
+    <ETag>&quot;etag-1&quot;</ETag>
+    <Size>1024</Size>
+  </Contents>
+  <Contents>
+    <Key>data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.zip.CHECKSUM</Key>
+    <LastModified>2024-01-02T08:00:00.000Z</LastModified>
+    <ETag>&quot;etag-2&quot;</ETag>
+    <Size>64</Size>
+  </Contents>
+  <Contents>
+    <Key>data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-02.zip</Key>
+    <LastModified>2024-01-03T08:00:00.000Z</LastModified>
+    <ETag>&quot;etag-3&quot;</ETag>
+    <Size>2048</Size>
+  </Contents>
+</ListBucketResult>
+"""
+
+
+def test_manifest_batches_and_queries(tmpdir):
+    """
+    Rows are buffered until the batch is full and are queryable by status and prefix
+    """
+    manifest = DownloadManifest(str(tmpdir), batch_size=2)
+    manifest.record("data/a/1.zip", "downloaded", size=1, local_path="data/a/1.csv")
+    assert manifest._pending
+    manifest.record("data/a/2.zip", "failed")
+    assert not manifest._pending
+    manifest.record("data/b/1.zip", "downloaded", local_path="data/b/1.csv")
+    manifest.close()
+
+    with DownloadManifest(str(tmpdir)) as manifest:
+        assert manifest.local_paths("data/a/") == {"data/a/1.csv"}
+        assert [row["key"] for row in manifest.rows(status="failed")] == [
+            "data/a/2.zip"
+        ]
+        assert manifest.get("data/b/1.zip")["status"] == "downloaded"
+        assert manifest.get("data/c/1.zip") is None
+
+
+def test_run_download_records_manifest(tmpdir):
+    """
+    Listed metadata, checksum and status of each file are recorded in the manifest
+    """
+    file_names = ["BTCUSDT-1h-2024-01-01.csv", "BTCUSDT-1h-2024-01-02.csv"]
+
+    def mock_get(url, *args, **kwargs):
+        response = MagicMock()
+        if url == BinanceBulkDownloader._BINANCE_DATA_S3_BUCKET_URL:
+            response.content = LISTING
+            return response
+        name = os.path.basename(url).replace(".zip", ".csv")
+        if name == file_names[1]:
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError()
+            return response
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr(name, "1,2,3\n")
+        response.iter_content.return_value = [buffer.getvalue()]
+        return response
+
+    downloader = BinanceBulkDownloader(
+        destination_dir=str(tmpdir),
+        asset="spot",
+        data_frequency="1h",
+        symbols="BTCUSDT",
+        use_manifest=True,
+    )
+    with patch("requests.get", side_effect=mock_get):
+        downloader.run_download()
+
+    with DownloadManifest(str(tmpdir)) as manifest:
+        downloaded = manifest.get(
+            "data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.zip"
+        )
+        failed = manifest.get(
+            "data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-02.zip"
+        )
+    assert downloaded["status"] == "downloaded"
+    assert downloaded["size"] == 1024
+    assert downloaded["etag"] == "etag-1"
+    assert downloaded["last_modified"] == "2024-01-02T08:00:00.000Z"
+    assert downloaded["local_path"].endswith(file_names[0])
+    assert len(downloaded["checksum"]) == 64
+    assert failed["status"] == "failed"
+    assert failed["local_path"] is None
+
+
+@pytest.mark.parametrize("with_manifest_rows", [True, False])
+def test_manifest_drives_skip_decisions(tmpdir, with_manifest_rows):
+    """
+    Downloaded keys in the manifest are skipped without walking the disk
+    """
+    key = "data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.zip"
+    if with_manifest_rows:
+        with DownloadManifest(str(tmpdir)) as manifest:
+            manifest.record(key, "downloaded", local_path=key.replace(".zip", ".csv"))
+    downloader = BinanceBulkDownloader(
+        destination_dir=str(tmpdir),
+        asset="spot",
+        data_frequency="1h",
+        symbols="BTCUSDT",
+        use_manifest=True,
+    )
+    with patch.object(
+        BinanceBulkDownloader,
+        "_get_file_list_from_s3_bucket",
+        return_value=[FileKey.parse(key)],
+    ), patch.object(
+        BinanceBulkDownloader, "_download", return_value=None
+    ) as mock_download, patch.object(
+        BinanceBulkDownloader, "_scan_local_files", return_value=set()
+    ) as mock_scan:
+        downloader.run_download()
+
+    assert mock_scan.called is not with_manifest_rows
+    assert mock_download.called is not with_manifest_rows
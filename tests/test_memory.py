@@ -0,0 +1,159 @@
+"""
+Test loading files into memory without writing to disk
+"""
+
+import os
+from functools import partial
+import tracemalloc
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.exceptions import (
+    BinanceBulkDownloaderMemoryError,
+    BinanceBulkDownloaderParamsError,
+)
+from binance_bulk_downloader.file_key import FileKey
+from binance_bulk_downloader.reader import parse_csv
+from tests.stand_in import StandInServer, make_zip, make_downloader
+
+HEADER = "open_time,open,high,low,close,volume,close_time,quote_volume,count,taker_buy_volume,taker_buy_quote_volume,ignore\n"
+DAY_MS = 24 * 60 * 60 * 1000
+HOUR_MS = 60 * 60 * 1000
+
+
+def make_klines(day, header):
+    start = 1704067200000 + (day - 1) * DAY_MS
+    rows = [
+        f"{start + hour * HOUR_MS},{day}.0,{day}.5,{day}.0,{day}.2,10,{start + (hour + 1) * HOUR_MS - 1},100,5,4,40,0\n"
+        for hour in range(24)
+    ]
+    return (HEADER if header else "") + "".join(rows)
+
+
+def make_files(symbols, days):
+    return {
+        f"data/futures/um/daily/klines/{symbol}/1h/{symbol}-1h-2024-01-0{day}.zip": make_zip(
+            f"{symbol}-1h-2024-01-0{day}.csv", make_klines(day, header=day % 2 == 0)
+        )
+        for symbol in symbols
+        for day in days
+    }
+
+
+make_downloader = partial(
+    make_downloader, data_frequency="1h", symbols=["BTCUSDT", "ETHUSDT"]
+)
+
+
+def test_arrays_per_symbol_in_time_order(tmpdir):
+    """
+    Files with and without header are concatenated per symbol in time order, nothing is written to disk
+    """
+    with StandInServer(make_files(["BTCUSDT", "ETHUSDT"], [3, 1, 2])) as server:
+        downloader = make_downloader(server, tmpdir, max_workers=3)
+        arrays = downloader.download_to_memory()
+
+    assert sorted(arrays) == ["BTCUSDT", "ETHUSDT"]
+    for array in arrays.values():
+        assert len(array) == 3 * 24
+        assert (numpy.diff(array["open_time"]) == HOUR_MS).all()
+        assert array["open"][0] == 1.0 and array["open"][-1] == 3.0
+        assert array["count"].dtype == numpy.int64
+    assert len(downloader.downloaded_list) == 6
+    assert os.listdir(tmpdir) == []
+
+
+def test_memory_limit_is_checked_before_downloading(tmpdir):
+    """
+    A run whose parsed data would exceed the memory limit sends no download request
+    """
+    files = make_files(["BTCUSDT", "ETHUSDT"], [1, 2])
+    with StandInServer(files) as server:
+        downloader = make_downloader(server, tmpdir)
+        with pytest.raises(BinanceBulkDownloaderMemoryError):
+            downloader.download_to_memory(memory_limit=1024)
+        downloads = [path for path in server.request_log if path.startswith("/data")]
+
+    assert downloads == []
+
+
+def test_failed_files_are_recorded(tmpdir):
+    """
+    A file that cannot be parsed is recorded in failed_list while the others are loaded
+    """
+    files = make_files(["BTCUSDT"], [1, 2])
+    broken_key = "data/futures/um/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-02.zip"
+    files[broken_key] = make_zip("BTCUSDT-1h-2024-01-02.csv", "1,2,3\n")
+    with StandInServer(files) as server:
+        downloader = make_downloader(server, tmpdir, symbols=["BTCUSDT"])
+        arrays = downloader.download_to_memory()
+
+    assert len(arrays["BTCUSDT"]) == 24
+    assert [key for key, _ in downloader.failed_list] == [broken_key]
+
+
+def test_load_peak_within_reserve(tmpdir):
+    """
+    Loading a file holds no more than its archive, twice its csv and the fixed overhead reserved for it
+    """
+    key = "data/futures/um/daily/trades/BTCUSDT/BTCUSDT-trades-2024-01-01.zip"
+    content = "".join(
+        f"{trade_id},42000.5,0.1,4200.05,{1704067200000 + trade_id},true\n"
+        for trade_id in range(200000)
+    )
+    archive = make_zip("BTCUSDT-trades-2024-01-01.csv", content)
+    with StandInServer({key: archive}) as server:
+        downloader = make_downloader(server, tmpdir, data_type="trades")
+        file_key = FileKey.parse(key, len(archive))
+        # Warm up imports and connections outside of the measurement
+        downloader._load_file(file_key)
+        tracemalloc.start()
+        try:
+            result, array = downloader._load_file(file_key)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    assert result.status == "downloaded" and len(array) == 200000
+    assert array.nbytes < len(content)
+    assert peak < (
+        len(archive) + 2 * len(content) + BinanceBulkDownloader._LOAD_OVERHEAD_BYTES
+    )
+
+
+def test_unsupported_data_type(tmpdir):
+    """
+    Only data types with a known csv layout can be parsed
+    """
+    downloader = BinanceBulkDownloader(destination_dir=str(tmpdir), data_type="metrics")
+    with pytest.raises(BinanceBulkDownloaderParamsError):
+        downloader.download_to_memory()
+
+
+def test_parse_spot_trades():
+    """
+    Spot trades have an extra is_best_match column and no header
+    """
+    array = parse_csv(
+        b"1,42000.5,0.1,4200.05,1704067200000,True,True\n"
+        b"2,42000.6,0.2,8400.12,1704067200001,False,True\n",
+        "trades",
+    )
+    assert array.dtype.names[-1] == "is_best_match"
+    assert array["is_buyer_maker"].tolist() == [True, False]
+    assert array["id"].tolist() == [1, 2]
+
+
+def test_as_frame(tmpdir):
+    """
+    DataFrames are returned on request
+    """
+    pytest.importorskip("pandas")
+    with StandInServer(make_files(["BTCUSDT"], [1])) as server:
+        downloader = make_downloader(server, tmpdir, symbols=["BTCUSDT"])
+        frames = downloader.download_to_memory(as_frame=True)
+
+    assert list(frames["BTCUSDT"].columns[:2]) == ["open_time", "open"]
@@ -0,0 +1,70 @@
+"""
+Test downloading several data frequencies from a single listing
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.exceptions import BinanceBulkDownloaderParamsError
+from binance_bulk_downloader.file_key import FileKey
+
+KEYS = [
+    "data/futures/um/daily/klines/BTCUSDT/1d/BTCUSDT-1d-2024-01-01.zip",
+    "data/futures/um/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.zip",
+    "data/futures/um/daily/klines/BTCUSDT/1m/BTCUSDT-1m-2024-01-01.zip",
+    "data/futures/um/daily/klines/BTCUSDT/1mo/BTCUSDT-1mo-2024-01-01.zip",
+    "data/futures/um/daily/klines/BTCUSDT/5m/BTCUSDT-5m-2024-01-01.zip",
+]
+
+
+@pytest.mark.parametrize(
+    "symbols, expected_prefix",
+    [
+        ("BTCUSDT", "data/futures/um/daily/klines/BTCUSDT/"),
+        (None, "data/futures/um/daily/klines"),
+    ],
+)
+def test_single_listing_for_all_frequencies(tmpdir, symbols, expected_prefix):
+    """
+    The prefix is listed once and files are grouped by interval
+    """
+    downloader = BinanceBulkDownloader(
+        destination_dir=str(tmpdir), data_frequency=["1m", "1h", "1d"], symbols=symbols
+    )
+    with patch.object(
+        BinanceBulkDownloader,
+        "_get_file_list_from_s3_bucket",
+        return_value=[FileKey.parse(key) for key in KEYS],
+    ) as mock_list, patch.object(
+        BinanceBulkDownloader, "_download", return_value=None
+    ) as mock_download:
+        downloader.run_download()
+
+    mock_list.assert_called_once_with(expected_prefix)
+    assert [call.args[0].key for call in mock_download.call_args_list] == [
+        KEYS[2],
+        KEYS[1],
+        KEYS[0],
+    ]
+
+
+def test_single_frequency_prefix_is_unchanged():
+    """
+    A single frequency still narrows the prefix to its directory
+    """
+    downloader = BinanceBulkDownloader(data_frequency=["1h"], symbols="BTCUSDT")
+    assert downloader._build_prefix() == "data/futures/um/daily/klines/BTCUSDT/1h/"
+
+
+@pytest.mark.parametrize(
+    "asset, data_frequency", [("um", ["1m", "2m"]), ("um", ["1m", "1s"]), ("um", [])]
+)
+def test_invalid_frequencies(asset, data_frequency):
+    """
+    Every frequency of the list is checked
+    """
+    downloader = BinanceBulkDownloader(asset=asset, data_frequency=data_frequency)
+    with pytest.raises(BinanceBulkDownloaderParamsError):
+        downloader._check_params()
@@ -0,0 +1,139 @@
+"""
+Test normalizing the header and timestamp unit of extracted files
+"""
+
+import gzip
+import io
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.exceptions import BinanceBulkDownloaderParamsError
+from binance_bulk_downloader.normalize import CsvNormalizer
+from tests.stand_in import StandInServer, make_zip
+
+PREFIX = "data/spot/daily/trades/BTCUSDT"
+HEADER = "id,price,qty,quote_qty,time,is_buyer_maker,is_best_match\n"
+MS_ROWS = "1,100,1,100,1735689599998,true,true\n2,100,1,100,1735689599999,false,true\n"
+US_ROWS = (
+    "3,100,1,100,1735689600000000,true,true\n4,100,1,100,1735689600000001,false,true\n"
+)
+
+
+def normalize(content, data_type="trades", **kwargs):
+    target = io.BytesIO()
+    CsvNormalizer(data_type, **kwargs).copy(io.BytesIO(content.encode()), target)
+    return target.getvalue().decode()
+
+
+@pytest.mark.parametrize(
+    "content, kwargs, expected",
+    [
+        (HEADER + MS_ROWS, {"header": "drop"}, MS_ROWS),
+        (MS_ROWS, {"header": "add"}, HEADER + MS_ROWS),
+        (HEADER + MS_ROWS, {"header": "add"}, HEADER + MS_ROWS),
+        (HEADER + MS_ROWS, {}, HEADER + MS_ROWS),
+        (
+            US_ROWS,
+            {"timestamp_unit": "ms"},
+            "3,100,1,100,1735689600000,true,true\n4,100,1,100,1735689600000,false,true\n",
+        ),
+        (
+            HEADER + MS_ROWS,
+            {"header": "drop", "timestamp_unit": "us"},
+            "1,100,1,100,1735689599998000,true,true\n2,100,1,100,1735689599999000,false,true\n",
+        ),
+        (US_ROWS, {"timestamp_unit": "us"}, US_ROWS),
+        ("", {"header": "add", "timestamp_unit": "ms"}, ""),
+    ],
+)
+def test_normalize_trades(content, kwargs, expected):
+    """
+    Header rows are added or dropped and timestamps converted, files already normalized are copied as they are
+    """
+    assert normalize(content, **kwargs) == expected
+
+
+def test_normalize_klines_timestamps():
+    """
+    Both open_time and close_time of klines are converted
+    """
+    row = "1735689600000000,1,2,0.5,1.5,10,1735689659999999,15,3,4,6,0\n"
+    assert normalize(row, "klines", timestamp_unit="ms") == (
+        "1735689600000,1,2,0.5,1.5,10,1735689659999,15,3,4,6,0\n"
+    )
+
+
+@pytest.mark.parametrize("timestamp_unit, factor", [("ms", 1), ("us", 1000)])
+def test_normalize_batches(monkeypatch, timestamp_unit, factor):
+    """
+    Rows are converted across batch boundaries, blank lines are dropped and a missing last line ending stays missing
+    """
+    monkeypatch.setattr(CsvNormalizer, "_BATCH_BYTES", 100)
+    times = [1735689600000 + index for index in range(50)]
+    rows = [
+        f"{index},100,1,100,{time * 1000 if index % 3 else time},true,true\r\n"
+        for index, time in enumerate(times)
+    ]
+    content = "\r\n".join(["".join(rows[:10]), "".join(rows[10:49]), rows[49]])
+    expected = "".join(
+        f"{index},100,1,100,{time * factor},true,true\r\n"
+        for index, time in enumerate(times)
+    )
+    assert normalize(content, timestamp_unit=timestamp_unit) == expected
+    assert normalize(content[:-2], timestamp_unit=timestamp_unit) == expected[:-2]
+
+
+def test_normalized_files_concatenate(tmpdir):
+    """
+    Files published with different headers and units are extracted uniform, and compressed at rest on request
+    """
+    files = {
+        f"{PREFIX}/BTCUSDT-trades-2024-12-31.zip": make_zip(
+            "BTCUSDT-trades-2024-12-31.csv", HEADER + MS_ROWS
+        ),
+        f"{PREFIX}/BTCUSDT-trades-2025-01-01.zip": make_zip(
+            "BTCUSDT-trades-2025-01-01.csv", US_ROWS
+        ),
+    }
+    with StandInServer(files) as server:
+        server.use(
+            BinanceBulkDownloader(
+                destination_dir=str(tmpdir),
+                data_type="trades",
+                asset="spot",
+                symbols="BTCUSDT",
+                keep_compressed="gzip",
+                csv_header="drop",
+                timestamp_unit="us",
+            )
+        ).run_download()
+
+    contents = [
+        gzip.decompress(tmpdir.join(PREFIX, name).read_binary()).decode()
+        for name in (
+            "BTCUSDT-trades-2024-12-31.csv.gz",
+            "BTCUSDT-trades-2025-01-01.csv.gz",
+        )
+    ]
+    assert "".join(contents) == normalize(MS_ROWS, timestamp_unit="us") + US_ROWS
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"csv_header": "keep"},
+        {"timestamp_unit": "ns"},
+        {"timestamp_unit": "ms", "keep_compressed": "zip"},
+        {"timestamp_unit": "ms", "data_type": "metrics"},
+    ],
+)
+def test_invalid_normalization_params(tmpdir, kwargs):
+    """
+    Unknown policies, zip at rest and data types without known columns are rejected
+    """
+    downloader = BinanceBulkDownloader(destination_dir=str(tmpdir), **kwargs)
+    with pytest.raises(BinanceBulkDownloaderParamsError):
+        downloader._check_params()
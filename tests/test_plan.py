@@ -0,0 +1,71 @@
+"""
+Test the dry-run plan and the free disk space preflight
+"""
+
+from collections import namedtuple
+from functools import partial
+from unittest.mock import patch
+
+import pytest
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.exceptions import BinanceBulkDownloaderDiskSpaceError
+from tests.stand_in import StandInServer, make_archive, make_downloader
+
+PREFIX = "data/futures/um/daily/trades/BTCUSDT"
+FILES = {
+    f"{PREFIX}/BTCUSDT-trades-2024-01-0{day}.zip": make_archive(
+        f"BTCUSDT-trades-2024-01-0{day}.zip", 1000 * day
+    )
+    for day in range(1, 4)
+}
+DiskUsage = namedtuple("DiskUsage", ["total", "used", "free"])
+
+
+make_downloader = partial(
+    make_downloader, data_type="trades", symbols="BTCUSDT", max_workers=1
+)
+
+
+def test_plan_sums_listed_sizes(tmpdir):
+    """
+    plan skips local files, sums listed sizes and downloads nothing
+    """
+    downloaded = f"{PREFIX}/BTCUSDT-trades-2024-01-01.csv"
+    tmpdir.join(downloaded).write("", ensure=True)
+    with StandInServer(FILES) as server:
+        download_plan = make_downloader(server, tmpdir).plan(bytes_per_second=1000)
+        assert not any(path.startswith("/data") for path in server.request_log)
+
+    remaining = [key for key in FILES if not key.endswith("01.zip")]
+    download_bytes = sum(len(FILES[key]) for key in remaining)
+    assert download_plan.file_count == 2
+    assert download_plan.skipped_count == 1
+    assert download_plan.download_bytes == download_bytes
+    assert download_plan.extracted_bytes == int(download_bytes * 3.5)
+    assert download_plan.required_bytes == download_plan.extracted_bytes + max(
+        len(FILES[key]) for key in remaining
+    )
+    assert download_plan.estimated_seconds == download_bytes / 1000
+    assert download_plan.fits_on_disk
+    assert sorted(file_key.key for file_key in download_plan.file_list) == remaining
+
+
+def test_run_download_refuses_to_overflow_disk(tmpdir):
+    """
+    run_download raises before the first download when the disk is too small
+    """
+    with StandInServer(FILES) as server, patch(
+        "shutil.disk_usage", return_value=DiskUsage(100, 90, 10)
+    ):
+        with pytest.raises(BinanceBulkDownloaderDiskSpaceError):
+            make_downloader(server, tmpdir).run_download()
+        assert not any(path.startswith("/data") for path in server.request_log)
+
+
+def test_free_bytes_of_missing_directory(tmpdir):
+    """
+    Free space is read from the closest existing parent
+    """
+    free_bytes = BinanceBulkDownloader._get_free_bytes(str(tmpdir.join("a/b/c")))
+    assert free_bytes > 0
@@ -0,0 +1,140 @@
+"""
+Test refreshing files republished under the same key
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.file_key import FileKey
+from binance_bulk_downloader.manifest import DownloadManifest
+from tests.stand_in import StandInServer, make_zip
+
+KEYS = [
+    "data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.zip",
+    "data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-02.zip",
+    "data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-03.zip",
+]
+
+
+@pytest.mark.parametrize("refresh, expected", [(True, [KEYS[1]]), (False, [])])
+def test_refresh_downloads_changed_keys_only(tmpdir, refresh, expected):
+    """
+    Only keys whose listed metadata changed since download are fetched again
+    """
+    listed_info = {
+        KEYS[0]: (100, "etag-0", "2024-01-02T08:00:00.000Z"),
+        KEYS[1]: (250, "etag-1b", "2024-02-01T08:00:00.000Z"),
+        KEYS[2]: (300, "etag-2", "2024-01-04T08:00:00.000Z"),
+    }
+    recorded_info = dict(listed_info)
+    recorded_info[KEYS[1]] = (200, "etag-1", "2024-01-03T08:00:00.000Z")
+    with DownloadManifest(str(tmpdir)) as manifest:
+        for key, (size, etag, last_modified) in recorded_info.items():
+            manifest.record(
+                key,
+                "downloaded",
+                size=size,
+                etag=etag,
+                last_modified=last_modified,
+                local_path=key.replace(".zip", ".csv"),
+            )
+
+    downloader = BinanceBulkDownloader(
+        destination_dir=str(tmpdir),
+        asset="spot",
+        data_frequency="1h",
+        symbols="BTCUSDT",
+        use_manifest=True,
+        refresh=refresh,
+    )
+
+    def mock_get_file_list(self, prefix):
+        return [FileKey.parse(key, *listed_info[key]) for key in KEYS]
+
+    with patch.object(
+        BinanceBulkDownloader, "_get_file_list_from_s3_bucket", mock_get_file_list
+    ), patch.object(
+        BinanceBulkDownloader, "_download", return_value=None
+    ) as mock_download:
+        downloader.run_download()
+
+    assert [call.args[0].key for call in mock_download.call_args_list] == expected
+
+
+def test_refresh_implies_manifest():
+    """
+    refresh needs the manifest to compare against
+    """
+    downloader = BinanceBulkDownloader(refresh=True)
+    assert downloader._use_manifest
+
+
+def test_refresh_fetches_republished_file(tmpdir):
+    """
+    A republished file is downloaded again and replaces the old local file
+    """
+    key = "data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.zip"
+    csv_path = tmpdir.join(key.replace(".zip", ".csv"))
+
+    def run(server, refresh):
+        downloader = server.use(
+            BinanceBulkDownloader(
+                destination_dir=str(tmpdir),
+                asset="spot",
+                data_frequency="1h",
+                symbols="BTCUSDT",
+                use_manifest=True,
+                refresh=refresh,
+            )
+        )
+        downloader.run_download()
+        return [path for path in server.request_log if path.startswith("/data")]
+
+    with StandInServer({key: make_zip("BTCUSDT-1h-2024-01-01.csv", "old")}) as server:
+        assert run(server, refresh=False) == [f"/{key}"]
+        assert csv_path.read() == "old"
+
+        server.files[key] = make_zip("BTCUSDT-1h-2024-01-01.csv", "new")
+        server.last_modified[key] = "2024-02-01T00:00:00.000Z"
+        server.request_log.clear()
+        assert run(server, refresh=True) == [f"/{key}"]
+        assert csv_path.read() == "new"
+
+        server.request_log.clear()
+        assert run(server, refresh=True) == []
+
+
+def test_refresh_retries_failed_refetch(tmpdir):
+    """
+    A republished file whose refetch failed is fetched again by the next refresh run
+    """
+    key = "data/spot/daily/klines/BTCUSDT/1h/BTCUSDT-1h-2024-01-01.zip"
+    csv_path = tmpdir.join(key.replace(".zip", ".csv"))
+
+    def run(server):
+        downloader = server.use(
+            BinanceBulkDownloader(
+                destination_dir=str(tmpdir),
+                asset="spot",
+                data_frequency="1h",
+                symbols="BTCUSDT",
+                refresh=True,
+            )
+        )
+        server.request_log.clear()
+        downloader.run_download()
+        return downloader
+
+    with StandInServer({key: make_zip("BTCUSDT-1h-2024-01-01.csv", "old")}) as server:
+        assert run(server).downloaded_list == [key]
+
+        server.files[key] = b"corrupt archive"
+        server.last_modified[key] = "2024-02-01T00:00:00.000Z"
+        assert [failed_key for failed_key, _ in run(server).failed_list] == [key]
+
+        server.files[key] = make_zip("BTCUSDT-1h-2024-01-01.csv", "new")
+        server.last_modified[key] = "2024-02-02T00:00:00.000Z"
+        assert run(server).downloaded_list == [key]
+        assert csv_path.read() == "new"
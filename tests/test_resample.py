@@ -0,0 +1,152 @@
+"""
+Test building coarser klines from local 1m klines
+"""
+
+from functools import partial
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+from binance_bulk_downloader.exceptions import BinanceBulkDownloaderParamsError
+from binance_bulk_downloader.reader import parse_csv, read_array
+from binance_bulk_downloader.resample import KlineResampler, format_klines
+from tests.stand_in import make_downloader
+
+PREFIX = "data/futures/um/daily/klines/BTCUSDT"
+MINUTE_MS = 60 * 1000
+DAY_MS = 24 * 60 * MINUTE_MS
+# Monday 2024-01-01
+START = 1704067200000
+
+
+def make_minutes(day, factor=1):
+    """
+    1m klines of a day, price rising by one every minute
+    """
+    start = START + (day - 1) * DAY_MS
+    rows = []
+    for minute in range(24 * 60):
+        open_time = (start + minute * MINUTE_MS) * factor
+        close_time = open_time + MINUTE_MS * factor - 1
+        price = (day - 1) * 24 * 60 + minute
+        rows.append(
+            f"{open_time},{price},{price + 2},{price - 1},{price + 1},1.5,{close_time},150,3,0.5,50,0\n"
+        )
+    return "".join(rows)
+
+
+def write_minutes(tmpdir, days):
+    for day in days:
+        tmpdir.join(PREFIX, "1m", f"BTCUSDT-1m-2024-01-{day:02d}.csv").write(
+            make_minutes(day), ensure=True
+        )
+
+
+make_downloader = partial(make_downloader, None, symbols="BTCUSDT")
+
+
+def test_resampler_aggregates_ohlcv():
+    """
+    Open is the first open, close the last close, high and low the extremes, volumes and counts are summed
+    """
+    minutes = parse_csv(make_minutes(1).encode(), "klines")
+    resampler = KlineResampler("1h", "1m")
+    hours = resampler.update(minutes)
+    assert resampler.flush() is None
+    assert len(hours) == 24
+    first = hours[0]
+    assert first["open_time"] == START
+    assert first["close_time"] == START + 60 * MINUTE_MS - 1
+    assert (first["open"], first["high"], first["low"], first["close"]) == (
+        0,
+        61,
+        -1,
+        60,
+    )
+    assert first["volume"] == 90 and first["quote_volume"] == 9000
+    assert first["count"] == 180
+    assert first["taker_buy_volume"] == 30 and first["taker_buy_quote_volume"] == 3000
+
+
+def test_resampler_carries_klines_across_files():
+    """
+    A kline spanning several files is emitted once complete, klines missing source rows are dropped
+    """
+    resampler = KlineResampler("1w", "1m")
+    weeks = [
+        resampler.update(parse_csv(make_minutes(day).encode(), "klines"))
+        for day in range(1, 9)
+    ]
+    assert [len(week) for week in weeks] == [0] * 6 + [1, 0]
+    assert weeks[6][0]["open_time"] == START
+    assert weeks[6][0]["count"] == 7 * 24 * 60 * 3
+    assert len(resampler.flush()) == 0
+
+
+def test_resampler_keeps_microseconds():
+    """
+    Microsecond source klines give microsecond klines
+    """
+    minutes = parse_csv(make_minutes(1, factor=1000).encode(), "klines")
+    hours = KlineResampler("1h", "1m").update(minutes)
+    assert hours[1]["open_time"] == (START + 60 * MINUTE_MS) * 1000
+    assert hours[1]["close_time"] == (START + 120 * MINUTE_MS) * 1000 - 1
+
+
+def test_resample_writes_files_like_downloads(tmpdir):
+    """
+    Each target frequency is written per day in the downloaded csv format, and not rewritten on the next run
+    """
+    write_minutes(tmpdir, [1, 2])
+    downloader = make_downloader(tmpdir, data_frequency=["15m", "1h", "1d"])
+    written = downloader.resample()
+
+    assert sorted(written) == sorted(
+        f"{PREFIX}/{interval}/BTCUSDT-{interval}-2024-01-{day:02d}.zip"
+        for interval in ("15m", "1h", "1d")
+        for day in (1, 2)
+    )
+    path = tmpdir.join(PREFIX, "1h", "BTCUSDT-1h-2024-01-02.csv")
+    hours = read_array(str(path), "klines")
+    assert len(hours) == 24
+    assert hours[0]["open_time"] == START + DAY_MS
+    assert path.read().splitlines()[0].startswith(f"{START + DAY_MS},1440.00000000,")
+    day = read_array(
+        str(tmpdir.join(PREFIX, "1d", "BTCUSDT-1d-2024-01-01.csv")), "klines"
+    )
+    assert (day["open"][0], day["close"][0]) == (0, 24 * 60)
+    assert downloader.resample() == []
+
+
+def test_verify_against_downloaded_files(tmpdir):
+    """
+    Resampled klines are compared with downloaded files, differences are reported by key
+    """
+    write_minutes(tmpdir, [1, 2])
+    hours = KlineResampler("1h", "1m").update(
+        parse_csv((make_minutes(1) + make_minutes(2)).encode(), "klines")
+    )
+    tmpdir.join(PREFIX, "1h", "BTCUSDT-1h-2024-01-01.csv").write_binary(
+        format_klines(hours[:24]), ensure=True
+    )
+    hours["high"][30] += 1
+    tmpdir.join(PREFIX, "1h", "BTCUSDT-1h-2024-01-02.csv").write_binary(
+        format_klines(hours[24:]), ensure=True
+    )
+
+    differences = make_downloader(tmpdir, data_frequency="1h").verify_resample()
+    assert differences == {
+        f"{PREFIX}/1h/BTCUSDT-1h-2024-01-02.zip": ["1 klines differ in high"]
+    }
+
+
+@pytest.mark.parametrize(
+    "data_frequency, source_interval", [("1m", "1m"), ("1h", "1mo"), ("1mo", "1w")]
+)
+def test_invalid_resample(tmpdir, data_frequency, source_interval):
+    """
+    Only coarser frequencies that are multiples of the source frequency can be built
+    """
+    with pytest.raises(BinanceBulkDownloaderParamsError):
+        make_downloader(tmpdir, data_frequency=data_frequency).resample(source_interval)
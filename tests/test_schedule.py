@@ -0,0 +1,73 @@
+"""
+Test size-aware download scheduling
+"""
+
+import os
+
+import pytest
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.exceptions import BinanceBulkDownloaderParamsError
+from binance_bulk_downloader.file_key import FileKey
+from tests.stand_in import StandInServer, make_archive
+
+PREFIX = "data/futures/um/monthly/trades"
+SIZES = {"AAAUSDT": 10, "BBBUSDT": 50, "CCCUSDT": 20, "DDDUSDT": 40, "EEEUSDT": 30}
+
+
+@pytest.mark.parametrize(
+    "schedule, expected",
+    [
+        ("listing", ["AAAUSDT", "BBBUSDT", "CCCUSDT", "DDDUSDT", "EEEUSDT"]),
+        ("largest_first", ["BBBUSDT", "DDDUSDT", "EEEUSDT", "CCCUSDT", "AAAUSDT"]),
+        ("interleave", ["BBBUSDT", "AAAUSDT", "DDDUSDT", "CCCUSDT", "EEEUSDT"]),
+    ],
+)
+def test_schedule_order(schedule, expected):
+    """
+    Files are ordered by listed size
+    """
+    file_list = [
+        FileKey.parse(f"{PREFIX}/{symbol}/{symbol}-trades-2024-01.zip", size=size)
+        for symbol, size in SIZES.items()
+    ]
+    downloader = BinanceBulkDownloader(schedule=schedule)
+    assert [file_key.symbol for file_key in downloader._schedule(file_list)] == expected
+
+
+def test_largest_file_is_requested_first(tmpdir):
+    """
+    With largest_first, the biggest archive of the stand-in is downloaded first
+    """
+    files = {
+        f"{PREFIX}/{symbol}/{symbol}-trades-2024-01.zip": make_archive(
+            f"{symbol}-trades-2024-01.zip", size * 1024
+        )
+        for symbol, size in SIZES.items()
+    }
+    with StandInServer(files) as server:
+        downloader = server.use(
+            BinanceBulkDownloader(
+                destination_dir=str(tmpdir),
+                data_type="trades",
+                timeperiod_per_file="monthly",
+                schedule="largest_first",
+                max_workers=1,
+            )
+        )
+        downloader.run_download()
+        downloads = [path for path in server.request_log if path.startswith("/data")]
+
+    assert downloads[0] == f"/{PREFIX}/BBBUSDT/BBBUSDT-trades-2024-01.zip"
+    for key in files:
+        assert os.path.exists(tmpdir.join(key.replace(".zip", ".csv")))
+
+
+@pytest.mark.parametrize("params", [{"schedule": "smallest_first"}, {"max_workers": 0}])
+def test_invalid_schedule_params(params):
+    """
+    schedule and max_workers are checked
+    """
+    downloader = BinanceBulkDownloader(**params)
+    with pytest.raises(BinanceBulkDownloaderParamsError):
+        downloader._check_params()
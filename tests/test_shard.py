@@ -0,0 +1,121 @@
+"""
+Test deterministic sharding of a run across nodes
+"""
+
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.exceptions import BinanceBulkDownloaderParamsError
+from tests.stand_in import StandInServer, make_zip
+
+SYMBOLS = ["AAAUSDT", "BBBUSDT", "CCCUSDT", "DDDUSDT", "EEEUSDT"]
+FILES = {
+    f"data/futures/um/daily/klines/{symbol}/1h/{symbol}-1h-2024-01-0{day}.zip": make_zip(
+        f"{symbol}-1h-2024-01-0{day}.csv", "0"
+    )
+    for symbol in SYMBOLS
+    for day in range(1, 4)
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_symbol_universe_cache():
+    BinanceBulkDownloader._SYMBOL_UNIVERSE_CACHE.clear()
+    yield
+    BinanceBulkDownloader._SYMBOL_UNIVERSE_CACHE.clear()
+
+
+def plan_shard(server, tmpdir, shard_index, shard_count, shard_by):
+    return server.use(
+        BinanceBulkDownloader(
+            destination_dir=str(tmpdir),
+            data_frequency="1h",
+            shard_index=shard_index,
+            shard_count=shard_count,
+            shard_by=shard_by,
+            listing_strategy="per_symbol",
+        )
+    ).plan()
+
+
+def plan_shards(server, tmpdir, shard_count, shard_by):
+    return [
+        plan_shard(server, tmpdir, shard_index, shard_count, shard_by)
+        for shard_index in range(shard_count)
+    ]
+
+
+@pytest.mark.parametrize("shard_by", ["key", "symbol"])
+def test_shards_partition_the_run(tmpdir, shard_by):
+    """
+    Every file is assigned to exactly one shard, the same way on every call
+    """
+    with StandInServer(FILES) as server:
+        shards = [
+            [file_key.key for file_key in download_plan.file_list]
+            for download_plan in plan_shards(server, tmpdir, 3, shard_by)
+        ]
+        again = [
+            [file_key.key for file_key in download_plan.file_list]
+            for download_plan in plan_shards(server, tmpdir, 3, shard_by)
+        ]
+
+    assert shards == again
+    assert sorted(key for shard in shards for key in shard) == sorted(FILES)
+    if shard_by == "symbol":
+        shard_symbols = [{key.split("/")[5] for key in shard} for shard in shards]
+        for index, symbols in enumerate(shard_symbols):
+            assert not symbols & set().union(*shard_symbols[index + 1 :])
+
+
+def test_symbol_shard_lists_only_its_symbols(tmpdir):
+    """
+    With shard_by symbol, a node lists the symbol directories, then only its own symbols
+    """
+    with StandInServer(FILES) as server:
+        download_plan = plan_shard(server, tmpdir, 0, 2, "symbol")
+        listed = {
+            parse_qs(urlparse(path).query)["prefix"][0].split("/")[5]
+            for path in server.request_log
+            if "delimiter" not in path
+        }
+    own_symbols = {file_key.symbol for file_key in download_plan.file_list}
+    assert own_symbols
+    assert listed == own_symbols
+
+
+def test_symbol_shard_finds_new_symbols(tmpdir):
+    """
+    Symbols listed after the universe was cached are still downloaded by their shard
+    """
+    BinanceBulkDownloader._SYMBOL_UNIVERSE_CACHE["data/futures/um/daily/klines/"] = (
+        SYMBOLS[:2]
+    )
+    with StandInServer(FILES) as server:
+        shards = plan_shards(server, tmpdir, 2, "symbol")
+
+    symbols = {
+        file_key.symbol
+        for download_plan in shards
+        for file_key in download_plan.file_list
+    }
+    assert symbols == set(SYMBOLS)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"shard_index": 0},
+        {"shard_index": 2, "shard_count": 2},
+        {"shard_index": 0, "shard_count": 2, "shard_by": "date"},
+    ],
+)
+def test_invalid_shard_params(params):
+    """
+    shard_index, shard_count and shard_by are checked
+    """
+    downloader = BinanceBulkDownloader(**params)
+    with pytest.raises(BinanceBulkDownloaderParamsError):
+        downloader._check_params()
@@ -0,0 +1,92 @@
+"""
+Test overlapping the listing with downloads
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.exceptions import BinanceBulkDownloaderDiskSpaceError
+from tests.stand_in import StandInServer, make_zip
+
+PREFIX = "data/futures/um/daily/trades/BTCUSDT"
+FILES = {
+    f"{PREFIX}/BTCUSDT-trades-2024-01-{day:02d}.zip": make_zip(
+        f"BTCUSDT-trades-2024-01-{day:02d}.csv", "0"
+    )
+    for day in range(1, 11)
+}
+
+
+@pytest.mark.parametrize("stream_listing", [True, False])
+def test_downloads_start_after_first_page(tmpdir, stream_listing):
+    """
+    When streaming, the first file is downloaded before the last listing page is requested
+    """
+    tmpdir.join(f"{PREFIX}/BTCUSDT-trades-2024-01-05.csv").write("", ensure=True)
+    with StandInServer(FILES, latency=0.05) as server:
+        downloader = server.use(
+            BinanceBulkDownloader(
+                destination_dir=str(tmpdir),
+                data_type="trades",
+                symbols="BTCUSDT",
+                max_workers=2,
+                stream_listing=stream_listing,
+            )
+        )
+        downloader._LISTING_PAGE_SIZE = 2
+        downloader.run_download()
+        log = list(server.request_log)
+
+    listing = [index for index, path in enumerate(log) if path.startswith("/?")]
+    downloads = [index for index, path in enumerate(log) if path.startswith("/data")]
+    assert len(listing) == 5
+    assert len(downloads) == len(FILES) - 1
+    assert (downloads[0] < listing[-1]) == stream_listing
+    assert sorted(downloader.downloaded_list) == sorted(
+        key for key in FILES if not key.endswith("05.zip")
+    )
+    for key in FILES:
+        assert os.path.exists(tmpdir.join(key.replace(".zip", ".csv")))
+
+
+def test_listing_after_a_streamed_run(tmpdir):
+    """
+    A streamed run does not stop later listings of the same instance
+    """
+    with StandInServer(FILES) as server:
+        downloader = server.use(
+            BinanceBulkDownloader(
+                destination_dir=str(tmpdir),
+                data_type="trades",
+                symbols="BTCUSDT",
+                stream_listing=True,
+            )
+        )
+        downloader._LISTING_PAGE_SIZE = 2
+        downloader.run_download()
+        tmpdir.join(PREFIX).remove()
+        download_plan = downloader.plan()
+
+    assert download_plan.file_count == len(FILES)
+
+
+def test_default_run_checks_disk_before_downloading(tmpdir):
+    """
+    Without streaming, a run that would not fit on disk sends no download request
+    """
+    with StandInServer(FILES) as server, patch.object(
+        BinanceBulkDownloader, "_get_free_bytes", return_value=0
+    ):
+        downloader = server.use(
+            BinanceBulkDownloader(
+                destination_dir=str(tmpdir), data_type="trades", symbols="BTCUSDT"
+            )
+        )
+        with pytest.raises(BinanceBulkDownloaderDiskSpaceError):
+            downloader.run_download()
+        downloads = [path for path in server.request_log if path.startswith("/data")]
+
+    assert downloads == []
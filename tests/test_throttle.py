@@ -0,0 +1,29 @@
+"""
+Test the shared bandwidth cap
+"""
+
+import threading
+import time
+
+from binance_bulk_downloader.throttle import BandwidthLimiter
+
+
+def test_bandwidth_limiter_caps_threads():
+    """
+    Threads sharing a limiter read no faster than its rate beyond the initial burst
+    """
+    limiter = BandwidthLimiter(100_000)
+
+    def read():
+        for _ in range(10):
+            limiter.consume(10_000)
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 300 kB at 100 kB/s, the first 100 kB being the burst
+    assert time.monotonic() - start >= 1.9
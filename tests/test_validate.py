@@ -0,0 +1,107 @@
+"""
+Test validating the content of downloaded files
+"""
+
+import gzip
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from binance_bulk_downloader.downloader import BinanceBulkDownloader
+from binance_bulk_downloader.validate import validate_file, validate_files
+from tests.stand_in import StandInServer, make_zip
+
+PREFIX = "data/futures/um/daily/klines/BTCUSDT/1h"
+HOUR_MS = 60 * 60 * 1000
+
+
+def make_klines(day, hours=range(24)):
+    start = 1704067200000 + (day - 1) * 24 * HOUR_MS
+    return "".join(
+        f"{start + hour * HOUR_MS},1,2,0.5,1.5,10,{start + (hour + 1) * HOUR_MS - 1},15,3,4,6,0\n"
+        for hour in hours
+    )
+
+
+def make_trades(ids):
+    return "id,price,qty,quote_qty,time,is_buyer_maker\n" + "".join(
+        f"{trade_id},100,1,100,{1704067200000 + trade_id},true\n" for trade_id in ids
+    )
+
+
+@pytest.mark.parametrize(
+    "data_type, content, interval, expected",
+    [
+        ("klines", make_klines(1), "1h", []),
+        ("klines", make_klines(1, [0, 1, 3]), "1h", ["1 breaks in open_time spacing"]),
+        (
+            "klines",
+            make_klines(1, [0, 1, 1, 2]),
+            "1h",
+            ["1 duplicate rows", "1 breaks in open_time spacing"],
+        ),
+        ("trades", make_trades([1, 2, 3]), None, []),
+        ("trades", make_trades([1, 2, 4]), None, ["1 gaps in id"]),
+        (
+            "trades",
+            make_trades([1, 3, 2]),
+            None,
+            ["1 non-increasing id", "1 gaps in id", "1 decreasing time"],
+        ),
+        ("trades", "", None, ["Empty file"]),
+    ],
+)
+def test_validate_file(tmpdir, data_type, content, interval, expected):
+    """
+    Continuity, ordering and duplicates are reported per file
+    """
+    path = tmpdir.join("file.csv")
+    path.write(content)
+    assert validate_file(str(path), data_type, interval) == expected
+    # Steps and duplicates across chunks are found as well
+    assert validate_file(str(path), data_type, interval, chunk_bytes=1) == expected
+
+
+def test_validate_compressed_and_wrong_columns(tmpdir):
+    """
+    Compressed files are read transparently, a wrong column count makes a file unreadable
+    """
+    good = tmpdir.join("good.csv.gz")
+    good.write_binary(gzip.compress(make_klines(1).encode()))
+    bad = tmpdir.join("bad.csv")
+    bad.write("1,2,3\n")
+    invalid = validate_files([str(good), str(bad)], "klines", ["1h", "1h"], 2)
+    assert list(invalid) == [str(bad)]
+    assert invalid[str(bad)][0].startswith("Unreadable")
+
+
+def test_validate_and_redownload(tmpdir):
+    """
+    Invalid local files are reported by key and downloaded again on request
+    """
+    keys = [f"{PREFIX}/BTCUSDT-1h-2024-01-0{day}.zip" for day in range(1, 4)]
+    files = {
+        key: make_zip(f"BTCUSDT-1h-2024-01-0{day}.csv", make_klines(day))
+        for day, key in enumerate(keys, start=1)
+    }
+    for day, key in enumerate(keys, start=1):
+        tmpdir.join(key.replace(".zip", ".csv")).write(make_klines(day), ensure=True)
+    truncated = tmpdir.join(keys[1].replace(".zip", ".csv"))
+    truncated.write(make_klines(2, range(20)) + "1704")
+
+    with StandInServer(files) as server:
+        downloader = server.use(
+            BinanceBulkDownloader(
+                destination_dir=str(tmpdir), data_frequency="1h", symbols="BTCUSDT"
+            )
+        )
+        assert list(downloader.validate(max_workers=2)) == [keys[1]]
+        assert server.request_log == []
+
+        problems = downloader.validate(redownload=True, max_workers=2)
+        downloads = [path for path in server.request_log if path.startswith("/data")]
+        assert list(problems) == [keys[1]]
+        assert downloads == [f"/{keys[1]}"]
+        assert downloader.validate(max_workers=2) == {}
+    assert truncated.read() == make_klines(2)